@@ -0,0 +1,103 @@
+"""
+Spatial data science analysis with Google Earth Engine and local arrays.
+
+The public functions of the modules are available from `statgis`, for
+example `statgis.zonal_statistics_collection`. The modules are imported on
+first use, and earthengine-api, pandas, scipy and rasterio only when a
+function needs them, so `import statgis` is fast.
+"""
+
+import importlib
+
+_MODULES = (
+    "aio",
+    "cache",
+    "cover_frequency",
+    "executor",
+    "indices",
+    "instrumentation",
+    "landsat_functions",
+    "plume",
+    "raster_stack",
+    "sample",
+    "sentinel_functions",
+    "time_series_analysis",
+    "tracing",
+    "zonal_statistics",
+    "zonal_store",
+)
+
+_EXPORTS = {
+    "cache": ["disable_cache", "enable_cache"],
+    "cover_frequency": [
+        "vegetation_frequency",
+        "vegetation_frequency_local",
+        "water_frequency",
+        "water_frequency_local",
+    ],
+    "indices": ["SpectralIndices", "add_indices", "compile_indices", "load_indices"],
+    "landsat_functions": [
+        "landsat_cloud_mask",
+        "landsat_preprocessing",
+        "landsat_preprocessing_local",
+        "landsat_scaler",
+    ],
+    "plume": [
+        "plume_characterization",
+        "plume_characterization_local",
+        "plume_collection",
+    ],
+    "raster_stack": ["RasterStack"],
+    "sample": ["sample_collection", "sample_collection_batch", "sample_image"],
+    "sentinel_functions": [
+        "sentinel_cloud_mask",
+        "sentinel_preprocessing",
+        "sentinel_preprocessing_local",
+        "sentinel_probability_mask",
+        "sentinel_scaler",
+    ],
+    "time_series_analysis": [
+        "TrendState",
+        "calc_anomalies",
+        "extract_dates",
+        "reduce_by_month",
+        "reduce_by_year",
+        "robust_trend_local",
+        "time_series_from_state",
+        "time_series_preocessing",
+        "time_series_processing_local",
+        "trend",
+        "trend_state",
+        "update_trend_state",
+    ],
+    "zonal_statistics": [
+        "ZonalAccumulator",
+        "iter_zonal_statistics_collection",
+        "zonal_statistics_collection",
+        "zonal_statistics_image",
+        "zonal_statistics_local",
+    ],
+    "zonal_store": ["ZonalStore"],
+}
+
+_ORIGIN = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(_ORIGIN) + list(_MODULES)
+
+
+def __getattr__(name):
+    if name in _MODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+
+    if name not in _ORIGIN:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module = importlib.import_module(f"{__name__}.{_ORIGIN[name]}")
+    value = getattr(module, name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
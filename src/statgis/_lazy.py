@@ -0,0 +1,43 @@
+"""Modules that are imported on first use, to keep `import statgis` fast."""
+
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    Placeholder of a module that imports it on the first access to one of its
+    attributes. The attributes are always read from the imported module, so
+    it sees the changes made to it after the import.
+    """
+
+    def __getattr__(self, attribute):
+        if attribute.startswith("__") and attribute.endswith("__"):
+            raise AttributeError(attribute)
+
+        return getattr(importlib.import_module(self.__name__), attribute)
+
+    def __repr__(self):
+        return f"<lazy module {self.__name__!r}>"
+
+
+def lazy_import(name):
+    """
+    Module that is imported on first use.
+
+    Parameters
+    ----------
+    name : str
+        Full name of the module, like `ee` or `scipy.ndimage`.
+
+    Returns
+    -------
+    module : module
+        The module if it is already imported, a `LazyModule` otherwise.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    return LazyModule(name)
@@ -0,0 +1,111 @@
+"""Split local cubes in spatial tiles and process them in a process pool."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def array_tiles(cube, tile_size):
+    """
+    Split the last two dimensions of an array in tiles.
+
+    Yields (rows, cols, block) with the slices of the tile and its data.
+    """
+    height, width = cube.shape[-2:]
+
+    for row in range(0, height, tile_size):
+        for col in range(0, width, tile_size):
+            rows = slice(row, min(row + tile_size, height))
+            cols = slice(col, min(col + tile_size, width))
+
+            yield rows, cols, np.asarray(cube[..., rows, cols])
+
+
+def stack_tiles(stack, tile_size, band):
+    """Split a RasterStack in tiles of one band, see `array_tiles`."""
+    for window, block in stack.iter_blocks(tile_size):
+        rows, cols = window.toslices()
+
+        yield slice(rows.start, rows.stop), slice(cols.start, cols.stop), block[:, band]
+
+
+def map_tiles(func, tiles, shape, processes=None, args=()):
+    """
+    Apply func(block, *args) to all the tiles and mosaic the outputs.
+
+    func must be a module level function that returns a dict of arrays whose
+    last two dimensions are the ones of the block. If processes is 1 the
+    tiles are processed in this process, otherwise in a process pool with at
+    most two tiles per worker in flight.
+
+    Returns a dict with the mosaics of the outputs, with last dimensions
+    shape.
+    """
+    results = {}
+
+    def store(rows, cols, output):
+        for key, value in output.items():
+            if key not in results:
+                results[key] = np.empty(value.shape[:-2] + tuple(shape), value.dtype)
+            results[key][..., rows, cols] = value
+
+    if processes == 1:
+        for rows, cols, block in tiles:
+            store(rows, cols, func(block, *args))
+
+        return results
+
+    processes = processes or os.cpu_count()
+
+    with ProcessPoolExecutor(processes) as pool:
+        pending = []
+
+        for rows, cols, block in tiles:
+            pending.append((rows, cols, pool.submit(func, block, *args)))
+
+            if len(pending) >= 2 * processes:
+                rows, cols, future = pending.pop(0)
+                store(rows, cols, future.result())
+
+        for rows, cols, future in pending:
+            store(rows, cols, future.result())
+
+    return results
+
+
+def reduce_tiles(func, tiles, merge, processes=None, args=()):
+    """
+    Apply func(block, *args) to all the tiles and merge the outputs with
+    merge(left, right), in the order of the tiles.
+
+    func must be a module level function. The pool is used as in
+    `map_tiles`. Returns the merged output, None without tiles.
+    """
+    result = None
+
+    def add(output):
+        nonlocal result
+        result = output if result is None else merge(result, output)
+
+    if processes == 1:
+        for _, _, block in tiles:
+            add(func(block, *args))
+
+        return result
+
+    processes = processes or os.cpu_count()
+
+    with ProcessPoolExecutor(processes) as pool:
+        pending = []
+
+        for _, _, block in tiles:
+            pending.append(pool.submit(func, block, *args))
+
+            if len(pending) >= 2 * processes:
+                add(pending.pop(0).result())
+
+        for future in pending:
+            add(future.result())
+
+    return result
@@ -0,0 +1,356 @@
+"""
+Awaitable versions of the statgis functions that download data.
+
+The blocking `getInfo` requests run in a thread pool, at most
+`max_concurrency` at the same time, so an event loop can overlap hundreds of
+requests. Retries use `asyncio.sleep` with the policy of the current
+`statgis.executor` executor.
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from statgis import tracing
+from statgis._lazy import lazy_import
+from statgis.cache import cached_async
+from statgis.executor import FetchError, get_executor, is_retryable
+from statgis.sample import _columns, _decode, _to_collection
+from statgis.time_series_analysis import _time_starts, _to_dates
+from statgis.tracing import span, traced
+from statgis.zonal_statistics import (
+    _add_date,
+    _collection_zones,
+    _default_reducer,
+    _image_pages,
+    _image_zones,
+    _is_zone_set,
+    _merge_stats,
+    _part_stats,
+    _properties,
+    _quadrants,
+    _region_reduction,
+    _too_large,
+    _zone_pages,
+    _zones_frame,
+)
+
+ee = lazy_import("ee")
+pd = lazy_import("pandas")
+
+_max_concurrency = 64
+_pool = None
+_semaphores = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def configure(max_concurrency=64):
+    """
+    Set the maximum number of requests in flight of the async functions.
+
+    Parameters
+    ----------
+    max_concurrency : int, optional
+        Maximum number of requests in flight per event loop, which is also the
+        number of threads of the pool (by default 64).
+    """
+    global _max_concurrency, _pool
+
+    with _lock:
+        previous = _pool
+        _max_concurrency = max_concurrency
+        _pool = None
+        _semaphores.clear()
+
+    if previous is not None:
+        previous.shutdown(wait=False)
+
+
+def _thread_pool():
+    global _pool
+
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(_max_concurrency, thread_name_prefix="statgis")
+        return _pool
+
+
+def _semaphore():
+    """Semaphore of the running event loop."""
+    loop = asyncio.get_running_loop()
+
+    with _lock:
+        semaphore = _semaphores.get(loop)
+        if semaphore is None:
+            semaphore = _semaphores[loop] = asyncio.Semaphore(_max_concurrency)
+
+    return semaphore
+
+
+async def get_info(ee_object):
+    """
+    Download the value of an Earth Engine object without blocking the event
+    loop, retrying rate-limit and transient errors.
+
+    Parameters
+    ----------
+    ee_object : ee.ComputedObject
+        Object to compute.
+
+    Returns
+    -------
+    value : object
+        Value computed by Earth Engine.
+
+    Raises
+    ------
+    statgis.executor.FetchError
+        If the request fails with a non retryable error or exhausts the
+        retries of the executor.
+    """
+    executor = get_executor()
+    name = f"{type(ee_object).__name__}.getInfo"
+    loop = asyncio.get_running_loop()
+    start, clock = tracing.now()
+
+    attempt = 0
+    while True:
+        try:
+            async with _semaphore():
+                future = loop.run_in_executor(_thread_pool(), ee_object.getInfo)
+                result = await asyncio.wait_for(future, executor.timeout)
+        except Exception as exception:
+            retryable = is_retryable(exception)
+
+            if not retryable or attempt >= executor.max_retries:
+                error = FetchError(name, exception, attempt + 1, retryable)
+                tracing.record(
+                    name, start, time.perf_counter() - clock, attempt + 1, error=error
+                )
+                raise error from exception
+
+            await asyncio.sleep(executor._delay(attempt))
+            attempt += 1
+        else:
+            tracing.record(
+                name, start, time.perf_counter() - clock, attempt + 1, result=result
+            )
+            return result
+
+
+async def _gather(func, items, return_exceptions=False):
+    """
+    Await func(item) for all the items concurrently, with the error handling
+    of `statgis.executor.RequestExecutor.map`.
+    """
+
+    async def run(item):
+        try:
+            return await func(item)
+        except FetchError as error:
+            error.item = item
+            return error
+
+    results = await asyncio.gather(*(run(item) for item in items))
+
+    if not return_exceptions:
+        for result in results:
+            if isinstance(result, FetchError):
+                raise result
+
+    return results
+
+
+async def _split_reduction(
+    Image, geom, scale, reducer, tileScale, depth, weights=False
+):
+    """
+    Awaitable version of `statgis.zonal_statistics._split_reduction`, the
+    quadrants are reduced concurrently.
+    """
+    stats = _part_stats(Image, geom, scale, reducer, tileScale, weights)
+
+    try:
+        return await get_info(stats)
+    except FetchError as error:
+        if depth <= 0 or not _too_large(error):
+            raise
+
+    async def reduce_part(part):
+        return await _split_reduction(
+            Image, part, scale, reducer, tileScale, depth - 1, weights=True
+        )
+
+    parts = _quadrants(geom, await get_info(geom.bounds(1).coordinates()))
+    with span(split=depth):
+        parts = await _gather(reduce_part, parts)
+
+    return _merge_stats(parts)
+
+
+@traced
+async def extract_dates(ImageCollection):
+    """
+    Awaitable version of `statgis.time_series_analysis.extract_dates`.
+    """
+    times = _time_starts(ImageCollection)
+
+    async def compute():
+        return _to_dates(await get_info(times))
+
+    return await cached_async("extract_dates", times, {}, compute)
+
+
+@traced
+async def sample_image(Image, band, geom, scale):
+    """
+    Awaitable version of `statgis.sample.sample_image`.
+    """
+    geom = _to_collection(geom)
+    bands = [band] if isinstance(band, str) else list(band)
+
+    columns = _columns(Image, bands, geom, scale)
+
+    async def compute():
+        return _decode(bands, await get_info(columns))
+
+    data = await cached_async("sample_image", columns, {"bands": bands}, compute)
+
+    if isinstance(band, str):
+        data = data[band]
+
+    return data
+
+
+@traced
+async def sample_collection(
+    ImageCollection, band, geom, scale, return_exceptions=False
+):
+    """
+    Awaitable version of `statgis.sample.sample_collection`. The images are
+    sampled concurrently, as many at the same time as allowed by
+    `configure`.
+    """
+    N = await get_info(ImageCollection.size())
+    ic_list = ImageCollection.toList(N)
+
+    async def sample(i):
+        image = ee.Image(ic_list.get(i))
+        with span(image=i):
+            return await sample_image(image, band=band, geom=geom, scale=scale)
+
+    return await _gather(sample, range(N), return_exceptions)
+
+
+async def _zone_pages_async(geom, zone_id, page_size):
+    """`_zone_pages` requesting the number of zones without blocking."""
+    size = None
+    if isinstance(geom, ee.FeatureCollection):
+        size = await get_info(geom.size())
+
+    return _zone_pages(geom, zone_id, page_size, size=size)
+
+
+async def _zones_dataframe(name, pages, reduce_page):
+    """Download all the pages of zones concurrently, see `_zones_frame`."""
+
+    async def fetch(item):
+        number, page = item
+        fc = reduce_page(page)
+
+        async def compute():
+            return _properties(await get_info(fc))
+
+        with span(page=number):
+            return await cached_async(name, fc, {}, compute)
+
+    return _zones_frame(await _gather(fetch, enumerate(pages)))
+
+
+@traced
+async def zonal_statistics_image(
+    Image,
+    geom,
+    scale,
+    bands="all",
+    reducer="all",
+    tileScale=16,
+    zone_id=None,
+    page_size=100,
+    max_split_depth=0,
+):
+    """
+    Awaitable version of `statgis.zonal_statistics.zonal_statistics_image`.
+    The pages of zones, and the parts of a split region, are reduced
+    concurrently.
+    """
+    if bands != "all":
+        Image = Image.select(bands)
+
+    if max_split_depth and not (isinstance(reducer, str) and reducer == "all"):
+        raise ValueError("max_split_depth needs the default reducer.")
+    if max_split_depth and _is_zone_set(geom):
+        raise ValueError("max_split_depth needs one region, not a set of zones.")
+
+    if reducer == "all":
+        reducer = _default_reducer()
+
+    pages = await _zone_pages_async(geom, zone_id, page_size)
+    if pages is not None:
+        reduce_page = _image_zones(Image, reducer, scale, tileScale)
+        return await _zones_dataframe("zonal_statistics_image", pages, reduce_page)
+
+    stats = Image.reduceRegion(
+        reducer=reducer, geometry=geom, scale=scale, tileScale=tileScale
+    )
+    stats = stats.set("system:time_start", Image.get("system:time_start"))
+
+    async def compute():
+        info = await _split_reduction(
+            Image, geom, scale, reducer, tileScale, max_split_depth
+        )
+        info.pop("weights", None)
+        return _add_date(pd.DataFrame(info, index=[0]))
+
+    return await cached_async("zonal_statistics_image", stats, {}, compute)
+
+
+@traced
+async def zonal_statistics_collection(
+    ImageCollection,
+    geom,
+    scale,
+    bands="all",
+    reducer="all",
+    tileScale=16,
+    zone_id=None,
+    page_size=100,
+):
+    """
+    Awaitable version of
+    `statgis.zonal_statistics.zonal_statistics_collection`. The pages of zones
+    are reduced concurrently.
+    """
+    if bands != "all":
+        ImageCollection = ImageCollection.map(lambda image: image.select(bands))
+
+    if reducer == "all":
+        reducer = _default_reducer()
+
+    pages = await _zone_pages_async(geom, zone_id, page_size)
+    if pages is not None:
+        size = await get_info(ImageCollection.size()) if pages else 0
+        pages = _image_pages(ImageCollection, pages, page_size, size)
+        reduce_page = _collection_zones(reducer, scale, tileScale)
+        return await _zones_dataframe("zonal_statistics_collection", pages, reduce_page)
+
+    reduce_image = _region_reduction(geom, scale, reducer, tileScale)
+
+    fc = ee.FeatureCollection(ImageCollection.map(reduce_image))
+
+    async def compute():
+        return _add_date(_properties(await get_info(fc)))
+
+    return await cached_async("zonal_statistics_collection", fc, {}, compute)
@@ -0,0 +1,395 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import warnings
+
+import numpy as np
+
+from statgis import tracing
+from statgis._lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+_MISSING = object()
+
+
+class ResultCache:
+    """
+    On-disk cache for the results of statgis functions.
+
+    The results are keyed by the serialized Earth Engine expression that is
+    computed plus the parameters of the call. Arrays are stored as npz files
+    and DataFrames as Parquet files (requires pyarrow), each one with a JSON
+    file of metadata whose modification time is its last access. There is
+    no shared index, so several processes can use the same directory.
+
+    Parameters
+    ----------
+    directory : str
+        Directory where the results are stored, `~` is expanded.
+
+    max_bytes : int, optional
+        Maximum size of the cache in bytes (by default 1 GiB). When it is
+        exceeded the least recently used results are deleted. Each process
+        counts the results it writes, so with several processes the cache
+        can exceed it until one of them goes over.
+
+    ttl : float, optional
+        Seconds that a result is valid. By default results never expire.
+
+    Attributes
+    ----------
+    hits, misses, evictions : int
+        Counters of the cache.
+    """
+
+    def __init__(self, directory, max_bytes=2**30, ttl=None):
+        self.directory = os.path.expanduser(str(directory))
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        # Running size of the cache, None until the directory is scanned.
+        self._bytes = None
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, name, ee_object, params=None):
+        """
+        Key of a call.
+
+        Parameters
+        ----------
+        name : str
+            Name of the function.
+
+        ee_object : ee.ComputedObject
+            Expression computed by the function.
+
+        params : dict, optional
+            Other parameters that change the result.
+
+        Returns
+        -------
+        key : str
+            SHA-256 hex digest of the call.
+        """
+        params = json.dumps(params or {}, sort_keys=True, default=repr)
+
+        digest = hashlib.sha256()
+        digest.update(name.encode())
+        digest.update(ee_object.serialize().encode())
+        digest.update(params.encode())
+
+        return digest.hexdigest()
+
+    def _meta_path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def _entry(self, key):
+        """Metadata of a stored result with its last access, None if missing."""
+        path = self._meta_path(key)
+        try:
+            with open(path) as file:
+                entry = json.load(file)
+            entry["accessed"] = os.path.getmtime(path)
+        except (OSError, ValueError):
+            return None
+
+        return entry if "file" in entry else None
+
+    def _entries(self):
+        """Metadata of all the stored results by key."""
+        entries = {}
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                entry = self._entry(name[: -len(".json")])
+                if entry is not None:
+                    entries[name[: -len(".json")]] = entry
+
+        return entries
+
+    def _remove(self, key, entry):
+        """Delete a result of the cache."""
+        paths = [self._meta_path(key), os.path.join(self.directory, entry["file"])]
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes = max(0, self._bytes - entry["bytes"])
+
+    def get(self, key):
+        """
+        Return a stored result, or `_MISSING` if there is no valid result.
+        """
+        entry = self._entry(key)
+
+        if entry is not None and self.ttl is not None:
+            if time.time() - entry["created"] > self.ttl:
+                self._remove(key, entry)
+                entry = None
+
+        value = _MISSING
+        if entry is not None:
+            try:
+                value = _read(os.path.join(self.directory, entry["file"]), entry)
+            except (OSError, ValueError):
+                self._remove(key, entry)
+
+        with self._lock:
+            if value is _MISSING:
+                self.misses += 1
+                return _MISSING
+            self.hits += 1
+
+        # Set the time explicitly, the file system clock can be coarse.
+        now = time.time()
+        try:
+            os.utime(self._meta_path(key), (now, now))
+        except OSError:
+            pass
+
+        return value
+
+    def put(self, key, value):
+        """
+        Store a result and evict the least recently used ones if needed.
+
+        The size of the cache is kept as a running total, the directory is
+        only scanned the first time and when the total exceeds max_bytes.
+        """
+        previous = self._entry(key)
+        entry = _write(os.path.join(self.directory, key), value)
+        entry["created"] = time.time()
+        _replace_json(self._meta_path(key), entry)
+        os.utime(self._meta_path(key), (entry["created"], entry["created"]))
+
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes += entry["bytes"]
+                if previous is not None:
+                    self._bytes -= previous["bytes"]
+            if self._bytes is not None and self._bytes <= self.max_bytes:
+                return
+
+        # Scan the directory, that other processes may have changed too.
+        entries = self._entries()
+        total = sum(item["bytes"] for item in entries.values())
+        with self._lock:
+            self._bytes = total
+
+        by_access = sorted(entries, key=lambda k: entries[k]["accessed"])
+        for old in by_access:
+            if total <= self.max_bytes:
+                break
+            if old == key:
+                continue
+            total -= entries[old]["bytes"]
+            self._remove(old, entries[old])
+            with self._lock:
+                self.evictions += 1
+
+    def clear(self):
+        """Delete all the results."""
+        for key, entry in self._entries().items():
+            self._remove(key, entry)
+
+    def stats(self):
+        """Counters and size of the cache."""
+        entries = self._entries()
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(entries),
+                "bytes": sum(item["bytes"] for item in entries.values()),
+            }
+
+
+def _temporary(path):
+    """Name of a temporary file next to path, unique by process and thread."""
+    return f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+
+
+def _replace_json(path, data):
+    """Write a JSON file atomically."""
+    tmp = _temporary(path)
+    with open(tmp, "w") as file:
+        json.dump(data, file)
+    os.replace(tmp, path)
+
+
+def _write(path, value):
+    """Store a value atomically and return its metadata."""
+    if isinstance(value, pd.DataFrame):
+        path += ".parquet"
+        kind = "dataframe"
+    elif isinstance(value, pd.DatetimeIndex):
+        path += ".npz"
+        kind = "dates"
+    elif isinstance(value, np.ndarray):
+        path += ".npz"
+        kind = "array"
+    elif isinstance(value, dict):
+        path += ".npz"
+        kind = "dict"
+    else:
+        raise TypeError(f"Results of type {type(value).__name__} can't be cached.")
+
+    tmp = _temporary(path)
+    try:
+        with open(tmp, "wb") as file:
+            if kind == "dataframe":
+                value.to_parquet(file)
+            elif kind == "dates":
+                dates = value.values.astype("datetime64[ns]").astype(np.int64)
+                np.savez(file, dates=dates)
+            elif kind == "array":
+                np.savez(file, array=value)
+            else:
+                np.savez(file, **{str(k): np.asarray(v) for k, v in value.items()})
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    return {
+        "file": os.path.basename(path),
+        "kind": kind,
+        "bytes": os.path.getsize(path),
+    }
+
+
+def _read(path, entry):
+    """Load a value stored by `_write`."""
+    kind = entry["kind"]
+
+    if kind == "dataframe":
+        return pd.read_parquet(path)
+
+    with np.load(path, allow_pickle=False) as data:
+        if kind == "dates":
+            return pd.DatetimeIndex(data["dates"].astype("datetime64[ns]"))
+        if kind == "array":
+            return data["array"]
+        return {k: data[k] for k in data.files}
+
+
+_cache = None
+
+
+def enable_cache(directory, max_bytes=2**30, ttl=None):
+    """
+    Cache the results of extract_dates, sample_image and the zonal statistics
+    functions on disk. See `ResultCache` for the parameters.
+
+    Returns
+    -------
+    cache : ResultCache
+        Cache in use.
+    """
+    global _cache
+
+    _cache = ResultCache(directory, max_bytes=max_bytes, ttl=ttl)
+
+    return _cache
+
+
+def disable_cache():
+    """Stop caching results."""
+    global _cache
+
+    _cache = None
+
+
+def get_cache():
+    """Return the cache in use, or None if caching is disabled."""
+    return _cache
+
+
+def _store(cache, key, value):
+    """
+    Store a computed result. A failed write is only warned, the result is
+    still returned by the caller.
+    """
+    try:
+        cache.put(key, value)
+    except Exception as exception:
+        warnings.warn(f"The result {key} could not be cached: {exception!r}")
+
+
+def cached(name, ee_object, params, compute):
+    """
+    Return the cached result of a call, or compute and store it.
+
+    Parameters
+    ----------
+    name : str
+        Name of the function.
+
+    ee_object : ee.ComputedObject
+        Expression computed by the function.
+
+    params : dict
+        Other parameters that change the result.
+
+    compute : callable
+        Function without arguments that computes the result.
+
+    Returns
+    -------
+    result : object
+        Result of the call.
+    """
+    cache = _cache
+    if cache is None:
+        return compute()
+
+    key = cache.key(name, ee_object, params)
+
+    start, clock = tracing.now()
+    value = cache.get(key)
+    if value is _MISSING:
+        with tracing._state(cache="miss"):
+            value = compute()
+        _store(cache, key, value)
+    else:
+        tracing.record(name, start, time.perf_counter() - clock, 0, cache="hit")
+
+    return value
+
+
+async def cached_async(name, ee_object, params, compute):
+    """
+    Awaitable version of `cached`, compute is an async function without
+    arguments. The cache is read and written in a worker thread.
+    """
+    cache = _cache
+    if cache is None:
+        return await compute()
+
+    key = cache.key(name, ee_object, params)
+
+    start, clock = tracing.now()
+    value = await asyncio.to_thread(cache.get, key)
+    if value is _MISSING:
+        with tracing._state(cache="miss"):
+            value = await compute()
+        await asyncio.to_thread(_store, cache, key, value)
+    else:
+        tracing.record(name, start, time.perf_counter() - clock, 0, cache="hit")
+
+    return value
@@ -0,0 +1,389 @@
+"""
+Command-line batch runner of statgis.
+
+A job spec (JSON) lists the sites, the image collection, its preprocessing
+and the analyses to run. Each (site, analysis) pair is a unit of work; the
+units run concurrently in a thread pool, their results are written as
+Parquet files and a checkpoint records the finished units, so an
+interrupted run resumes without redoing them.
+
+Run it with `python -m statgis run job.json`.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from statgis._lazy import lazy_import
+from statgis.indices import add_indices
+from statgis.landsat_functions import landsat_preprocessing
+from statgis.plume import plume_collection
+from statgis.sentinel_functions import sentinel_preprocessing
+from statgis.time_series_analysis import time_series_preocessing
+from statgis.zonal_statistics import zonal_statistics_collection
+
+ee = lazy_import("ee")
+pd = lazy_import("pandas")
+
+DEFAULTS = {
+    "start": None,
+    "end": None,
+    "preprocessing": None,
+    "indices": None,
+    "sensor": "landsat8",
+    "scale": 30,
+    "buffer": 1000,
+    "output": "statgis_output",
+    "workers": 4,
+    "project": None,
+}
+
+# Keys of the spec that do not change the results.
+_RUN_KEYS = ("output", "workers", "project")
+
+
+def _slug(name):
+    """Name of a site usable as a directory name."""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(name)).strip("_") or "site"
+
+
+def _read_sites(sites, directory):
+    """
+    List of sites with a name and coords ([lon, lat]) or a GeoJSON geometry.
+    sites is a list, a dict of groups of sites like points_of_interest.json,
+    or the path of a JSON file with one of them.
+    """
+    if isinstance(sites, str):
+        with open(os.path.join(directory, sites)) as file:
+            sites = json.load(file)
+
+    if isinstance(sites, dict):
+        sites = [site for group in sites.values() for site in group]
+
+    names = set()
+    for site in sites:
+        if "name" not in site or not ("coords" in site or "geometry" in site):
+            raise ValueError(f"Each site needs a name and coords or geometry: {site}")
+        if _slug(site["name"]) in names:
+            raise ValueError(f"Duplicate site name: {site['name']}")
+        names.add(_slug(site["name"]))
+
+    return sites
+
+
+def load_spec(path):
+    """
+    Read and validate a job spec.
+
+    Parameters
+    ----------
+    path : str
+        Path of the JSON file. Relative paths of sites and output are
+        relative to its directory.
+
+    Returns
+    -------
+    spec : dict
+        Spec with the defaults of `DEFAULTS` and the sites read.
+    """
+    with open(path) as file:
+        spec = json.load(file)
+
+    directory = os.path.dirname(os.path.abspath(path))
+
+    missing = {"sites", "collection", "analyses"} - set(spec)
+    if missing:
+        raise ValueError(f"The job spec needs {', '.join(sorted(missing))}.")
+
+    if isinstance(spec["analyses"], list):
+        spec["analyses"] = {analysis: {} for analysis in spec["analyses"]}
+
+    unknown = set(spec["analyses"]) - set(ANALYSES)
+    if unknown:
+        raise ValueError(f"Unknown analyses: {', '.join(sorted(unknown))}.")
+
+    if spec.get("preprocessing") not in (None, "landsat", "sentinel"):
+        raise ValueError("preprocessing must be landsat, sentinel or null.")
+
+    spec = {**DEFAULTS, **spec}
+    spec["sites"] = _read_sites(spec["sites"], directory)
+    spec["output"] = os.path.join(directory, spec["output"])
+
+    return spec
+
+
+def _geometry(site, spec):
+    """Region of a site: its geometry or a buffer around its coords."""
+    if "geometry" in site:
+        return ee.Geometry(site["geometry"])
+    return ee.Geometry.Point(site["coords"]).buffer(site.get("buffer", spec["buffer"]))
+
+
+def _collection(spec, geom):
+    """Image collection of the spec in a region, preprocessed."""
+    ImageCollection = ee.ImageCollection(spec["collection"]).filterBounds(geom)
+
+    if spec["start"] is not None:
+        start = pd.Timestamp(spec["start"]).value // 10**6
+        ImageCollection = ImageCollection.filter(
+            ee.Filter.gte("system:time_start", start)
+        )
+    if spec["end"] is not None:
+        end = pd.Timestamp(spec["end"]).value // 10**6
+        ImageCollection = ImageCollection.filter(ee.Filter.lt("system:time_start", end))
+
+    if spec["preprocessing"] == "landsat":
+        ImageCollection = ImageCollection.map(landsat_preprocessing)
+    elif spec["preprocessing"] == "sentinel":
+        ImageCollection = ImageCollection.map(sentinel_preprocessing)
+
+    if spec["indices"]:
+        keys, sensor = spec["indices"], spec["sensor"]
+        ImageCollection = ImageCollection.map(
+            lambda image: add_indices(image, keys, sensor)
+        )
+
+    return ImageCollection
+
+
+def _zonal_statistics(ImageCollection, geom, site, options, spec):
+    """Zonal statistics of the images in the site."""
+    return zonal_statistics_collection(
+        ImageCollection,
+        geom,
+        options.get("scale", spec["scale"]),
+        bands=options.get("bands", "all"),
+        tileScale=options.get("tileScale", 16),
+    )
+
+
+def _time_series(ImageCollection, geom, site, options, spec):
+    """Mean of the time series bands of the images in the site."""
+    data, _ = time_series_preocessing(ImageCollection, options["band"])
+
+    return zonal_statistics_collection(
+        data,
+        geom,
+        options.get("scale", spec["scale"]),
+        bands=[options["band"], "predicted", "stational", "stational_mean", "anomaly"],
+        reducer=ee.Reducer.mean(),
+        tileScale=options.get("tileScale", 16),
+    )
+
+
+def _plume(ImageCollection, geom, site, options, spec):
+    """Plume area, pixels and centroid of the images in the site."""
+    if "sample_region" not in site:
+        raise ValueError(f"The site {site['name']} needs a sample_region.")
+
+    bands = {
+        key: options[key] for key in ("blue", "green", "red", "nir") if key in options
+    }
+
+    return plume_collection(
+        ImageCollection,
+        ee.Geometry(site["sample_region"]),
+        geom,
+        scale=options.get("scale", spec["scale"]),
+        **bands,
+    )
+
+
+ANALYSES = {
+    "zonal_statistics": _zonal_statistics,
+    "time_series": _time_series,
+    "plume": _plume,
+}
+
+
+class Checkpoint:
+    """
+    Record of the finished units of a job, stored as JSON next to the
+    results.
+
+    Parameters
+    ----------
+    path : str
+        Path of the checkpoint file.
+
+    digest : str
+        Digest of the spec. A checkpoint of another spec can't be resumed,
+        None to read any checkpoint.
+
+    restart : bool, optional
+        If True, forget the units of a previous run.
+    """
+
+    def __init__(self, path, digest, restart=False):
+        self.path = path
+        self.digest = digest
+        self.units = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(path) and not restart:
+            with open(path) as file:
+                data = json.load(file)
+
+            if digest is not None and data["spec"] != digest:
+                raise ValueError(
+                    f"{path} belongs to another job spec, use --restart to run "
+                    "the job from the beginning."
+                )
+            self.units = data["units"]
+
+    def done(self, unit, directory):
+        """True if the unit finished and its result exists."""
+        entry = self.units.get(unit)
+        return (
+            entry is not None
+            and entry["status"] == "done"
+            and os.path.exists(os.path.join(directory, entry["file"]))
+        )
+
+    def record(self, unit, **entry):
+        """Store the result of a unit."""
+        with self._lock:
+            self.units[unit] = entry
+
+            data = {"spec": self.digest, "units": self.units}
+            with open(self.path + ".tmp", "w") as file:
+                json.dump(data, file, indent=1, default=str)
+            os.replace(self.path + ".tmp", self.path)
+
+
+def _digest(spec):
+    """Digest of the keys of the spec that change the results."""
+    spec = {key: value for key, value in spec.items() if key not in _RUN_KEYS}
+    text = json.dumps(spec, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def units(spec):
+    """List of (unit, site, analysis) of a job, unit is `site/analysis`."""
+    return [
+        (f"{_slug(site['name'])}/{analysis}", site, analysis)
+        for site in spec["sites"]
+        for analysis in spec["analyses"]
+    ]
+
+
+def run_job(spec, workers=None, restart=False, log=None):
+    """
+    Run the units of a job that are not finished yet.
+
+    Parameters
+    ----------
+    spec : dict
+        Job spec read with `load_spec`.
+
+    workers : int, optional
+        Number of units run at the same time (by default the workers of the
+        spec).
+
+    restart : bool, optional
+        If True, run all the units again.
+
+    log : callable, optional
+        Function called with a message when each unit finishes.
+
+    Returns
+    -------
+    summary : dict
+        Number of units done, skipped (finished before) and failed.
+    """
+    output = spec["output"]
+    os.makedirs(output, exist_ok=True)
+
+    checkpoint = Checkpoint(
+        os.path.join(output, "checkpoint.json"), _digest(spec), restart
+    )
+    log = log or (lambda message: None)
+
+    pending = [item for item in units(spec) if not checkpoint.done(item[0], output)]
+    summary = {"done": 0, "skipped": len(units(spec)) - len(pending), "failed": 0}
+
+    def run(unit, site, analysis):
+        start = time.perf_counter()
+
+        geom = _geometry(site, spec)
+        ImageCollection = _collection(spec, geom)
+        options = spec["analyses"][analysis] or {}
+
+        data = ANALYSES[analysis](ImageCollection, geom, site, options, spec)
+
+        file = unit + ".parquet"
+        path = os.path.join(output, file)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data.to_parquet(path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+        checkpoint.record(
+            unit,
+            status="done",
+            file=file,
+            rows=len(data),
+            seconds=round(time.perf_counter() - start, 3),
+        )
+
+    with ThreadPoolExecutor(workers or spec["workers"]) as pool:
+        futures = {pool.submit(run, *item): item[0] for item in pending}
+
+        for future in as_completed(futures):
+            unit = futures[future]
+            error = future.exception()
+
+            if error is None:
+                summary["done"] += 1
+                log(f"done {unit}")
+            else:
+                summary["failed"] += 1
+                checkpoint.record(unit, status="failed", error=repr(error))
+                log(f"failed {unit}: {error!r}")
+
+    return summary
+
+
+def main(argv=None):
+    """Entry point of `python -m statgis`."""
+    parser = argparse.ArgumentParser(
+        prog="statgis", description="Run statgis jobs over lists of sites."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run or resume a job")
+    run.add_argument("spec", help="path of the JSON job spec")
+    run.add_argument("--workers", type=int, help="units run at the same time")
+    run.add_argument(
+        "--restart", action="store_true", help="ignore the checkpoint and run all"
+    )
+
+    status = commands.add_parser("status", help="show the progress of a job")
+    status.add_argument("spec", help="path of the JSON job spec")
+
+    args = parser.parse_args(argv)
+    spec = load_spec(args.spec)
+
+    if args.command == "status":
+        checkpoint = Checkpoint(os.path.join(spec["output"], "checkpoint.json"), None)
+        for unit, _, _ in units(spec):
+            entry = checkpoint.units.get(unit, {"status": "pending"})
+            print(f"{entry['status']:8} {unit}")
+        return 0
+
+    ee.Initialize(project=spec["project"])
+
+    summary = run_job(
+        spec,
+        workers=args.workers,
+        restart=args.restart,
+        log=lambda message: print(message, file=sys.stderr),
+    )
+    print(json.dumps(summary))
+
+    return 1 if summary["failed"] else 0
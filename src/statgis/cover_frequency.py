@@ -1,4 +1,37 @@
-import ee
+import numpy as np
+
+from statgis._lazy import lazy_import
+from statgis.indices import compile_indices
+from statgis.raster_stack import RasterStack
+
+ee = lazy_import("ee")
+
+
+def _cover_bands(bands):
+    """
+    Reflectances of indices.json for the BLUE, GREEN, RED, NIR, SWIR bands.
+    mNDWI is computed with the SWIR band, as it has always been done here.
+    """
+    return {
+        "R_BLUE": bands[0],
+        "R_GREEN": bands[1],
+        "R_RED": bands[2],
+        "R_NIR": bands[3],
+        "R_SWIR": bands[4],
+        "R_SWIR2": bands[4],
+    }
+
+
+def _water_rule(indices):
+    """Water classification from the mNDWI, EVI and NDVI indices."""
+    mndwi, evi, ndvi = indices["mNDWI"], indices["EVI"], indices["NDVI"]
+    return (evi < np.float32(0.1)) & ((mndwi > evi) | (mndwi > ndvi))
+
+
+def _vegetation_rule(indices):
+    """Vegetation classification from the EVI, NDVI and NDBI indices."""
+    evi, ndvi, ndbi = indices["EVI"], indices["NDVI"], indices["NDBI"]
+    return (evi >= np.float32(0.1)) & (ndvi >= np.float32(0.2)) & (ndbi < 0)
 
 
 def water_frequency(
@@ -21,18 +54,14 @@ def water_frequency(
     water_frequency
     """
 
-    def water_detection(image):
-        mndwi = image.expression(
-            f"(b('{bands[1]}') - b('{bands[4]}'))/(b('{bands[1]}') + b('{bands[4]}'))",
-        ).rename("mNDWI")
+    indices = compile_indices(["mNDWI", "EVI", "NDVI"], _cover_bands(bands))
 
-        evi = image.expression(
-            f"(b('{bands[3]}') - b('{bands[2]}'))/(b('{bands[3]}')+6*b('{bands[2]}')-7.5*b('{bands[0]}')+1)*2.5"
-        ).rename("EVI")
+    def water_detection(image):
+        index = indices.ee(image)
 
-        ndvi = image.expression(
-            f"(b('{bands[3]}') - b('{bands[2]}'))/(b('{bands[3]}') + b('{bands[2]}'))"
-        ).rename("NDVI")
+        mndwi = index.select("mNDWI")
+        evi = index.select("EVI")
+        ndvi = index.select("NDVI")
 
         water = (
             evi.lt(0.1)
@@ -69,20 +98,14 @@ def vegetation_frequency(
     ------
     vegetation_frequency
     """
-    def vegetation_detection(image):
-        
-        evi = image.expression(
-            f"(b('{bands[3]}') - b('{bands[2]}'))/(b('{bands[3]}')+6*b('{bands[2]}')-7.5*b('{bands[0]}')+1)*2.5"
-        ).rename("EVI")
-
-        ndvi = image.expression(
-            f"(b('{bands[3]}') - b('{bands[2]}'))/(b('{bands[3]}') + b('{bands[2]}'))"
-        ).rename("NDVI")
+    indices = compile_indices(["EVI", "NDVI", "NDBI"], _cover_bands(bands))
 
-        ndbi = image.expression(
-            f"(b('{bands[4]}') - b('{bands[3]}'))/(b('{bands[4]}') + b('{bands[3]}'))",
-        ).rename("NDBI")
+    def vegetation_detection(image):
+        index = indices.ee(image)
 
+        evi = index.select("EVI")
+        ndvi = index.select("NDVI")
+        ndbi = index.select("NDBI")
 
         vegetation = (
             evi.gte(0.1)
@@ -96,4 +119,94 @@ def vegetation_frequency(
 
     vegetation_frequency = ImageCollection.mean()
         
-    return vegetation_frequency
\ No newline at end of file
+    return vegetation_frequency
+
+
+def _band_positions(cube, bands):
+    """Positions in the band axis of the requested bands."""
+    if all(isinstance(band, (int, np.integer)) for band in bands):
+        return list(bands)
+
+    names = [str(name) for name in cube["band"].values]
+
+    return [names.index(band) for band in bands]
+
+
+def _frequency(cube, bands, keys, rule):
+    """
+    Stream a (time, band, y, x) cube one time slice at a time and compute the
+    fraction of valid observations classified as True by rule.
+    """
+    if isinstance(cube, RasterStack):
+        return cube.apply(lambda block: _frequency(block, bands, keys, rule))
+
+    positions = _band_positions(cube, bands)
+    indices = compile_indices(keys, _cover_bands(range(5)))
+
+    # Without time steps every pixel has no valid observations, so it is NaN.
+    hits = np.zeros(cube.shape[-2:], dtype=np.uint32)
+    valid = np.zeros(cube.shape[-2:], dtype=np.uint32)
+
+    for t in range(cube.shape[0]):
+        layer = np.asarray(cube[t], dtype=np.float32)[positions]
+
+        finite = np.isfinite(layer).all(axis=0)
+        detected = rule(indices.numpy(layer)) & finite
+
+        hits += detected
+        valid += finite
+
+    frequency = np.full(valid.shape, np.nan, dtype=np.float32)
+    np.divide(hits, valid, out=frequency, where=valid > 0, casting="unsafe")
+
+    return frequency
+
+
+def water_frequency_local(cube, bands=(0, 1, 2, 3, 4)):
+    """
+    Water frequency of a local image stack, with the same rules of
+    `water_frequency`.
+
+    Parameters
+    ----------
+    cube : np.ndarray, xarray.DataArray or statgis.raster_stack.RasterStack
+        Stack of images with dimensions (time, band, y, x). Missing values
+        must be NaN. A RasterStack is processed window by window.
+
+    bands : list, optional
+        Positions of the bands BLUE, GREEN, RED, NIR, SWIR in the band axis.
+        With an xarray.DataArray the band names of the `band` coordinate can
+        be used too.
+
+    Returns
+    -------
+    water_frequency : np.ndarray
+        Float32 array (y, x) with the fraction of valid observations
+        classified as water. Pixels without valid observations are NaN.
+    """
+    return _frequency(cube, bands, ["mNDWI", "EVI", "NDVI"], _water_rule)
+
+
+def vegetation_frequency_local(cube, bands=(0, 1, 2, 3, 4)):
+    """
+    Vegetation frequency of a local image stack, with the same rules of
+    `vegetation_frequency`.
+
+    Parameters
+    ----------
+    cube : np.ndarray, xarray.DataArray or statgis.raster_stack.RasterStack
+        Stack of images with dimensions (time, band, y, x). Missing values
+        must be NaN. A RasterStack is processed window by window.
+
+    bands : list, optional
+        Positions of the bands BLUE, GREEN, RED, NIR, SWIR in the band axis.
+        With an xarray.DataArray the band names of the `band` coordinate can
+        be used too.
+
+    Returns
+    -------
+    vegetation_frequency : np.ndarray
+        Float32 array (y, x) with the fraction of valid observations
+        classified as vegetation. Pixels without valid observations are NaN.
+    """
+    return _frequency(cube, bands, ["EVI", "NDVI", "NDBI"], _vegetation_rule)
@@ -0,0 +1,348 @@
+import asyncio
+import contextvars
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from statgis import tracing
+
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+RETRYABLE_MESSAGES = (
+    "429",
+    "too many requests",
+    "too many concurrent",
+    "quota exceeded",
+    "rate limit",
+    "service unavailable",
+    "internal error",
+    "deadline exceeded",
+    "connection reset",
+    "503",
+)
+
+
+class FetchError(Exception):
+    """
+    Error raised when a request to Earth Engine fails.
+
+    Attributes
+    ----------
+    name : str
+        Name of the failed call.
+
+    cause : Exception
+        Last exception raised by the call.
+
+    attempts : int
+        Number of attempts made before giving up.
+
+    retryable : bool
+        True if the last error was a rate-limit or transient error.
+
+    item : object
+        Item of the iterable that failed when the error comes from
+        `RequestExecutor.map`, None otherwise.
+    """
+
+    def __init__(self, name, cause, attempts, retryable, item=None):
+        self.name = name
+        self.cause = cause
+        self.attempts = attempts
+        self.retryable = retryable
+        self.item = item
+
+        super().__init__(
+            f"{name} failed after {attempts} attempt(s): "
+            f"{type(cause).__name__}: {cause}"
+        )
+
+
+def is_retryable(exception):
+    """
+    Check if an exception is a rate-limit or transient error.
+
+    Parameters
+    ----------
+    exception : Exception
+        Exception raised by a request.
+
+    Returns
+    -------
+    retryable : bool
+        True if the request should be tried again.
+    """
+    # Before Python 3.11 the timeouts of asyncio and concurrent.futures are
+    # not the builtin TimeoutError.
+    timeouts = (TimeoutError, FutureTimeoutError, asyncio.TimeoutError)
+    if isinstance(exception, timeouts + (ConnectionError,)):
+        return True
+
+    status = getattr(getattr(exception, "resp", None), "status", None)
+    if status is not None and int(status) in RETRYABLE_STATUS:
+        return True
+
+    message = str(exception).lower()
+
+    return any(pattern in message for pattern in RETRYABLE_MESSAGES)
+
+
+class RequestExecutor:
+    """
+    Run client-side requests with a bounded thread pool, retries with
+    exponential backoff and jitter, and per-call timeouts.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Maximum number of requests in flight (by default 8), shared by all
+        the threads that use the executor, including nested `map` calls.
+
+    max_retries : int, optional
+        Number of retries for rate-limit and transient errors (by default 5).
+
+    backoff : float, optional
+        Base delay in seconds for the exponential backoff (by default 1).
+
+    max_backoff : float, optional
+        Maximum delay in seconds between two attempts (by default 60).
+
+    timeout : float, optional
+        Seconds to wait for each attempt. By default attempts never time out.
+        With a timeout each attempt runs in its own thread, so an attempt
+        that timed out (and keeps running until the request returns) does not
+        delay the next ones; it keeps its place among the max_workers
+        requests in flight until it returns.
+    """
+
+    def __init__(
+        self, max_workers=8, max_retries=5, backoff=1.0, max_backoff=60.0, timeout=None
+    ):
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+    def _delay(self, attempt):
+        """Full jitter delay for the given retry number."""
+        delay = min(self.max_backoff, self.backoff * 2**attempt)
+        return random.uniform(0, delay)
+
+    def _attempt(self, func, args, kwargs):
+        """
+        Run one attempt in one of the max_workers slots, enforcing the
+        timeout if there is one. The timeout does not count the wait for a
+        slot.
+        """
+        if self.timeout is None:
+            with self._slots:
+                return func(*args, **kwargs)
+
+        context = contextvars.copy_context()
+        future = Future()
+
+        def run():
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(context.run(func, *args, **kwargs))
+            except BaseException as exception:
+                future.set_exception(exception)
+            finally:
+                self._slots.release()
+
+        self._slots.acquire()
+
+        threading.Thread(target=run, name="statgis-attempt", daemon=True).start()
+
+        return future.result(timeout=self.timeout)
+
+    def call(self, func, *args, name=None, **kwargs):
+        """
+        Call a function retrying rate-limit and transient errors.
+
+        Parameters
+        ----------
+        func : callable
+            Function that performs the request. It must not make requests
+            with the executor itself.
+
+        *args, **kwargs
+            Arguments of func.
+
+        name : str, optional
+            Name used to report failures. By default the name of func.
+
+        Returns
+        -------
+        result : object
+            Value returned by func.
+
+        Raises
+        ------
+        FetchError
+            If func fails with a non retryable error or exhausts the retries.
+        """
+        name = name or getattr(func, "__qualname__", repr(func))
+        start, clock = tracing.now()
+
+        attempt = 0
+        while True:
+            try:
+                result = self._attempt(func, args, kwargs)
+            except Exception as exception:
+                retryable = is_retryable(exception)
+
+                if not retryable or attempt >= self.max_retries:
+                    error = FetchError(name, exception, attempt + 1, retryable)
+                    tracing.record(
+                        name,
+                        start,
+                        time.perf_counter() - clock,
+                        attempt + 1,
+                        error=error,
+                    )
+                    raise error from exception
+
+                time.sleep(self._delay(attempt))
+                attempt += 1
+            else:
+                tracing.record(
+                    name, start, time.perf_counter() - clock, attempt + 1, result=result
+                )
+                return result
+
+    def get_info(self, ee_object):
+        """
+        Download the value of an Earth Engine object.
+
+        Parameters
+        ----------
+        ee_object : ee.ComputedObject
+            Object to compute.
+
+        Returns
+        -------
+        value : object
+            Value computed by Earth Engine.
+        """
+        return self.call(ee_object.getInfo, name=f"{type(ee_object).__name__}.getInfo")
+
+    def map(self, func, items, return_exceptions=False):
+        """
+        Apply a function to all the items in a pool of max_workers threads.
+
+        Parameters
+        ----------
+        func : callable
+            Function to apply. Requests made inside func with `get_info` or
+            `call` are retried, and count towards the max_workers requests in
+            flight of the executor, so func can call `map` again.
+
+        items : iterable
+            Items to process.
+
+        return_exceptions : bool, optional
+            If True, failed requests are returned as FetchError instances in
+            the result list. If False (default), the first failure is raised
+            once all the items are processed. Other exceptions raised by func
+            are always raised.
+
+        Returns
+        -------
+        results : list
+            Results in the same order of items.
+        """
+        items = list(items)
+
+        def run(item):
+            try:
+                return func(item)
+            except FetchError as error:
+                error.item = item
+                return error
+
+        with ThreadPoolExecutor(self.max_workers) as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, run, item) for item in items
+            ]
+            results = [future.result() for future in futures]
+
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, FetchError):
+                    raise result
+
+        return results
+
+    def iter_pages(self, collection, page_size, size=None):
+        """
+        Download a collection in pages.
+
+        Parameters
+        ----------
+        collection : ee.Collection
+            Collection to download.
+
+        page_size : int
+            Number of elements per page.
+
+        size : int, optional
+            Number of elements of the collection. If None, it is requested.
+
+        Yields
+        ------
+        page : list
+            Elements of the page as dictionaries.
+        """
+        if size is None:
+            size = self.get_info(collection.size())
+
+        for offset in range(0, size, page_size):
+            yield self.get_info(collection.toList(page_size, offset))
+
+
+_executor = RequestExecutor()
+
+
+def get_executor():
+    """Return the executor used by statgis functions."""
+    return _executor
+
+
+def set_executor(executor):
+    """
+    Replace the executor used by statgis functions.
+
+    Parameters
+    ----------
+    executor : RequestExecutor
+        New executor.
+
+    Returns
+    -------
+    previous : RequestExecutor
+        Executor replaced.
+    """
+    global _executor
+
+    previous = _executor
+    _executor = executor
+
+    return previous
+
+
+def configure(**kwargs):
+    """
+    Replace the executor used by statgis functions with a new one built
+    with the given `RequestExecutor` arguments.
+    """
+    return set_executor(RequestExecutor(**kwargs))
+
+
+def get_info(ee_object):
+    """Download the value of an Earth Engine object with the current executor."""
+    return get_executor().get_info(ee_object)
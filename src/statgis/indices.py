@@ -0,0 +1,288 @@
+import ast
+import functools
+import json
+import operator
+import os
+
+import numpy as np
+
+from statgis._lazy import lazy_import
+
+ee = lazy_import("ee")
+
+SENSORS = {
+    "landsat8": {
+        "R_BLUE": "SR_B2",
+        "R_GREEN": "SR_B3",
+        "R_RED": "SR_B4",
+        "R_NIR": "SR_B5",
+        "R_SWIR": "SR_B6",
+        "R_SWIR1": "SR_B6",
+        "R_SWIR2": "SR_B7",
+    },
+    "landsat57": {
+        "R_BLUE": "SR_B1",
+        "R_GREEN": "SR_B2",
+        "R_RED": "SR_B3",
+        "R_NIR": "SR_B4",
+        "R_SWIR": "SR_B5",
+        "R_SWIR1": "SR_B5",
+        "R_SWIR2": "SR_B7",
+    },
+    "sentinel2": {
+        "R_BLUE": "B2",
+        "R_GREEN": "B3",
+        "R_RED": "B4",
+        "R_NIR": "B8",
+        "R_SWIR": "B11",
+        "R_SWIR1": "B11",
+        "R_SWIR2": "B12",
+    },
+}
+SENSORS["landsat9"] = SENSORS["landsat8"]
+
+_OPERATORS = {
+    ast.Add: "add",
+    ast.Sub: "subtract",
+    ast.Mult: "multiply",
+    ast.Div: "divide",
+    ast.Pow: "pow",
+}
+
+_NUMPY = {
+    "add": operator.add,
+    "subtract": operator.sub,
+    "multiply": operator.mul,
+    "pow": operator.pow,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def load_indices(path=None):
+    """
+    Read the spectral indices defined in indices.json.
+
+    Parameters
+    ----------
+    path : str, optional
+        Path of the JSON file. By default the indices.json of statgis.
+
+    Returns
+    -------
+    indices : dict
+        Dict with the name, formula and type of each index by its key.
+    """
+    if path is None:
+        path = os.path.join(os.path.dirname(__file__), "indices.json")
+
+    with open(path) as file:
+        entries = json.load(file)["Indexes"]
+
+    return {entry["key"]: entry for entry in entries}
+
+
+def _divide(numerator, denominator):
+    """Division that returns 0 where the denominator is 0, like ee.Image.divide."""
+    shape = np.broadcast_shapes(np.shape(numerator), np.shape(denominator))
+    dtype = np.result_type(numerator, denominator, 1.0)
+
+    out = np.zeros(shape, dtype=dtype)
+    np.divide(numerator, denominator, out=out, where=np.asarray(denominator) != 0)
+
+    return out
+
+
+class SpectralIndices:
+    """
+    Set of spectral indices compiled into one program, where each common
+    subexpression (bands, sums, differences, ...) is computed once.
+
+    Use `compile_indices` to build it.
+
+    Attributes
+    ----------
+    keys : list
+        Keys of the indices, in the order of the outputs.
+
+    steps : list
+        Operations of the program as (operation, left, right) tuples. The
+        operands are ("band", name), ("constant", value) or ("step", i).
+
+    outputs : list
+        Operand with the result of each index.
+    """
+
+    def __init__(self, keys, formulas, bands):
+        self.keys = list(keys)
+        self.steps = []
+        self._ids = {}
+
+        self.outputs = [self._compile(formulas[key], bands) for key in self.keys]
+
+    def _compile(self, formula, bands):
+        """Add the operations of a formula and return its operand."""
+        tree = ast.parse(formula.replace("^", "**"), mode="eval").body
+        return self._node(tree, bands)
+
+    def _node(self, node, bands):
+        if isinstance(node, ast.Constant):
+            return ("constant", node.value)
+
+        if isinstance(node, ast.Name):
+            if node.id not in bands:
+                raise KeyError(f"There is no band for {node.id}.")
+            return ("band", bands[node.id])
+
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            operand = self._node(node.operand, bands)
+            return self._step("multiply", operand, ("constant", -1))
+
+        if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+            left = self._node(node.left, bands)
+            right = self._node(node.right, bands)
+            return self._step(_OPERATORS[type(node.op)], left, right)
+
+        raise ValueError(f"Unsupported expression: {ast.dump(node)}")
+
+    def _step(self, operation, left, right):
+        """Add an operation, reusing it if it was already compiled."""
+        if left[0] == "constant" and right[0] == "constant":
+            if operation == "divide":
+                return ("constant", float(_divide(left[1], right[1])))
+            return ("constant", _NUMPY[operation](left[1], right[1]))
+
+        key = (operation, left, right)
+        if key not in self._ids:
+            self._ids[key] = len(self.steps)
+            self.steps.append(key)
+
+        return ("step", self._ids[key])
+
+    def ee(self, Image):
+        """
+        Compute the indices of an Earth Engine image.
+
+        Parameters
+        ----------
+        Image : ee.Image
+            Image with the bands of the indices.
+
+        Returns
+        -------
+        indices : ee.Image
+            Image with one band per index, named by its key.
+        """
+        values = []
+        selected = {}
+
+        def operand(item):
+            kind, value = item
+            if kind == "band":
+                if value not in selected:
+                    selected[value] = Image.select([value])
+                return selected[value]
+            if kind == "constant":
+                return ee.Image.constant(value)
+            return values[value]
+
+        for operation, left, right in self.steps:
+            right = right[1] if right[0] == "constant" else operand(right)
+            values.append(getattr(operand(left), operation)(right))
+
+        indices = [
+            operand(output).rename(key) for key, output in zip(self.keys, self.outputs)
+        ]
+
+        return ee.Image.cat(indices)
+
+    def numpy(self, data):
+        """
+        Compute the indices of local arrays.
+
+        Parameters
+        ----------
+        data : mapping
+            Arrays of the bands by their names (a dict, an xarray.Dataset,
+            ...). Missing values must be NaN.
+
+        Returns
+        -------
+        indices : dict
+            Array of each index by its key. Divisions by 0 return 0, as in
+            Earth Engine.
+        """
+        values = []
+
+        def operand(item):
+            kind, value = item
+            if kind == "band":
+                return np.asarray(data[value])
+            if kind == "constant":
+                return value
+            return values[value]
+
+        for operation, left, right in self.steps:
+            if operation == "divide":
+                values.append(_divide(operand(left), operand(right)))
+            else:
+                values.append(_NUMPY[operation](operand(left), operand(right)))
+
+        return {key: operand(output) for key, output in zip(self.keys, self.outputs)}
+
+
+def compile_indices(keys, bands="landsat8", formulas=None):
+    """
+    Compile a set of spectral indices of indices.json into one program.
+
+    Parameters
+    ----------
+    keys : str or list
+        Key, or list of keys, of the indices (NDVI, EVI, mNDWI, ...).
+
+    bands : str or dict, optional
+        Sensor of `SENSORS` (landsat8, landsat9, landsat57 or sentinel2), or
+        dict with the band name of each reflectance (R_BLUE, R_GREEN, R_RED,
+        R_NIR, R_SWIR, R_SWIR1 and R_SWIR2). By default landsat8.
+
+    formulas : dict, optional
+        Extra formulas by key, that are used before the ones of indices.json.
+
+    Returns
+    -------
+    indices : SpectralIndices
+        Compiled indices, use `indices.ee(Image)` or `indices.numpy(data)`.
+    """
+    if isinstance(keys, str):
+        keys = [keys]
+
+    if isinstance(bands, str):
+        bands = SENSORS[bands]
+
+    available = {key: entry["formula"] for key, entry in load_indices().items()}
+    available.update(formulas or {})
+
+    return SpectralIndices(keys, available, bands)
+
+
+def add_indices(Image, keys, bands="landsat8"):
+    """
+    Add spectral indices of indices.json as bands of an image. Map it over an
+    ImageCollection to add the indices to all the images.
+
+    Parameters
+    ----------
+    Image : ee.Image
+        Image with the reflectance bands.
+
+    keys : str or list
+        Key, or list of keys, of the indices.
+
+    bands : str or dict, optional
+        Sensor or band names, see `compile_indices`.
+
+    Returns
+    -------
+    Image : ee.Image
+        Image with the indices added.
+    """
+    return Image.addBands(compile_indices(keys, bands).ee(Image))
@@ -0,0 +1,225 @@
+import json
+from collections import Counter
+
+from statgis._lazy import lazy_import
+
+ee = lazy_import("ee")
+
+
+class GraphBudgetExceeded(AssertionError):
+    """
+    Error raised by `assert_graph_budget` when a graph is over its budget.
+
+    Attributes
+    ----------
+    stats : dict
+        Statistics of the graph, see `graph_stats`.
+
+    violations : list
+        Description of each exceeded limit.
+    """
+
+    def __init__(self, stats, violations):
+        self.stats = stats
+        self.violations = violations
+
+        super().__init__("Graph over budget: " + "; ".join(violations))
+
+
+def _graph(ee_object):
+    """
+    Compact Cloud API serialization of an Earth Engine object. Already
+    serialized graphs are returned as they are.
+    """
+    if isinstance(ee_object, dict):
+        return ee_object
+
+    return ee.serializer.encode(ee_object, for_cloud_api=True)
+
+
+def _invocations(graph):
+    """
+    Yield the function invocation nodes of a serialized graph, visiting each
+    shared value once.
+    """
+    values = graph["values"]
+    seen = set()
+
+    def visit(node):
+        if isinstance(node, list):
+            for item in node:
+                yield from visit(item)
+            return
+
+        if not isinstance(node, dict):
+            return
+
+        if "valueReference" in node:
+            yield from reference(node["valueReference"])
+            return
+
+        if "functionInvocationValue" in node:
+            invocation = node["functionInvocationValue"]
+            yield invocation
+            yield from visit(list(invocation.get("arguments", {}).values()))
+            return
+
+        if "functionDefinitionValue" in node:
+            yield from reference(node["functionDefinitionValue"]["body"])
+            return
+
+        if "arrayValue" in node:
+            yield from visit(node["arrayValue"].get("values", []))
+            return
+
+        if "dictionaryValue" in node:
+            yield from visit(list(node["dictionaryValue"].get("values", {}).values()))
+
+    def reference(key):
+        if key in seen:
+            return
+        seen.add(key)
+        yield from visit(values[key])
+
+    yield from reference(graph["result"])
+
+
+def node_count(ee_object):
+    """
+    Count the function calls in the expression graph of an Earth Engine
+    object. Shared subexpressions are counted once, as in the request sent to
+    the server.
+
+    Parameters
+    ----------
+    ee_object : ee.ComputedObject
+        Object to measure.
+
+    Returns
+    -------
+    count : int
+        Number of function call nodes of the graph.
+    """
+    return sum(1 for _ in _invocations(_graph(ee_object)))
+
+
+def _depth(graph):
+    """Number of function calls of the longest chain of the graph."""
+    values = graph["values"]
+    depths = {}
+
+    def visit(node):
+        if isinstance(node, list):
+            return max((visit(item) for item in node), default=0)
+
+        if not isinstance(node, dict):
+            return 0
+
+        if "valueReference" in node:
+            return reference(node["valueReference"])
+
+        if "functionInvocationValue" in node:
+            arguments = node["functionInvocationValue"].get("arguments", {})
+            return 1 + visit(list(arguments.values()))
+
+        if "functionDefinitionValue" in node:
+            return reference(node["functionDefinitionValue"]["body"])
+
+        if "arrayValue" in node:
+            return visit(node["arrayValue"].get("values", []))
+
+        if "dictionaryValue" in node:
+            return visit(list(node["dictionaryValue"].get("values", {}).values()))
+
+        return 0
+
+    def reference(key):
+        if key not in depths:
+            depths[key] = visit(values[key])
+        return depths[key]
+
+    return reference(graph["result"])
+
+
+def graph_stats(ee_object):
+    """
+    Measure the expression graph of an Earth Engine object, like the output
+    of any statgis function.
+
+    Parameters
+    ----------
+    ee_object : ee.ComputedObject or dict
+        Object to measure, or its Cloud API serialization.
+
+    Returns
+    -------
+    stats : dict
+        bytes: size of the compact serialized graph sent to the server.
+
+        nodes: number of function calls, shared subexpressions counted once.
+
+        depth: number of function calls of the longest chain.
+
+        functions: number of calls of each Earth Engine function by name.
+    """
+    graph = _graph(ee_object)
+
+    functions = Counter(
+        invocation.get("functionName", "<function reference>")
+        for invocation in _invocations(graph)
+    )
+
+    return {
+        "bytes": len(json.dumps(graph, separators=(",", ":"))),
+        "nodes": sum(functions.values()),
+        "depth": _depth(graph),
+        "functions": dict(functions),
+    }
+
+
+def assert_graph_budget(
+    ee_object, max_bytes=None, max_nodes=None, max_depth=None, max_calls=None
+):
+    """
+    Check that the expression graph of an Earth Engine object is within a
+    budget, to catch graph growth in tests.
+
+    Parameters
+    ----------
+    ee_object : ee.ComputedObject or dict
+        Object to measure, or its Cloud API serialization.
+
+    max_bytes, max_nodes, max_depth : int, optional
+        Limits of the statistics of `graph_stats`. None means no limit.
+
+    max_calls : dict, optional
+        Maximum number of calls by function name, for example
+        {"Collection.filter": 1}.
+
+    Returns
+    -------
+    stats : dict
+        Statistics of the graph, see `graph_stats`.
+
+    Raises
+    ------
+    GraphBudgetExceeded
+        If any limit is exceeded.
+    """
+    stats = graph_stats(ee_object)
+    violations = []
+
+    limits = {"bytes": max_bytes, "nodes": max_nodes, "depth": max_depth}
+    for key, limit in limits.items():
+        if limit is not None and stats[key] > limit:
+            violations.append(f"{key} {stats[key]} > {limit}")
+
+    for name, limit in (max_calls or {}).items():
+        calls = stats["functions"].get(name, 0)
+        if calls > limit:
+            violations.append(f"{name} calls {calls} > {limit}")
+
+    if violations:
+        raise GraphBudgetExceeded(stats, violations)
+
+    return stats
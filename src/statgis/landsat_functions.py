@@ -1,4 +1,11 @@
-import ee
+import numpy as np
+
+from statgis._lazy import lazy_import
+
+ee = lazy_import("ee")
+
+QA_BITS = {"cirrus": 2, "cloud": 3, "shadow": 4, "snow": 5}
+
 
 def landsat_scaler(Image):
     """
@@ -44,10 +51,10 @@ def landsat_cloud_mask(Image, all=True):
     """
     qa = Image.select("QA_PIXEL")
 
-    cirrus = qa.bitwiseAnd((1 << 2)).eq(0)
-    cloud = qa.bitwiseAnd((1 << 3)).eq(0)
-    shadow = qa.bitwiseAnd((1 << 4)).eq(0)
-    snow = qa.bitwiseAnd((1 << 5)).eq(0)
+    cirrus = qa.bitwiseAnd((1 << QA_BITS["cirrus"])).eq(0)
+    cloud = qa.bitwiseAnd((1 << QA_BITS["cloud"])).eq(0)
+    shadow = qa.bitwiseAnd((1 << QA_BITS["shadow"])).eq(0)
+    snow = qa.bitwiseAnd((1 << QA_BITS["snow"])).eq(0)
 
     if all:
         Image = (
@@ -60,3 +67,93 @@ def landsat_cloud_mask(Image, all=True):
         Image = Image.updateMask(cloud)
 
     return Image
+
+
+def _qa_mask(all):
+    """Combined bitmask of the QA_PIXEL bits to mask."""
+    if all:
+        return sum(1 << bit for bit in QA_BITS.values())
+
+    return 1 << QA_BITS["cloud"]
+
+
+def landsat_preprocessing(Image, all=True):
+    """
+    Scale the optical and thermal bands and mask the clouds of an Image from
+    Landsat Collection in one step. Same result as `landsat_scaler` followed
+    by `landsat_cloud_mask`, testing all the QA_PIXEL bits with one bitmask.
+
+    Parameters
+    ----------
+    Image : ee.Image
+        Image from Landsat Collection.
+
+    all : bool, optional
+        If True, mask cirrus, clouds, shadows and snow.
+
+        If False, mask only clouds.
+
+    Returns
+    -------
+    Image : ee.Image
+        Scaled and masked Image.
+    """
+    mask = Image.select("QA_PIXEL").bitwiseAnd(_qa_mask(all)).eq(0)
+
+    optical = Image.select("SR_B.").multiply(0.0000275).add(-0.2)
+    thermal = Image.select("ST_B.*").multiply(0.00341802).add(149)
+
+    Image = (
+        Image.addBands(optical, None, True)
+        .addBands(thermal, None, True)
+        .updateMask(mask)
+    )
+
+    return Image
+
+
+def landsat_preprocessing_local(dn, qa, all=True, thermal=False, out=None):
+    """
+    Local version of `landsat_preprocessing` for raw Landsat arrays.
+
+    The QA mask is computed on the integer QA values and only the valid
+    pixels are converted and scaled, writing float32 values into out.
+
+    Parameters
+    ----------
+    dn : np.ndarray
+        uint16 digital numbers with dimensions (..., y, x).
+
+    qa : np.ndarray
+        uint16 QA_PIXEL values with dimensions (y, x).
+
+    all : bool, optional
+        If True, mask cirrus, clouds, shadows and snow.
+
+        If False, mask only clouds.
+
+    thermal : bool, optional
+        If True, dn are surface temperature (ST_B*) bands, otherwise surface
+        reflectance (SR_B*) bands.
+
+    out : np.ndarray, optional
+        float32 array with the shape of dn where the result is written. By
+        default a new array.
+
+    Returns
+    -------
+    out : np.ndarray
+        float32 scaled values, NaN in the masked pixels.
+    """
+    scale, offset = (0.00341802, 149) if thermal else (0.0000275, -0.2)
+
+    mask = (qa & _qa_mask(all)) == 0
+
+    if out is None:
+        out = np.empty(dn.shape, dtype=np.float32)
+
+    out.fill(np.nan)
+    np.multiply(dn, np.float32(scale), out=out, where=mask)
+    np.add(out, np.float32(offset), out=out, where=mask)
+
+    return out
@@ -1,4 +1,15 @@
-import ee
+import numpy as np
+
+from statgis._lazy import lazy_import
+from statgis.cache import cached
+from statgis.executor import get_executor, get_info
+from statgis.indices import compile_indices
+from statgis.tracing import span, traced
+
+ee = lazy_import("ee")
+pd = lazy_import("pandas")
+ndimage = lazy_import("scipy.ndimage")
+
 
 def plume_characterization(
     Image, sample_region, blue="SR_B2", green="SR_B3", red="SR_B4", nir="SR_B5"
@@ -29,65 +40,46 @@ Extract river plume from an image based on the colors in a sample region.
     Returns
     -------
     plume : ee.Image
-        Plume characterized in the three color bands of Image.
+        Plume characterized in the three color bands of Image, with the NDWI
+        and plume bands added, and the number of valid water pixels of the
+        sample region in the `sample_pixels` property. Without them no
+        pixel is plume.
     """
-    Image = Image.addBands(
-        Image.expression(
-            f"(b('{green}') - b('{nir}'))/(b('{green}') + b('{nir}'))"
-        ).rename("NDWI"),
-        None,
-        True,
-    )
+    ndwi = compile_indices("NDWI", {"R_GREEN": green, "R_NIR": nir})
+    Image = Image.addBands(ndwi.ee(Image), None, True)
 
     mask = Image.select("NDWI").gt(0)
     Image = Image.updateMask(mask)
 
     reducer = ee.Reducer.min().combine(reducer2=ee.Reducer.max(), sharedInputs=True)
+    reducer = reducer.combine(reducer2=ee.Reducer.count(), sharedInputs=True)
 
     limits = Image.select([blue, green, red]).reduceRegion(
         reducer=reducer, geometry=sample_region, scale=30
     )
 
-    Image = Image.addBands(
-        Image.expression(
-            f"(b('{blue}') > MINI && b('{blue}') < MAXI) ? 1 : 0",
-            {
-                "MAXI": limits.getNumber(blue + "_max"),
-                "MINI": limits.getNumber(blue + "_min"),
-            },
-        ).rename("plume_blue"),
-        None,
-        True,
+    # Without valid pixels in the sample region (a cloudy scene) the limits
+    # are null, so limits that don't classify any pixel as plume are used.
+    sample_pixels = ee.Number(limits.get(f"{blue}_count"))
+    for band in (green, red):
+        sample_pixels = sample_pixels.min(ee.Number(limits.get(f"{band}_count")))
+
+    empty = {
+        f"{band}_{stat}": 0 for band in (blue, green, red) for stat in ("min", "max")
+    }
+    limits = ee.Dictionary(
+        ee.Algorithms.If(sample_pixels.gt(0), limits.select(list(empty)), empty)
     )
 
-    Image = Image.addBands(
-        Image.expression(
-            f"(b('{green}') > MINI && b('{green}') < MAXI) ? 1 : 0",
-            {
-                "MAXI": limits.getNumber(green + "_max"),
-                "MINI": limits.getNumber(green + "_min"),
-            },
-        ).rename("plume_green"),
-        None,
-        True,
+    # One expression classifies the three bands against the limits of the
+    # sample region, passed as a constant image.
+    inside = " + ".join(
+        f"(b('{band}') > L.{band}_min && b('{band}') < L.{band}_max)"
+        for band in (blue, green, red)
     )
 
     Image = Image.addBands(
-        Image.expression(
-            f"(b('{red}') > MINI && b('{red}') < MAXI) ? 1 : 0",
-            {
-                "MAXI": limits.getNumber(red + "_max"),
-                "MINI": limits.getNumber(red + "_min"),
-            },
-        ).rename("plume_red"),
-        None,
-        True,
-    )
-
-    Image = Image.addBands(
-        Image.expression(
-            "(b('plume_blue') + b('plume_green') + b('plume_red'))/3"
-        ).rename("plume"),
+        Image.expression(f"({inside}) / 3", {"L": limits.toImage()}).rename("plume"),
         None,
         True,
     )
@@ -99,4 +91,165 @@ Extract river plume from an image based on the colors in a sample region.
 
     Image = Image.updateMask(plume_mask).updateMask(count_mask)
 
-    return Image
+    return Image.set("sample_pixels", sample_pixels)
+
+
+@traced
+def plume_collection(
+    ImageCollection,
+    sample_region,
+    region,
+    scale=30,
+    blue="SR_B2",
+    green="SR_B3",
+    red="SR_B4",
+    nir="SR_B5",
+    page_size=200,
+):
+    """
+    Characterize the river plume in all the images of an image collection and
+    download its area, pixel count and centroid as a time series.
+
+    Each image is classified by `plume_characterization` with the limits of
+    its own pixels in the sample region. The collection is processed in the
+    server by pages of images, one request per page.
+
+    Parameters
+    ----------
+    ImageCollection : ee.ImageCollection
+        Images to be classified.
+
+    sample_region : ee.Geometry
+        Polygon that encloses a region of the images that the user
+        identifies as river plume.
+
+    region : ee.Geometry
+        Region where the plume is measured.
+
+    scale : float, optional
+        Pixel size to measure the plume (by default 30).
+
+    blue, green, red, nir : str, optional
+        Keys of the bands (by default SR_B2, SR_B3, SR_B4 and SR_B5).
+
+    page_size : int, optional
+        Number of images processed per request (by default 200).
+
+    Returns
+    -------
+    data : pandas.DataFrame
+        DataFrame with the id, date, plume_area (m²), plume_pixels, plume_lon
+        and plume_lat of each image. They are NaN for the images without
+        valid water pixels in the sample region, such as cloudy scenes.
+    """
+
+    def characterize(Image):
+        """Measure the plume of one image."""
+        plume = plume_characterization(Image, sample_region, blue, green, red, nir)
+
+        pixels = (
+            ee.Image.pixelArea()
+            .rename("area")
+            .addBands(ee.Image.pixelLonLat())
+            .updateMask(plume.select("plume").mask())
+        )
+
+        reducer = ee.Reducer.sum().combine(
+            ee.Reducer.mean().combine(ee.Reducer.count(), sharedInputs=True),
+            sharedInputs=True,
+        )
+
+        stats = pixels.reduceRegion(
+            reducer=reducer, geometry=region, scale=scale, maxPixels=1e13
+        )
+
+        # Images without valid pixels in the sample region are not measured.
+        valid = ee.Number(plume.get("sample_pixels")).gt(0)
+
+        def value(key):
+            return ee.Algorithms.If(valid, stats.get(key), None)
+
+        return ee.Feature(
+            None,
+            {
+                "id": Image.id(),
+                "system:time_start": Image.get("system:time_start"),
+                "plume_area": value("area_sum"),
+                "plume_pixels": value("area_count"),
+                "plume_lon": value("longitude_mean"),
+                "plume_lat": value("latitude_mean"),
+            },
+        )
+
+    N = get_info(ImageCollection.size())
+
+    def fetch(offset):
+        page = ee.ImageCollection(ImageCollection.toList(page_size, offset))
+        fc = ee.FeatureCollection(page.map(characterize))
+
+        def compute():
+            features = get_info(fc)["features"]
+            return pd.DataFrame([feature["properties"] for feature in features])
+
+        with span(page=offset // page_size):
+            return cached("plume_collection", fc, {}, compute)
+
+    pages = get_executor().map(fetch, range(0, N, page_size))
+
+    columns = ["id", "system:time_start", "plume_area", "plume_pixels"]
+    columns += ["plume_lon", "plume_lat"]
+
+    data = pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
+    data = data.reindex(columns=columns)
+    data["date"] = pd.DatetimeIndex(
+        pd.to_datetime(data["system:time_start"], unit="ms").dt.date
+    )
+
+    return data
+
+
+def plume_characterization_local(blue, green, red, nir, sample_region, min_size=50):
+    """
+    Local version of `plume_characterization` for scenes stored as arrays.
+
+    Parameters
+    ----------
+    blue, green, red, nir : np.ndarray
+        Arrays (y, x) with the bands of the scene. Missing values must be NaN.
+
+    sample_region : np.ndarray
+        Boolean array (y, x), True in the pixels that the user identifies as
+        river plume.
+
+    min_size : int, optional
+        Regions of plume with this number of pixels or less are discarded
+        (by default 50). Pixels are connected by their four neighbours.
+
+    Returns
+    -------
+    plume : np.ndarray
+        Boolean array (y, x), True in the plume pixels. It is all False if
+        the sample region has no valid water pixels.
+    """
+    bands = np.stack([blue, green, red]).astype(float)
+
+    ndwi = compile_indices("NDWI", {"R_GREEN": "green", "R_NIR": "nir"})
+    ndwi = ndwi.numpy({"green": green, "nir": nir})["NDWI"]
+    water = (ndwi > 0) & np.isfinite(bands).all(axis=0) & np.isfinite(nir)
+
+    sample = bands[:, water & sample_region]
+    if sample.shape[1] == 0:
+        # Earth Engine reduces the empty sample to null bounds and masks all.
+        return np.zeros(water.shape, dtype=bool)
+
+    low = sample.min(axis=1)[:, None, None]
+    high = sample.max(axis=1)[:, None, None]
+
+    inside = ((bands > low) & (bands < high)).sum(axis=0)
+    plume = water & (inside / 3 > 0.5)
+
+    labels, _ = ndimage.label(plume)
+    sizes = np.bincount(labels.ravel())
+    sizes[0] = 0
+
+    return sizes[labels] > min_size
@@ -0,0 +1,340 @@
+import glob
+import os
+
+import numpy as np
+
+from statgis._lazy import lazy_import
+
+pd = lazy_import("pandas")
+rasterio = lazy_import("rasterio")
+
+
+def _memmap(dataset, path):
+    """
+    Memory map an uncompressed, untiled GeoTIFF.
+
+    Returns an array (band, y, x) backed by the file, or None if the layout
+    of the file does not allow it.
+    """
+    if dataset.driver != "GTiff" or dataset.compression is not None:
+        return None
+
+    tiled = dataset.block_shapes[0][1] != dataset.width
+    if tiled or len(set(dataset.dtypes)) != 1:
+        return None
+
+    with open(path, "rb") as file:
+        order = file.read(2)
+
+    if order not in (b"II", b"MM"):
+        return None
+
+    dtype = np.dtype(dataset.dtypes[0]).newbyteorder("<" if order == b"II" else ">")
+    block_height = dataset.block_shapes[0][0]
+    n_blocks = -(-dataset.height // block_height)
+    pixel = dataset.profile.get("interleave") == "pixel"
+
+    row_bytes = dataset.width * dtype.itemsize * (dataset.count if pixel else 1)
+    block_bytes = block_height * row_bytes
+
+    def contiguous(bidx):
+        """Offset of the first strip if all the strips are contiguous."""
+        first = dataset.get_tag_item("BLOCK_OFFSET_0_0", "TIFF", bidx=bidx)
+        if first is None:
+            return None
+
+        first = int(first)
+        for k in range(1, n_blocks):
+            offset = dataset.get_tag_item(f"BLOCK_OFFSET_0_{k}", "TIFF", bidx=bidx)
+            if offset is None or int(offset) != first + k * block_bytes:
+                return None
+
+        return first
+
+    if pixel:
+        offset = contiguous(1)
+        if offset is None:
+            return None
+
+        data = np.memmap(
+            path,
+            dtype=dtype,
+            mode="r",
+            offset=offset,
+            shape=(dataset.height, dataset.width, dataset.count),
+        )
+
+        return data.transpose(2, 0, 1)
+
+    bands = []
+    for bidx in dataset.indexes:
+        offset = contiguous(bidx)
+        if offset is None:
+            return None
+
+        bands.append(
+            np.memmap(
+                path,
+                dtype=dtype,
+                mode="r",
+                offset=offset,
+                shape=(dataset.height, dataset.width),
+            )
+        )
+
+    return bands
+
+
+def _date(dataset):
+    """Acquisition date stored in the TIFFTAG_DATETIME tag, if any."""
+    value = dataset.tags().get("TIFFTAG_DATETIME")
+    if value is None:
+        return None
+
+    return pd.to_datetime(value, format="%Y:%m:%d %H:%M:%S")
+
+
+class RasterStack:
+    """
+    Stack of scenes stored as GeoTIFFs, aligned on a common grid and read by
+    windows across the time axis.
+
+    Uncompressed and untiled files aligned with the grid are memory mapped,
+    so reading a window only touches the bytes of that window. The other
+    files are read with windowed reads, through a warped VRT if they are not
+    aligned with the grid.
+
+    Parameters
+    ----------
+    paths : str or list
+        Directory with the scenes (*.tif, *.tiff) or list with the paths of
+        the scenes in time order.
+
+    dates : list, optional
+        Dates of the scenes. By default they are read from the
+        TIFFTAG_DATETIME tag when all the scenes have it.
+
+    reference : str, optional
+        Path of the scene that defines the grid. By default the first scene.
+
+    resampling : str, optional
+        Resampling method to align the scenes that are not in the grid
+        (by default nearest).
+    """
+
+    def __init__(self, paths, dates=None, reference=None, resampling="nearest"):
+        if isinstance(paths, (str, os.PathLike)):
+            paths = sorted(
+                glob.glob(os.path.join(paths, "*.tif"))
+                + glob.glob(os.path.join(paths, "*.tiff"))
+            )
+
+        if len(paths) == 0:
+            raise ValueError("RasterStack needs at least one scene.")
+
+        self.paths = [str(path) for path in paths]
+        self._datasets = [rasterio.open(path) for path in self.paths]
+
+        with rasterio.open(reference or self.paths[0]) as grid:
+            self.crs = grid.crs
+            self.transform = grid.transform
+            self.height = grid.height
+            self.width = grid.width
+
+        self.count = self._datasets[0].count
+        self.nodata = [dataset.nodata for dataset in self._datasets]
+
+        self._sources = []
+        for dataset, path in zip(self._datasets, self.paths):
+            if dataset.count != self.count:
+                raise ValueError(
+                    f"{path} has {dataset.count} bands, expected {self.count}."
+                )
+
+            aligned = (
+                dataset.crs == self.crs
+                and dataset.transform == self.transform
+                and dataset.shape == (self.height, self.width)
+            )
+
+            if aligned:
+                data = _memmap(dataset, path)
+                self._sources.append(dataset if data is None else data)
+            else:
+                self._sources.append(
+                    rasterio.vrt.WarpedVRT(
+                        dataset,
+                        crs=self.crs,
+                        transform=self.transform,
+                        width=self.width,
+                        height=self.height,
+                        resampling=rasterio.enums.Resampling[resampling],
+                    )
+                )
+
+        if dates is None:
+            dates = [_date(dataset) for dataset in self._datasets]
+            dates = None if any(date is None for date in dates) else dates
+
+        self.dates = None if dates is None else pd.DatetimeIndex(dates)
+
+    @property
+    def shape(self):
+        """Shape (time, band, y, x) of the stack."""
+        return (len(self.paths), self.count, self.height, self.width)
+
+    @property
+    def memory_mapped(self):
+        """List with True for the scenes that are memory mapped."""
+        return [
+            not isinstance(source, (rasterio.io.DatasetReader, rasterio.vrt.WarpedVRT))
+            for source in self._sources
+        ]
+
+    def windows(self, block_size=512):
+        """
+        Split the grid in square windows.
+
+        Parameters
+        ----------
+        block_size : int, optional
+            Size in pixels of the windows (by default 512).
+
+        Yields
+        ------
+        window : rasterio.windows.Window
+            Window of the grid.
+        """
+        for row in range(0, self.height, block_size):
+            for col in range(0, self.width, block_size):
+                yield rasterio.windows.Window(
+                    col,
+                    row,
+                    min(block_size, self.width - col),
+                    min(block_size, self.height - row),
+                )
+
+    def read(self, window, dtype="float32"):
+        """
+        Read a window of all the scenes.
+
+        Parameters
+        ----------
+        window : rasterio.windows.Window
+            Window to read.
+
+        dtype : str, optional
+            Output data type (by default float32). Nodata values are replaced
+            by NaN for float outputs. If None, the data type of the files is
+            kept and nodata values are not replaced.
+
+        Returns
+        -------
+        block : np.ndarray
+            Array (time, band, y, x) with the window of all the scenes.
+        """
+        rows, cols = window.toslices()
+        rows = slice(rows.start, rows.stop)
+        cols = slice(cols.start, cols.stop)
+
+        if dtype is None:
+            dtype = self._datasets[0].dtypes[0]
+
+        block = np.empty(
+            (len(self._sources), self.count, window.height, window.width), dtype=dtype
+        )
+
+        for t, source in enumerate(self._sources):
+            if isinstance(source, (rasterio.io.DatasetReader, rasterio.vrt.WarpedVRT)):
+                block[t] = source.read(window=window)
+            else:
+                for b in range(self.count):
+                    block[t, b] = source[b][rows, cols]
+
+            nodata = self.nodata[t]
+            if nodata is not None and np.issubdtype(block.dtype, np.floating):
+                block[t][block[t] == nodata] = np.nan
+
+        return block
+
+    def __iter__(self):
+        return self.iter_blocks()
+
+    def iter_blocks(self, block_size=512, dtype="float32"):
+        """
+        Read the stack window by window.
+
+        Parameters
+        ----------
+        block_size : int, optional
+            Size in pixels of the windows (by default 512).
+
+        dtype : str, optional
+            Output data type, see `read`.
+
+        Yields
+        ------
+        window : rasterio.windows.Window
+            Window of the grid.
+
+        block : np.ndarray
+            Array (time, band, y, x) with the window of all the scenes.
+        """
+        for window in self.windows(block_size):
+            yield window, self.read(window, dtype=dtype)
+
+    def apply(self, func, block_size=512, dtype="float32"):
+        """
+        Apply a function to each window of the stack and mosaic the results.
+
+        Parameters
+        ----------
+        func : callable
+            Function that takes a block (time, band, y, x) and returns an
+            array whose last two dimensions are (y, x), or a dict of them.
+
+        block_size : int, optional
+            Size in pixels of the windows (by default 512).
+
+        dtype : str, optional
+            Data type of the blocks, see `read`.
+
+        Returns
+        -------
+        result : np.ndarray or dict
+            Results of func for the whole grid.
+        """
+        result = None
+
+        for window, block in self.iter_blocks(block_size, dtype=dtype):
+            rows, cols = window.toslices()
+            output = func(block)
+            parts = output if isinstance(output, dict) else {None: output}
+
+            if result is None:
+                result = {
+                    key: np.empty(
+                        value.shape[:-2] + (self.height, self.width), dtype=value.dtype
+                    )
+                    for key, value in parts.items()
+                }
+
+            for key, value in parts.items():
+                result[key][..., rows, cols] = value
+
+        return result if isinstance(output, dict) else result[None]
+
+    def close(self):
+        """Close all the files of the stack."""
+        for source in self._sources:
+            if isinstance(source, rasterio.vrt.WarpedVRT):
+                source.close()
+
+        for dataset in self._datasets:
+            dataset.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,6 +1,46 @@
-import ee
 import numpy as np
 
+from statgis._lazy import lazy_import
+from statgis.cache import cached
+from statgis.executor import get_executor, get_info
+from statgis.tracing import span, traced
+
+ee = lazy_import("ee")
+pd = lazy_import("pandas")
+
+
+def _to_collection(geom):
+    """Wrap a geometry or feature into a FeatureCollection for sampleRegions."""
+    if type(geom) == ee.geometry.Geometry:
+        geom = ee.FeatureCollection([ee.Feature(geom, {"id": 0})])
+    elif type(geom) == ee.feature.Feature:
+        geom = ee.FeatureCollection([geom])
+
+    return geom
+
+
+def _columns(Image, bands, geom, scale):
+    """
+    Sample the bands of an image and gather the values in one list per band
+    on the server, so the response is columnar.
+    """
+    sample = Image.select(bands).sampleRegions(
+        collection=geom, scale=scale, geometries=False
+    )
+
+    return sample.reduceColumns(ee.Reducer.toList().repeat(len(bands)), bands).get(
+        "list"
+    )
+
+
+def _decode(bands, columns):
+    """Convert the list of values per band into a dict of arrays."""
+    return {
+        band: np.asarray(values, dtype=float) for band, values in zip(bands, columns)
+    }
+
+
+@traced
 def sample_image(Image, band, geom, scale):
     """
     Sample all pixel values in the specified band from the ee.Image.
@@ -10,8 +50,8 @@ def sample_image(Image, band, geom, scale):
     Image : ee.Image
         Image to be sampled.
 
-    band : str
-        Band of interest.
+    band : str or list
+        Band of interest, or list of bands of interest.
 
     geom : ee.Geometry
         Region of interest to sample.
@@ -21,57 +61,143 @@ def sample_image(Image, band, geom, scale):
 
     Returns
     -------
-    data : np.array
-        Array with all the values sampled.
+    data : np.array or dict
+        Array with all the values sampled. If band is a list, dict with the
+        array of each band. All the bands are sampled in one request.
+
+    Raises
+    ------
+    statgis.executor.FetchError
+        If the request fails after the retries of the executor.
     """
-    if type(geom) == ee.geometry.Geometry:
-        geom = ee.FeatureCollection([ee.Feature(geom, {"id": 0})])
-    elif type(geom) == ee.feature.Feature:
-        geom == ee.FeatureCollection(geom)
-    try:
-        sample = Image.sampleRegions(collection=geom, scale=scale, geometries=False)
+    geom = _to_collection(geom)
+    bands = [band] if isinstance(band, str) else list(band)
 
-        sample = sample.toList(sample.size())
-        raw = sample.getInfo()
+    columns = _columns(Image, bands, geom, scale)
 
-        data = np.array([r["properties"][band] for r in raw])
-    except:
-        data = np.array([np.nan])
+    def compute():
+        return _decode(bands, get_info(columns))
+
+    data = cached("sample_image", columns, {"bands": bands}, compute)
+
+    if isinstance(band, str):
+        data = data[band]
 
     return data
 
 
-def sample_collection(ImageCollection, band, geom, scale):
+@traced
+def sample_collection(ImageCollection, band, geom, scale, return_exceptions=False):
     """
     This function sample all images in an image collection applying the sample_image function to all images.
 
+    The images are sampled concurrently with the executor of
+    `statgis.executor`.
+
     Parameters
     ----------
     Image : ee.ImageCollection
         Image collection with the images of interest.
 
-    band : str
-        Band of interest.
-        
+    band : str or list
+        Band of interest, or list of bands of interest.
+
     geom : ee.Geometry
         Region of interest to sample.
         
     scale : float
         Pixelsize of image to be sampled.
 
+    return_exceptions : bool, optional
+        If True, the images that could not be sampled are returned as
+        `statgis.executor.FetchError` in the list. If False (default), the
+        first failure is raised.
+
     Returns
     -------
     data : list
-        list of np.array with all the sampled values per image.
+        list of np.array (or dict of np.array if band is a list) with all the
+        sampled values per image.
     """
-    N = ImageCollection.size().getInfo()
+    N = get_info(ImageCollection.size())
     ic_list = ImageCollection.toList(N)
 
-    data = []
-
-    for i in range(N):
+    def sample(i):
         image = ee.Image(ic_list.get(i))
-        values = sample_image(image, band=band, geom=geom, scale=scale)
-        data.append(values)
+        with span(image=i):
+            return sample_image(image, band=band, geom=geom, scale=scale)
+
+    data = get_executor().map(sample, range(N), return_exceptions=return_exceptions)
 
     return data
+
+
+@traced
+def sample_collection_batch(ImageCollection, band, geom, scale, page_size=100):
+    """
+    Sample all images in an image collection on the server and download the
+    values in pages, instead of one request per image.
+
+    Parameters
+    ----------
+    ImageCollection : ee.ImageCollection
+        Image collection with the images of interest.
+
+    band : str or list
+        Band of interest, or list of bands of interest.
+
+    geom : ee.Geometry
+        Region of interest to sample.
+
+    scale : float
+        Pixelsize of image to be sampled.
+
+    page_size : int, optional
+        Number of images downloaded per request (by default 100).
+
+    Returns
+    -------
+    data : list
+        list of np.array (or dict of np.array if band is a list) with all the
+        sampled values per image.
+
+    ids : list
+        list with the system:index of each image.
+
+    dates : pd.DatetimeIndex
+        Dates of the sampled images.
+    """
+    geom = _to_collection(geom)
+
+    bands = [band] if isinstance(band, str) else list(band)
+
+    def sample(Image):
+        """Sample one image and keep the values as a list property."""
+        values = _columns(Image, bands, geom, scale)
+
+        return ee.Feature(
+            None,
+            {
+                "id": Image.id(),
+                "system:time_start": Image.get("system:time_start"),
+                "values": values,
+            },
+        )
+
+    fc = ee.FeatureCollection(ImageCollection.map(sample))
+
+    data = []
+    ids = []
+    times = []
+
+    for page in get_executor().iter_pages(fc, page_size):
+        for feature in page:
+            properties = feature["properties"]
+            values = _decode(bands, properties["values"])
+            data.append(values[band] if isinstance(band, str) else values)
+            ids.append(properties["id"])
+            times.append(properties.get("system:time_start"))
+
+    dates = pd.DatetimeIndex(pd.to_datetime(times, unit="ms"))
+
+    return data, ids, dates
@@ -1,4 +1,11 @@
-import ee
+import numpy as np
+
+from statgis._lazy import lazy_import
+
+ee = lazy_import("ee")
+
+QA_BITS = {"cloud": 10, "cirrus": 11}
+
 
 def sentinel_scaler(Image):
     """
@@ -37,8 +44,8 @@ def sentinel_cloud_mask(Image):
     """
     qa = Image.select("QA60")
 
-    cloud_mask = qa.bitwiseAnd((1 << 10)).eq(0)
-    cirrus_mask = qa.bitwiseAnd((1 << 11)).eq(0)
+    cloud_mask = qa.bitwiseAnd((1 << QA_BITS["cloud"])).eq(0)
+    cirrus_mask = qa.bitwiseAnd((1 << QA_BITS["cirrus"])).eq(0)
 
     Image = Image.updateMask(cloud_mask).updateMask(cirrus_mask)
 
@@ -66,3 +73,64 @@ def sentinel_probability_mask(Image, probability=20):
     Image = Image.updateMask(mask)
 
     return Image
+
+
+def sentinel_preprocessing(Image):
+    """
+    Scale the optical bands and mask the clouds of a Sentinel 2 image in one
+    step. Same result as `sentinel_scaler` followed by `sentinel_cloud_mask`,
+    testing the QA60 bits with one bitmask.
+
+    Parameters
+    ----------
+    Image : ee.Image
+        Image to be processed.
+
+    Returns
+    -------
+    Image : ee.Image
+        Scaled and masked image.
+    """
+    bits = sum(1 << bit for bit in QA_BITS.values())
+    mask = Image.select("QA60").bitwiseAnd(bits).eq(0)
+
+    bands = Image.select("B.*").divide(10000)
+    Image = Image.addBands(bands, None, True).updateMask(mask)
+
+    return Image
+
+
+def sentinel_preprocessing_local(dn, qa, out=None):
+    """
+    Local version of `sentinel_preprocessing` for raw Sentinel 2 arrays.
+
+    The QA mask is computed on the integer QA60 values and only the valid
+    pixels are converted and scaled, writing float32 values into out.
+
+    Parameters
+    ----------
+    dn : np.ndarray
+        uint16 digital numbers with dimensions (..., y, x).
+
+    qa : np.ndarray
+        uint16 QA60 values with dimensions (y, x).
+
+    out : np.ndarray, optional
+        float32 array with the shape of dn where the result is written. By
+        default a new array.
+
+    Returns
+    -------
+    out : np.ndarray
+        float32 reflectance, NaN in the masked pixels.
+    """
+    bits = sum(1 << bit for bit in QA_BITS.values())
+    mask = (qa & bits) == 0
+
+    if out is None:
+        out = np.empty(dn.shape, dtype=np.float32)
+
+    out.fill(np.nan)
+    np.divide(dn, np.float32(10000), out=out, where=mask)
+
+    return out
@@ -1,6 +1,50 @@
-import ee
-import pandas as pd
+import warnings
 
+import numpy as np
+
+from statgis._lazy import lazy_import
+from statgis._tiles import array_tiles, map_tiles, stack_tiles
+from statgis.cache import cached
+from statgis.executor import get_info
+from statgis.raster_stack import RasterStack
+from statgis.tracing import traced
+
+ee = lazy_import("ee")
+pd = lazy_import("pandas")
+special = lazy_import("scipy.special")
+
+MS_PER_YEAR = 1000 * 60 * 60 * 24 * 365
+
+# Origin (years since 1970, 2000-01-01) of the time of the trend states, so
+# the sums of t and t^2 stay well conditioned.
+TIME_ORIGIN = 30.0
+
+MONTHS = range(1, 13)
+
+# Maximum number of pairwise slopes held in memory per chunk of pixels.
+PAIRS_PER_CHUNK = 2**23
+
+STATE_BANDS = (
+    ["n", "st", "sy", "stt", "sty"]
+    + [f"n_{m}" for m in MONTHS]
+    + [f"st_{m}" for m in MONTHS]
+    + [f"sy_{m}" for m in MONTHS]
+)
+
+
+def _time_starts(ImageCollection):
+    """List with the system:time_start of all the images."""
+    return ImageCollection.reduceColumns(
+        ee.Reducer.toList(), ["system:time_start"]
+    ).get("list")
+
+
+def _to_dates(times):
+    """DatetimeIndex of a list of times in milliseconds."""
+    return pd.DatetimeIndex(pd.to_datetime(times, unit="ms"))
+
+
+@traced
 def extract_dates(ImageCollection):
     """
     Extract serie with the dates of all image in a Image Collection.
@@ -15,13 +59,12 @@ def extract_dates(ImageCollection):
     dates : pd.DatetimeIndex
         PanDas series with the image dates from the ImageCollection.
     """
-    dates = (
-        ImageCollection.reduceColumns(ee.Reducer.toList(), ["system:time_start"])
-        .get("list")
-        .getInfo()
-    )
-    dates = pd.to_datetime(dates, unit="ms")
-    dates = pd.DatetimeIndex(dates)
+    times = _time_starts(ImageCollection)
+
+    def compute():
+        return _to_dates(get_info(times))
+
+    dates = cached("extract_dates", times, {}, compute)
 
     return dates
 
@@ -46,11 +89,7 @@ def trend(ImageCollection, band):
 
     def time_func(Image):
         """Calc Time Band for linear regression"""
-        time = (
-            Image.metadata("system:time_start")
-            .divide(1000 * 60 * 60 * 24 * 365)
-            .rename("time")
-        )
+        time = Image.metadata("system:time_start").divide(MS_PER_YEAR).rename("time")
         Image = Image.addBands(time)
         return Image
 
@@ -179,9 +218,22 @@ def calc_anomalies(ImageCollection, monthly_mean):
     -------
     data : ee.ImageCollection
         ImageCollection with stational means added and anomalies calcualted.
+
+    Notes
+    -----
+    Each image is matched with the monthly mean of its month with one join, so
+    the size of the expression graph does not grow with the number of months.
+    Use `statgis.instrumentation.node_count` to measure it.
     """
-    def calc_anomaly(Image):
-        """Function for calculate anomalies."""
+
+    def set_month(Image):
+        """Add the month of the image as property to join it."""
+        return Image.set("month", Image.date().get("month"))
+
+    def calc_anomaly(pair):
+        """Add the monthly mean of the image and calculate the anomaly."""
+        Image = ee.Image(pair.get("primary")).addBands(ee.Image(pair.get("secondary")))
+
         anomaly = Image.expression(
             "stat - mean",
             {"stat": Image.select("stational"), "mean": Image.select("stational_mean")},
@@ -191,59 +243,12 @@ def calc_anomalies(ImageCollection, monthly_mean):
 
         return Image
 
-    m01 = ImageCollection.filter(ee.Filter.calendarRange(1, 1, "month")).map(
-        lambda x: x.addBands(monthly_mean.filter(ee.Filter.eq("month", 1)).first())
-    )
-    m02 = ImageCollection.filter(ee.Filter.calendarRange(2, 2, "month")).map(
-        lambda x: x.addBands(monthly_mean.filter(ee.Filter.eq("month", 2)).first())
-    )
-    m03 = ImageCollection.filter(ee.Filter.calendarRange(3, 3, "month")).map(
-        lambda x: x.addBands(monthly_mean.filter(ee.Filter.eq("month", 3)).first())
-    )
-    m04 = ImageCollection.filter(ee.Filter.calendarRange(4, 4, "month")).map(
-        lambda x: x.addBands(monthly_mean.filter(ee.Filter.eq("month", 4)).first())
-    )
-    m05 = ImageCollection.filter(ee.Filter.calendarRange(5, 5, "month")).map(
-        lambda x: x.addBands(monthly_mean.filter(ee.Filter.eq("month", 5)).first())
-    )
-    m06 = ImageCollection.filter(ee.Filter.calendarRange(6, 6, "month")).map(
-        lambda x: x.addBands(monthly_mean.filter(ee.Filter.eq("month", 6)).first())
-    )
-    m07 = ImageCollection.filter(ee.Filter.calendarRange(7, 7, "month")).map(
-        lambda x: x.addBands(monthly_mean.filter(ee.Filter.eq("month", 7)).first())
-    )
-    m08 = ImageCollection.filter(ee.Filter.calendarRange(8, 8, "month")).map(
-        lambda x: x.addBands(monthly_mean.filter(ee.Filter.eq("month", 8)).first())
-    )
-    m09 = ImageCollection.filter(ee.Filter.calendarRange(9, 9, "month")).map(
-        lambda x: x.addBands(monthly_mean.filter(ee.Filter.eq("month", 9)).first())
-    )
-    m10 = ImageCollection.filter(ee.Filter.calendarRange(10, 10, "month")).map(
-        lambda x: x.addBands(monthly_mean.filter(ee.Filter.eq("month", 10)).first())
-    )
-    m11 = ImageCollection.filter(ee.Filter.calendarRange(11, 11, "month")).map(
-        lambda x: x.addBands(monthly_mean.filter(ee.Filter.eq("month", 11)).first())
-    )
-    m12 = ImageCollection.filter(ee.Filter.calendarRange(12, 12, "month")).map(
-        lambda x: x.addBands(monthly_mean.filter(ee.Filter.eq("month", 12)).first())
-    )
+    join = ee.Join.inner("primary", "secondary")
+    month_filter = ee.Filter.equals(leftField="month", rightField="month")
 
-    data = (
-        m01.merge(m02)
-        .merge(m03)
-        .merge(m04)
-        .merge(m05)
-        .merge(m06)
-        .merge(m07)
-        .merge(m08)
-        .merge(m09)
-        .merge(m10)
-        .merge(m11)
-        .merge(m12)
-    )
+    joined = join.apply(ImageCollection.map(set_month), monthly_mean, month_filter)
 
-    data = data.sort("system:time_start")
-    data = data.map(calc_anomaly)
+    data = ee.ImageCollection(joined.map(calc_anomaly))
 
     return data
 
@@ -278,3 +283,628 @@ def time_series_preocessing(ImageCollection, band):
     data = calc_anomalies(trended, monthly_mean)
 
     return data, monthly_mean
+
+
+def _years(dates):
+    """Time in years since 1970, as the time band of `trend`."""
+    ms = pd.DatetimeIndex(dates).values.astype("datetime64[ms]").astype(np.int64)
+    return ms / MS_PER_YEAR
+
+
+def _process_tile(block, time, month):
+    """Trend, stational variation and anomalies of a (time, y, x) block."""
+    shape = block.shape
+    y = block.reshape(shape[0], -1).astype(np.float64)
+
+    valid = np.isfinite(y)
+    yv = np.where(valid, y, 0.0)
+
+    # Centered time keeps the normal equations well conditioned.
+    t0 = time.mean()
+    tc = time - t0
+    tv = np.where(valid, tc[:, None], 0.0)
+
+    n = valid.sum(axis=0)
+    st = tv.sum(axis=0)
+    sy = yv.sum(axis=0)
+    stt = (tv * tv).sum(axis=0)
+    sty = (tv * yv).sum(axis=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = (n * sty - st * sy) / (n * stt - st * st)
+        offset = (sy - scale * st) / n
+        mean = sy / n
+
+    predicted = tc[:, None] * scale + offset
+    stational = y - predicted + mean
+
+    # Segment reductions of the stational variation by calendar month.
+    order = np.argsort(month, kind="stable")
+    months, starts = np.unique(month[order], return_index=True)
+    sums = np.add.reduceat(np.where(valid, stational, 0.0)[order], starts, axis=0)
+    counts = np.add.reduceat(valid[order], starts, axis=0)
+
+    monthly_mean = np.full((12, y.shape[1]), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        monthly_mean[months - 1] = sums / counts
+
+    stational_mean = monthly_mean[month - 1]
+    anomaly = stational - stational_mean
+
+    data = {
+        "predicted": predicted,
+        "stational": stational,
+        "stational_mean": stational_mean,
+        "anomaly": anomaly,
+        "monthly_mean": monthly_mean,
+    }
+
+    return {
+        key: value.astype(np.float32).reshape(value.shape[:1] + shape[1:])
+        for key, value in data.items()
+    }
+
+
+def _local_dates(cube, dates):
+    """Dates of the time axis of a local cube, see `time_series_processing_local`."""
+    if dates is not None:
+        return dates
+    if isinstance(cube, RasterStack):
+        return cube.dates
+    if isinstance(cube, np.ndarray):
+        raise ValueError("dates is required for ndarray input")
+
+    return cube["time"].values
+
+
+def time_series_processing_local(
+    cube, dates=None, band=0, tile_size=256, processes=None
+):
+    """
+    Local version of `time_series_preocessing` for (time, y, x) cubes.
+
+    The linear trend is fitted per pixel with closed-form least squares over
+    the valid observations, the monthly means of the stational variation are
+    computed with segment reductions by calendar month and the spatial tiles
+    are processed in a process pool.
+
+    Parameters
+    ----------
+    cube : np.ndarray, xarray.DataArray or statgis.raster_stack.RasterStack
+        Cube with dimensions (time, y, x). Missing values must be NaN.
+
+    dates : list, optional
+        Dates of the time axis, required for a np.ndarray. By default the
+        `time` coordinate of a DataArray or the dates of a RasterStack.
+
+    band : int, optional
+        Band of a RasterStack to analyse (by default 0).
+
+    tile_size : int, optional
+        Size in pixels of the tiles (by default 256).
+
+    processes : int, optional
+        Number of processes. By default one per CPU, 1 runs in this process.
+
+    Returns
+    -------
+    data : dict
+        Float32 arrays (time, y, x) with the predicted, stational,
+        stational_mean and anomaly values.
+
+    monthly_mean : np.ndarray
+        Float32 array (12, y, x) with the monthly means of the stational
+        variation, NaN for months without data.
+
+    Raises
+    ------
+    ValueError
+        If cube is a np.ndarray and dates is not given.
+    """
+    dates = _local_dates(cube, dates)
+
+    time = _years(dates)
+    month = pd.DatetimeIndex(dates).month.values
+
+    if isinstance(cube, RasterStack):
+        tiles = stack_tiles(cube, tile_size, band)
+    else:
+        tiles = array_tiles(cube, tile_size)
+
+    data = map_tiles(
+        _process_tile, tiles, cube.shape[-2:], processes, args=(time, month)
+    )
+    monthly_mean = data.pop("monthly_mean")
+
+    return data, monthly_mean
+
+
+def _tie_variance(y, valid):
+    """
+    Sum of t(t - 1)(2t + 5) over the groups of tied values of each column of
+    a (time, pixels) array.
+    """
+    ordered = np.sort(y, axis=0).T
+    count = valid.sum(axis=0)
+    inside = np.arange(y.shape[0]) < count[:, None]
+
+    start = np.ones(ordered.shape, dtype=bool)
+    start[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+
+    group = np.cumsum(start[inside]) - 1
+    column = np.repeat(np.arange(y.shape[1]), count)
+
+    size = np.bincount(group).astype(np.float64)
+    owner = np.zeros(size.shape, dtype=np.int64)
+    owner[group] = column
+
+    return np.bincount(owner, size * (size - 1) * (2 * size + 5), y.shape[1])
+
+
+def _median_slopes(y, time):
+    """Median of the slopes between all the pairs of valid values, per column."""
+    n = y.shape[0]
+    pairs = n * (n - 1) // 2
+
+    step = max(1, PAIRS_PER_CHUNK // max(pairs, 1))
+    median = np.full(y.shape[1], np.nan)
+
+    for first in range(0, y.shape[1], step):
+        chunk = np.ascontiguousarray(y[:, first : first + step].T)
+        slopes = np.empty((chunk.shape[0], pairs))
+
+        # The slopes of all the pairs, built lag by lag.
+        start = 0
+        for lag in range(1, n):
+            out = slopes[:, start : start + n - lag]
+            dt = time[lag:] - time[:-lag]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                np.divide(chunk[:, lag:] - chunk[:, :-lag], dt, out=out)
+            out[:, dt == 0] = np.nan
+            start += n - lag
+
+        # NaN slopes are partitioned to the end, the median is taken from
+        # the valid ones of each column. Only the middle positions of the
+        # numbers of valid slopes of the chunk are put in order.
+        m = np.isfinite(slopes).sum(axis=1)
+        middle = np.unique(np.concatenate([np.maximum(m - 1, 0) // 2, m // 2]))
+        slopes.partition(middle, axis=1)
+
+        low = np.take_along_axis(slopes, (np.maximum(m - 1, 0) // 2)[:, None], 1)
+        high = np.take_along_axis(slopes, (m // 2)[:, None], 1)
+        median[first : first + step] = np.where(m > 0, (low + high)[:, 0] / 2, np.nan)
+
+    return median
+
+
+def _robust_tile(block, time, alpha):
+    """Mann-Kendall test and Theil-Sen slope of a (time, y, x) block."""
+    shape = block.shape
+    y = block.reshape(shape[0], -1).astype(np.float64)
+    valid = np.isfinite(y)
+    n = valid.sum(axis=0).astype(np.float64)
+
+    # Mann-Kendall score, summed lag by lag over all the pixels. The pairs
+    # with NaN are neither greater nor less than 0.
+    s = np.zeros(y.shape[1])
+    for lag in range(1, shape[0]):
+        difference = y[lag:] - y[:-lag]
+        s += np.count_nonzero(difference > 0, axis=0)
+        s -= np.count_nonzero(difference < 0, axis=0)
+
+    var_s = (n * (n - 1) * (2 * n + 5) - _tie_variance(y, valid)) / 18
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(s > 0, s - 1, np.where(s < 0, s + 1, 0.0)) / np.sqrt(var_s)
+        z = np.where(var_s > 0, z, 0.0)
+        tau = s / (n * (n - 1) / 2)
+
+    p = 2 * special.ndtr(-np.abs(z))
+
+    slope = _median_slopes(y, time)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        median_t = np.nanmedian(np.where(valid, time[:, None], np.nan), axis=0)
+        intercept = np.nanmedian(y, axis=0) - slope * median_t
+
+    data = {
+        "slope": slope,
+        "intercept": intercept,
+        "tau": tau,
+        "s": s,
+        "z": z,
+        "p": p,
+        "trend": np.where(p < alpha, np.sign(s), 0.0),
+    }
+
+    return {
+        key: value.astype(np.float32).reshape(shape[1:]) for key, value in data.items()
+    }
+
+
+def robust_trend_local(
+    cube, dates=None, band=0, alpha=0.05, tile_size=256, processes=None
+):
+    """
+    Mann-Kendall test and Theil-Sen slope of each pixel of a local cube, a
+    trend that is robust to the outliers that `trend` is sensitive to.
+
+    The Mann-Kendall score is computed lag by lag for all the pixels of a
+    tile at once, the tie correction from the sorted series and the Theil-Sen
+    slope as the median of the partitioned pairwise slopes. The tiles are
+    processed in a process pool.
+
+    Parameters
+    ----------
+    cube : np.ndarray, xarray.DataArray or statgis.raster_stack.RasterStack
+        Cube with dimensions (time, y, x). Missing values must be NaN.
+
+    dates : list, optional
+        Dates of the time axis, required for a np.ndarray. By default the
+        `time` coordinate of a DataArray or the dates of a RasterStack.
+
+    band : int, optional
+        Band of a RasterStack to analyse (by default 0).
+
+    alpha : float, optional
+        Significance level of the test (by default 0.05).
+
+    tile_size : int, optional
+        Size in pixels of the tiles (by default 256).
+
+    processes : int, optional
+        Number of processes. By default one per CPU, 1 runs in this process.
+
+    Returns
+    -------
+    data : dict
+        Float32 arrays (y, x) with the Theil-Sen `slope` (by year) and
+        `intercept` (for the time in years since 1970, as in `trend`), the
+        Kendall `tau`, the Mann-Kendall score `s`, the normal statistic `z`,
+        the two-sided p-value `p` and the `trend`: 1 increasing, -1
+        decreasing or 0 not significant.
+
+    Raises
+    ------
+    ValueError
+        If cube is a np.ndarray and dates is not given.
+
+    Notes
+    -----
+    The test is the original Mann-Kendall test with tie correction, as
+    `pymannkendall.original_test`. The Theil-Sen slope uses the time of the
+    images, so it is per year even if the series is irregular or has gaps.
+    """
+    dates = _local_dates(cube, dates)
+
+    time = _years(dates)
+
+    if isinstance(cube, RasterStack):
+        tiles = stack_tiles(cube, tile_size, band)
+    else:
+        tiles = array_tiles(cube, tile_size)
+
+    return map_tiles(
+        _robust_tile, tiles, cube.shape[-2:], processes, args=(time, alpha)
+    )
+
+
+def trend_state(ImageCollection, band):
+    """
+    Sufficient statistics of the linear trend and the monthly means of the
+    stational variation of a band, to update them incrementally.
+
+    Parameters
+    ----------
+    ImageCollection : ee.ImageCollection
+        ImageCollection with the band of interest.
+
+    band : str
+        Name of the band of interest.
+
+    Returns
+    -------
+    state : ee.Image
+        Image with the `STATE_BANDS`: number of observations (n), sums of the
+        time (st), the band (sy), the squared time (stt) and the time by the
+        band (sty), and n, st and sy of each month (n_1, ..., sy_12). The time
+        is in years since `TIME_ORIGIN`. Pixels without observations, and every
+        pixel of an empty collection, are 0.
+    """
+    months = ee.Image.constant(list(MONTHS))
+
+    def statistics(Image):
+        y = Image.select(band)
+        one = y.multiply(0).add(1)
+        time = Image.metadata("system:time_start").divide(MS_PER_YEAR)
+        t = one.multiply(time.subtract(TIME_ORIGIN))
+
+        month = months.eq(Image.date().get("month"))
+
+        return ee.Image.cat(
+            [
+                one.rename("n"),
+                t.rename("st"),
+                y.rename("sy"),
+                t.multiply(t).rename("stt"),
+                t.multiply(y).rename("sty"),
+                one.multiply(month).rename([f"n_{m}" for m in MONTHS]),
+                t.multiply(month).rename([f"st_{m}" for m in MONTHS]),
+                y.multiply(month).rename([f"sy_{m}" for m in MONTHS]),
+            ]
+        )
+
+    state = ImageCollection.map(statistics).reduce(ee.Reducer.sum())
+    empty = ee.Image.constant([0] * len(STATE_BANDS))
+
+    return ee.Image(
+        ee.Algorithms.If(
+            ImageCollection.size().eq(0),
+            empty.rename(STATE_BANDS),
+            state.rename(STATE_BANDS).unmask(0),
+        )
+    )
+
+
+def update_trend_state(state, ImageCollection, band):
+    """
+    Fold new scenes into a state of `trend_state`. The cost only depends on
+    the number of new scenes.
+
+    Parameters
+    ----------
+    state : ee.Image
+        State of the scenes processed before, for example an asset exported
+        from `trend_state`.
+
+    ImageCollection : ee.ImageCollection
+        New scenes.
+
+    band : str
+        Name of the band of interest.
+
+    Returns
+    -------
+    state : ee.Image
+        State of all the scenes, export it to use it in the next update.
+    """
+    return state.unmask(0).add(trend_state(ImageCollection, band))
+
+
+def time_series_from_state(ImageCollection, band, state):
+    """
+    Version of `time_series_preocessing` that takes the linear trend and the
+    monthly means from a state of `trend_state`, so only the scenes of
+    ImageCollection are processed.
+
+    Parameters
+    ----------
+    ImageCollection : ee.ImageCollection
+        Scenes to analyse, usually the new scenes folded into state.
+
+    band : str
+        Name of the band of interest.
+
+    state : ee.Image
+        State of all the scenes.
+
+    Returns
+    -------
+    data : ee.ImageCollection
+        ImageCollection with the time, raw data, predicted, stational,
+        stational_mean and anomaly bands, as `time_series_preocessing`.
+
+    monthly_mean : ee.ImageCollection
+        ImageCollection with the monthly mean of the stational variation of
+        each month in the `stational_mean` band and a `month` property.
+    """
+    n = state.select("n")
+    valid = n.gt(0)
+
+    scale = (
+        n.multiply(state.select("sty"))
+        .subtract(state.select("st").multiply(state.select("sy")))
+        .divide(
+            n.multiply(state.select("stt")).subtract(
+                state.select("st").multiply(state.select("st"))
+            )
+        )
+    )
+    centered = state.select("sy").subtract(scale.multiply(state.select("st")))
+    centered = centered.divide(n)
+    mean = state.select("sy").divide(n)
+
+    def month_mean(m):
+        count = state.select(f"n_{m}")
+        stational = (
+            state.select(f"sy_{m}")
+            .subtract(scale.multiply(state.select(f"st_{m}")))
+            .divide(count)
+            .subtract(centered)
+            .add(mean)
+        )
+        stational = stational.updateMask(count.gt(0)).rename("stational_mean")
+        return stational.set("month", m)
+
+    monthly_mean = ee.ImageCollection([month_mean(m) for m in MONTHS])
+
+    def stat_func(Image):
+        """Calc the predicted and stational bands from the state."""
+        time = Image.metadata("system:time_start").divide(MS_PER_YEAR).rename("time")
+        pred = (
+            time.subtract(TIME_ORIGIN)
+            .multiply(scale)
+            .add(centered)
+            .updateMask(valid)
+            .rename("predicted")
+        )
+        stat = Image.select(band).subtract(pred).add(mean).rename("stational")
+
+        Image = Image.addBands(time).select(["time", band])
+        return Image.addBands(pred.toFloat()).addBands(stat)
+
+    data = calc_anomalies(ImageCollection.map(stat_func), monthly_mean)
+
+    return data, monthly_mean
+
+
+class TrendState:
+    """
+    Local store of the sufficient statistics of the linear trend and the
+    monthly means of the stational variation, per pixel or per zone.
+
+    Each `update` folds new scenes in with a cost that only depends on the
+    number of new scenes, and `fit` gives the same results as fitting all the
+    scenes again with `time_series_processing_local`.
+
+    Parameters
+    ----------
+    shape : tuple
+        Shape of the pixels or zones, (y, x) for images or (zones,) for the
+        zonal statistics of several zones.
+
+    Attributes
+    ----------
+    n, st, sy, stt, sty : np.ndarray
+        Number of observations and sums of the time, the values, the squared
+        time and the time by the values. The time is in years since
+        `TIME_ORIGIN`.
+
+    month_n, month_t, month_y : np.ndarray
+        Number of observations and sums of the time and the values of each
+        month, with dimensions (12, *shape).
+    """
+
+    _FIELDS = ("n", "st", "sy", "stt", "sty", "month_n", "month_t", "month_y")
+
+    def __init__(self, shape):
+        shape = tuple(shape)
+
+        for name in self._FIELDS[:5]:
+            setattr(self, name, np.zeros(shape))
+        for name in self._FIELDS[5:]:
+            setattr(self, name, np.zeros((12,) + shape))
+
+    @property
+    def shape(self):
+        return self.n.shape
+
+    def update(self, cube, dates):
+        """
+        Fold new scenes into the state.
+
+        Parameters
+        ----------
+        cube : np.ndarray or xarray.DataArray
+            New scenes with dimensions (time, *shape). Missing values must be
+            NaN.
+
+        dates : list
+            Dates of the new scenes.
+
+        Returns
+        -------
+        state : TrendState
+            The updated state.
+        """
+        y = np.asarray(cube, dtype=np.float64)
+        t = _years(dates) - TIME_ORIGIN
+        month = pd.DatetimeIndex(dates).month.values
+
+        valid = np.isfinite(y)
+        yv = np.where(valid, y, 0.0)
+        tv = np.where(valid, t.reshape((-1,) + (1,) * (y.ndim - 1)), 0.0)
+
+        self.n += valid.sum(axis=0)
+        self.st += tv.sum(axis=0)
+        self.sy += yv.sum(axis=0)
+        self.stt += (tv * tv).sum(axis=0)
+        self.sty += (tv * yv).sum(axis=0)
+
+        for m in np.unique(month):
+            scenes = month == m
+            self.month_n[m - 1] += valid[scenes].sum(axis=0)
+            self.month_t[m - 1] += tv[scenes].sum(axis=0)
+            self.month_y[m - 1] += yv[scenes].sum(axis=0)
+
+        return self
+
+    def fit(self):
+        """
+        Linear trend and monthly means of the state.
+
+        Returns
+        -------
+        fit : dict
+            scale (by year) and offset of the trend for the time in years
+            since 1970 as in `trend`, mean of the values and monthly_mean
+            (12, *shape) of the stational variation, NaN without data.
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scale = (self.n * self.sty - self.st * self.sy) / (
+                self.n * self.stt - self.st * self.st
+            )
+            centered = (self.sy - scale * self.st) / self.n
+            mean = self.sy / self.n
+
+            monthly_mean = (
+                (self.month_y - scale * self.month_t) / self.month_n - centered + mean
+            )
+
+        return {
+            "scale": scale,
+            "offset": centered - scale * TIME_ORIGIN,
+            "mean": mean,
+            "monthly_mean": monthly_mean,
+        }
+
+    def apply(self, cube, dates):
+        """
+        Trend, stational variation and anomalies of scenes with the fit of the
+        state, as `time_series_processing_local`.
+
+        Parameters
+        ----------
+        cube : np.ndarray or xarray.DataArray
+            Scenes with dimensions (time, *shape), usually the new ones.
+
+        dates : list
+            Dates of the scenes.
+
+        Returns
+        -------
+        data : dict
+            Float32 arrays (time, *shape) with the predicted, stational,
+            stational_mean and anomaly values.
+        """
+        fit = self.fit()
+        y = np.asarray(cube, dtype=np.float64)
+        t = _years(dates).reshape((-1,) + (1,) * (y.ndim - 1))
+        month = pd.DatetimeIndex(dates).month.values
+
+        predicted = t * fit["scale"] + fit["offset"]
+        stational = y - predicted + fit["mean"]
+        stational_mean = fit["monthly_mean"][month - 1]
+
+        data = {
+            "predicted": predicted,
+            "stational": stational,
+            "stational_mean": stational_mean,
+            "anomaly": stational - stational_mean,
+        }
+
+        return {key: value.astype(np.float32) for key, value in data.items()}
+
+    def save(self, path):
+        """Store the state in a npz file."""
+        np.savez(path, **{name: getattr(self, name) for name in self._FIELDS})
+
+    @classmethod
+    def load(cls, path):
+        """Read a state stored with `save`."""
+        with np.load(path) as data:
+            state = cls(data["n"].shape)
+            for name in cls._FIELDS:
+                setattr(state, name, data[name])
+
+        return state
@@ -0,0 +1,315 @@
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import threading
+import time
+import warnings
+
+_hooks = ()
+_lock = threading.Lock()
+
+_context = contextvars.ContextVar(
+    "statgis_trace", default={"function": None, "params": {}, "cache": None}
+)
+
+
+class TraceEvent:
+    """
+    Client-side round trip made by a statgis function.
+
+    Attributes
+    ----------
+    function : str
+        statgis function that made the request, None if it was made outside of
+        them.
+
+    params : dict
+        Summary of the parameters of the function, plus the position of the
+        image or page of zones for the requests made per item.
+
+    request : str
+        Name of the request, like `Dictionary.getInfo`.
+
+    start : float
+        Time (seconds since the epoch) when the request started.
+
+    latency : float
+        Seconds from the first attempt to the response, including the retries.
+
+    bytes : int
+        Size of the JSON response, None for cache hits.
+
+    attempts : int
+        Number of attempts, 0 for cache hits.
+
+    cache : str
+        "hit" or "miss" if the cache is enabled, None otherwise.
+
+    error : Exception
+        Error raised by the request, None if it succeeded.
+    """
+
+    __slots__ = (
+        "function",
+        "params",
+        "request",
+        "start",
+        "latency",
+        "bytes",
+        "attempts",
+        "cache",
+        "error",
+    )
+
+    def __init__(
+        self, function, params, request, start, latency, bytes, attempts, cache, error
+    ):
+        self.function = function
+        self.params = params
+        self.request = request
+        self.start = start
+        self.latency = latency
+        self.bytes = bytes
+        self.attempts = attempts
+        self.cache = cache
+        self.error = error
+
+    def __repr__(self):
+        return (
+            f"TraceEvent(function={self.function!r}, request={self.request!r}, "
+            f"latency={self.latency:.3f}, bytes={self.bytes}, "
+            f"attempts={self.attempts}, cache={self.cache!r})"
+        )
+
+
+def add_hook(callback):
+    """
+    Call a function with a `TraceEvent` after each round trip of statgis.
+
+    Parameters
+    ----------
+    callback : callable
+        Function that takes a TraceEvent. It is called from the thread that
+        made the request, and its errors are reported as warnings.
+
+    Returns
+    -------
+    callback : callable
+        The registered function, to remove it with `remove_hook`.
+    """
+    global _hooks
+
+    with _lock:
+        _hooks = _hooks + (callback,)
+
+    return callback
+
+
+def remove_hook(callback):
+    """Stop calling a function registered with `add_hook`."""
+    global _hooks
+
+    with _lock:
+        _hooks = tuple(hook for hook in _hooks if hook != callback)
+
+
+def enabled():
+    """True if there is any registered hook."""
+    return bool(_hooks)
+
+
+@contextlib.contextmanager
+def _state(**updates):
+    """Update the trace context of the current thread within the block."""
+    token = _context.set({**_context.get(), **updates})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+@contextlib.contextmanager
+def span(function=None, **params):
+    """
+    Attribute the requests made within the block to a function.
+
+    Parameters
+    ----------
+    function : str, optional
+        Name of the function. By default the function of the enclosing span,
+        adding params to its parameters.
+
+    **params
+        Parameters reported with the requests.
+    """
+    current = _context.get()
+
+    if function is None:
+        function = current["function"]
+        params = {**current["params"], **params}
+
+    with _state(function=function, params=params):
+        yield
+
+
+def _summary(value):
+    """Short, JSON friendly description of a parameter."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+
+    if isinstance(value, (list, tuple)):
+        if len(value) <= 10:
+            return [_summary(item) for item in value]
+        return f"{type(value).__name__}[{len(value)}]"
+
+    if hasattr(value, "__geo_interface__") and hasattr(value, "__len__"):
+        return f"{type(value).__name__}[{len(value)}]"
+
+    return type(value).__name__
+
+
+def traced(func):
+    """
+    Decorator that attributes the requests made by a function to it, with a
+    summary of its arguments. Within another traced function the requests
+    stay attributed to the outer one.
+    """
+    signature = inspect.signature(func)
+
+    def params(args, kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return {key: _summary(value) for key, value in bound.arguments.items()}
+
+    if inspect.isgeneratorfunction(func):
+
+        @functools.wraps(func)
+        def generator(*args, **kwargs):
+            summary = params(args, kwargs)
+            iterator = func(*args, **kwargs)
+
+            while True:
+                if _hooks and _context.get()["function"] is None:
+                    context = span(func.__name__, **summary)
+                else:
+                    context = contextlib.nullcontext()
+
+                with context:
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                yield item
+
+        return generator
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def coroutine(*args, **kwargs):
+            if not _hooks or _context.get()["function"] is not None:
+                return await func(*args, **kwargs)
+
+            with span(func.__name__, **params(args, kwargs)):
+                return await func(*args, **kwargs)
+
+        return coroutine
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _hooks or _context.get()["function"] is not None:
+            return func(*args, **kwargs)
+
+        with span(func.__name__, **params(args, kwargs)):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def _size(result):
+    """Size in bytes of a response as JSON."""
+    try:
+        return len(json.dumps(result, separators=(",", ":"), default=str))
+    except (TypeError, ValueError):
+        return None
+
+
+def record(request, start, latency, attempts, result=None, error=None, cache=None):
+    """
+    Send a `TraceEvent` to the hooks, with the function of the current span.
+    Used by the executor and the cache.
+    """
+    hooks = _hooks
+    if not hooks:
+        return
+
+    current = _context.get()
+
+    event = TraceEvent(
+        function=current["function"],
+        params=current["params"],
+        request=request,
+        start=start,
+        latency=latency,
+        bytes=None if error is not None or cache == "hit" else _size(result),
+        attempts=attempts,
+        cache=cache or current["cache"],
+        error=error,
+    )
+
+    for hook in hooks:
+        try:
+            hook(event)
+        except Exception as exception:
+            warnings.warn(f"Tracing hook {hook!r} failed: {exception!r}")
+
+
+def opentelemetry_hook(tracer=None):
+    """
+    Hook that emits each round trip as an OpenTelemetry span.
+
+    Parameters
+    ----------
+    tracer : opentelemetry.trace.Tracer, optional
+        Tracer of the spans. By default `trace.get_tracer("statgis")`, which
+        requires opentelemetry-api.
+
+    Returns
+    -------
+    hook : callable
+        Function to register with `add_hook`.
+    """
+    if tracer is None:
+        from opentelemetry import trace
+
+        tracer = trace.get_tracer("statgis")
+
+    def hook(event):
+        start = int(event.start * 1e9)
+
+        attributes = {
+            "statgis.function": event.function or "",
+            "statgis.request": event.request,
+            "statgis.attempts": event.attempts,
+            "statgis.params": json.dumps(event.params, default=str),
+        }
+        if event.bytes is not None:
+            attributes["statgis.bytes"] = event.bytes
+        if event.cache is not None:
+            attributes["statgis.cache"] = event.cache
+
+        otel_span = tracer.start_span(
+            event.function or event.request, start_time=start, attributes=attributes
+        )
+        if event.error is not None:
+            otel_span.record_exception(event.error)
+        otel_span.end(end_time=start + int(event.latency * 1e9))
+
+    return hook
+
+
+def now():
+    """Wall time and monotonic time at the start of a request."""
+    return time.time(), time.perf_counter()
@@ -1,7 +1,394 @@
-import ee
-import pandas as pd
+import numpy as np
 
-def zonal_statistics_image(Image, geom, scale, bands="all", reducer="all", tileScale=16):
+from statgis._lazy import lazy_import
+from statgis._tiles import array_tiles, reduce_tiles
+from statgis.cache import cached
+from statgis.executor import FetchError, get_executor, get_info
+from statgis.raster_stack import RasterStack
+from statgis.tracing import span, traced
+
+ee = lazy_import("ee")
+pd = lazy_import("pandas")
+
+STATS = ("mean", "stdDev", "max", "min", "count")
+
+# Maximum number of features downloaded in one request.
+MAX_FEATURES = 5000
+
+# Errors of a reduction that succeeds in smaller regions.
+SPLIT_MESSAGES = (
+    "memory limit exceeded",
+    "too many pixels",
+    "computation timed out",
+    "too large",
+)
+
+
+def _default_reducer():
+    """Mean, standard deviation, maximum, minimum and count reducer."""
+    return ee.Reducer.mean().combine(
+        ee.Reducer.stdDev().combine(
+            ee.Reducer.max().combine(
+                ee.Reducer.min().combine(ee.Reducer.count(), sharedInputs=True),
+                sharedInputs=True,
+            ),
+            sharedInputs=True,
+        ),
+        sharedInputs=True,
+    )
+
+
+def _region_reduction(geom, scale, reducer, tileScale, image_id=False):
+    """
+    Function that reduces an image in geom into a feature with its date, and
+    its system:id as `image_id` if image_id is True.
+    """
+
+    def reduce_image(Image):
+        stats = Image.reduceRegion(
+            reducer=reducer, geometry=geom, scale=scale, tileScale=tileScale
+        )
+
+        stats = ee.Feature(geom, stats)
+        stats = stats.set("system:time_start", Image.get("system:time_start"))
+        if image_id:
+            stats = stats.set("image_id", Image.get("system:id"))
+
+        return stats
+
+    return reduce_image
+
+
+def _combine(n_a, mean_a, m2_a, n_b, mean_b, m2_b):
+    """
+    Chan et al. combination of the count, mean and sum of squared deviations
+    of two sets of values. Works with scalars and arrays; an empty set (count
+    0) leaves the other unchanged.
+    """
+    n = n_a + n_b
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta = mean_b - mean_a
+        mean = np.where(
+            n_b == 0, mean_a, np.where(n_a == 0, mean_b, mean_a + delta * n_b / n)
+        )
+        m2 = np.where(
+            n_b == 0,
+            m2_a,
+            np.where(n_a == 0, m2_b, m2_a + m2_b + delta**2 * n_a * n_b / n),
+        )
+
+    return n, mean, m2
+
+
+def _merge_stats(parts):
+    """
+    Merge the default statistics of the parts of a region, with their sums
+    of weights (see `_split_reduction`), into the statistics of the whole
+    region: weighted mean, pooled population standard deviation, minimum
+    and maximum of the parts, summed count and summed weights.
+    """
+    bands = list(parts[0]["weights"])
+    merged = {key: value for key, value in parts[0].items() if key != "weights"}
+    weights = {}
+
+    for band in bands:
+        w, mean, m2 = 0.0, np.nan, 0.0
+        count, maxs, mins = 0, [], []
+
+        for part in parts:
+            weight = part["weights"].get(band) or 0
+            if weight > 0:
+                std = part[f"{band}_stdDev"]
+                w, mean, m2 = _combine(
+                    w, mean, m2, weight, part[f"{band}_mean"], std**2 * weight
+                )
+
+            if part.get(f"{band}_count"):
+                count += part[f"{band}_count"]
+                maxs.append(part[f"{band}_max"])
+                mins.append(part[f"{band}_min"])
+
+        empty = w == 0
+        merged[f"{band}_mean"] = None if empty else float(mean)
+        merged[f"{band}_stdDev"] = None if empty else float(np.sqrt(m2 / w))
+        merged[f"{band}_max"] = max(maxs) if maxs else None
+        merged[f"{band}_min"] = min(mins) if mins else None
+        merged[f"{band}_count"] = count
+        weights[band] = float(w)
+
+    merged["weights"] = weights
+
+    return merged
+
+
+def _too_large(error):
+    """True if a reduction failed because its region is too large."""
+    cause = error.cause if isinstance(error, FetchError) else error
+    message = str(cause).lower()
+    return any(text in message for text in SPLIT_MESSAGES)
+
+
+def _quadrants(geom, coordinates):
+    """
+    The four parts of geom in the quadrants of its bounds, coordinates is the
+    value of `geom.bounds(1).coordinates()`.
+    """
+    ring = np.asarray(coordinates[0], dtype=float)
+    (x0, y0), (x1, y1) = ring.min(axis=0), ring.max(axis=0)
+    xm, ym = (x0 + x1) / 2, (y0 + y1) / 2
+
+    rectangles = [
+        [x0, y0, xm, ym],
+        [xm, y0, x1, ym],
+        [x0, ym, xm, y1],
+        [xm, ym, x1, y1],
+    ]
+    return [geom.intersection(ee.Geometry.Rectangle(rect), 1) for rect in rectangles]
+
+
+def _part_stats(Image, geom, scale, reducer, tileScale, weights):
+    """
+    Statistics of Image in geom with its date, and with the sums of weights
+    of the bands in `weights` if weights is True, see `_split_reduction`.
+    """
+    stats = Image.reduceRegion(
+        reducer=reducer, geometry=geom, scale=scale, tileScale=tileScale
+    )
+    stats = stats.set("system:time_start", Image.get("system:time_start"))
+    if weights:
+        sums = Image.mask().reduceRegion(
+            reducer=ee.Reducer.sum(), geometry=geom, scale=scale, tileScale=tileScale
+        )
+        stats = stats.set("weights", sums)
+
+    return stats
+
+
+def _split_reduction(Image, geom, scale, reducer, tileScale, depth, weights=False):
+    """
+    Reduce an image in geom with the default reducer. If the region is too
+    large, reduce its quadrants in parallel, splitting them again up to
+    depth times, and merge their statistics.
+
+    Earth Engine weights the mean and standard deviation by the fraction of
+    each pixel in the region, and the quadrant borders cut pixels, so the
+    parts are reduced with their sums of weights per band (`weights`) and
+    merged by them instead of by the count.
+    """
+    stats = _part_stats(Image, geom, scale, reducer, tileScale, weights)
+
+    try:
+        return get_info(stats)
+    except FetchError as error:
+        if depth <= 0 or not _too_large(error):
+            raise
+
+    def reduce_part(part):
+        return _split_reduction(
+            Image, part, scale, reducer, tileScale, depth - 1, weights=True
+        )
+
+    parts = _quadrants(geom, get_info(geom.bounds(1).coordinates()))
+    with span(split=depth):
+        parts = get_executor().map(reduce_part, parts)
+
+    return _merge_stats(parts)
+
+
+def _is_zone_set(geom):
+    """True if geom is a FeatureCollection or GeoDataFrame of zones."""
+    if isinstance(geom, ee.FeatureCollection):
+        return True
+    return hasattr(geom, "__geo_interface__") and hasattr(geom, "geometry")
+
+
+def _zone_pages(geom, zone_id, page_size, size=None):
+    """
+    Split a FeatureCollection or GeoDataFrame of zones in pages. Each zone is
+    a feature with only the `zone` property. Returns None if geom is not a
+    set of zones. size is the number of features of a FeatureCollection, it
+    is requested if None.
+    """
+    if isinstance(geom, ee.FeatureCollection):
+
+        def zone(feature):
+            key = feature.id() if zone_id is None else feature.get(zone_id)
+            return ee.Feature(feature.geometry(), {"zone": key})
+
+        zones = geom.map(zone)
+        N = get_info(zones.size()) if size is None else size
+
+        return [
+            ee.FeatureCollection(zones.toList(page_size, offset))
+            for offset in range(0, N, page_size)
+        ]
+
+    if _is_zone_set(geom):
+        if geom.crs is not None:
+            geom = geom.to_crs(4326)
+
+        keys = geom.index if zone_id is None else geom[zone_id]
+        features = [
+            ee.Feature(
+                ee.Geometry(shape.__geo_interface__),
+                {"zone": key.item() if hasattr(key, "item") else key},
+            )
+            for key, shape in zip(keys, geom.geometry)
+        ]
+
+        return [
+            ee.FeatureCollection(features[offset : offset + page_size])
+            for offset in range(0, len(features), page_size)
+        ]
+
+    return None
+
+
+def _zones_reducer(Image, reducer):
+    """
+    Reducer for `reduceRegions` of Image with the output names of
+    `reduceRegion`: with one band Earth Engine doesn't prefix the outputs
+    with the band name, so they are renamed to `{band}_{output}`, or to the
+    band name with one output.
+    """
+    bands = Image.bandNames()
+    outputs = reducer.getOutputs()
+
+    prefixed = ee.Algorithms.If(
+        outputs.size().eq(1),
+        bands,
+        outputs.map(lambda output: ee.String(bands.get(0)).cat("_").cat(output)),
+    )
+
+    return ee.Reducer(
+        ee.Algorithms.If(
+            bands.size().eq(1), reducer.setOutputs(ee.List(prefixed)), reducer
+        )
+    )
+
+
+def _image_zones(Image, reducer, scale, tileScale):
+    """Function that reduces an image in a page of zones."""
+
+    def reduce_page(page):
+        stats = Image.reduceRegions(
+            collection=page,
+            reducer=_zones_reducer(Image, reducer),
+            scale=scale,
+            tileScale=tileScale,
+        )
+        return stats.map(
+            lambda zone: zone.set("system:time_start", Image.get("system:time_start"))
+        )
+
+    return reduce_page
+
+
+def _image_pages(ImageCollection, zone_pages, page_size, size):
+    """
+    Pair each page of zones with pages of the images of a collection, so a
+    request has at most MAX_FEATURES features. size is the number of images.
+    Returns a list of (images, zones) pages.
+    """
+    count = max(1, MAX_FEATURES // page_size)
+
+    if size <= count:
+        image_pages = [ImageCollection] if size > 0 else []
+    else:
+        image_pages = [
+            ee.ImageCollection(ImageCollection.toList(count, offset))
+            for offset in range(0, size, count)
+        ]
+
+    return [(images, zones) for zones in zone_pages for images in image_pages]
+
+
+def _collection_zones(reducer, scale, tileScale, image_id=False):
+    """
+    Function that reduces the images of a page (images, zones) in its zones,
+    see `_image_pages`, and `_region_reduction` for image_id.
+    """
+
+    def reduce_page(page):
+        images, zones = page
+
+        def reduce_zones(Image):
+            stats = Image.reduceRegions(
+                collection=zones,
+                reducer=_zones_reducer(Image, reducer),
+                scale=scale,
+                tileScale=tileScale,
+            )
+
+            def set_image(zone):
+                zone = zone.set("system:time_start", Image.get("system:time_start"))
+                if image_id:
+                    zone = zone.set("image_id", Image.get("system:id"))
+                return zone
+
+            return stats.map(set_image)
+
+        return ee.FeatureCollection(images.map(reduce_zones)).flatten()
+
+    return reduce_page
+
+
+def _properties(info):
+    """DataFrame with the properties of the features of a FeatureCollection."""
+    return pd.DataFrame([feature["properties"] for feature in info["features"]])
+
+
+def _add_date(data):
+    """Add the date column from system:time_start."""
+    data["date"] = pd.DatetimeIndex(
+        pd.to_datetime(data["system:time_start"], unit="ms").dt.date
+    )
+    return data
+
+
+def _zones_frame(frames):
+    """Long-format DataFrame indexed by (zone, date) of the pages of zones."""
+    if len(frames) == 0:
+        index = pd.MultiIndex.from_arrays(
+            [[], pd.DatetimeIndex([])], names=["zone", "date"]
+        )
+        return pd.DataFrame(index=index)
+
+    data = _add_date(pd.concat(frames, ignore_index=True))
+    return data.set_index(["zone", "date"]).sort_index()
+
+
+def _zones_dataframe(name, pages, reduce_page):
+    """
+    Download the reduction of all the pages of zones in parallel and build a
+    long-format DataFrame indexed by (zone, date).
+    """
+
+    def fetch(item):
+        number, page = item
+        fc = reduce_page(page)
+
+        def compute():
+            return _properties(get_info(fc))
+
+        with span(page=number):
+            return cached(name, fc, {}, compute)
+
+    return _zones_frame(get_executor().map(fetch, enumerate(pages)))
+
+
+@traced
+def zonal_statistics_image(
+    Image,
+    geom,
+    scale,
+    bands="all",
+    reducer="all",
+    tileScale=16,
+    zone_id=None,
+    page_size=100,
+    max_split_depth=0,
+):
     """
     Function to calculate a statistic in the specified region for one image.
 
@@ -10,8 +397,10 @@ def zonal_statistics_image(Image, geom, scale, bands="all", reducer="all", tileS
     Image : ee.Image
         Image of interest.
 
-    geom : ee.Geometry
-        Region of interest to reduce the image.
+    geom : ee.Geometry, ee.FeatureCollection or geopandas.GeoDataFrame
+        Region of interest to reduce the image. With a set of zones, the
+        image is reduced in all the zones with one `reduceRegions` per page
+        of zones.
 
     scale : float
         Pixel size for the sample to perform the zonal statistics.
@@ -25,45 +414,150 @@ def zonal_statistics_image(Image, geom, scale, bands="all", reducer="all", tileS
     tileScale : int
         Scale of the mosaic to allow EarthEngine to split the task to more cores.
 
+    zone_id : str, optional
+        Property (or column) with the identifier of each zone. By default the
+        feature id, or the index of the GeoDataFrame.
+
+    page_size : int, optional
+        Number of zones reduced per request (by default 100).
+
+    max_split_depth : int, optional
+        If the reduction of a single region fails because it is too large
+        (memory or too many pixels errors), split the region in quadrants
+        and reduce them in parallel, up to this number of times. The
+        statistics of the parts are merged into the ones of the whole region.
+        Only with the default reducer and one region, not a set of zones (by
+        default 0, no splitting).
+
     Return
     ------
     data : pandas.DataFrame
-        DataFrame with all the stats for all spcified bands.
+        DataFrame with all the stats for all spcified bands. With a set of
+        zones, the DataFrame is in long format indexed by (zone, date).
     """
     if bands != "all":
         Image = Image.select(bands)
 
+    if max_split_depth and not (isinstance(reducer, str) and reducer == "all"):
+        raise ValueError("max_split_depth needs the default reducer.")
+    if max_split_depth and _is_zone_set(geom):
+        raise ValueError("max_split_depth needs one region, not a set of zones.")
+
     if reducer == "all":
-        reducer = ee.Reducer.mean().combine(
-            ee.Reducer.stdDev().combine(
-                ee.Reducer.max().combine(
-                    ee.Reducer.min().combine(ee.Reducer.count(), sharedInputs=True),
-                    sharedInputs=True,
-                ),
-                sharedInputs=True,
-            ),
-            sharedInputs=True,
-        )
+        reducer = _default_reducer()
+
+    pages = _zone_pages(geom, zone_id, page_size)
+    if pages is not None:
+        reduce_page = _image_zones(Image, reducer, scale, tileScale)
+        return _zones_dataframe("zonal_statistics_image", pages, reduce_page)
 
     stats = Image.reduceRegion(
         reducer=reducer, geometry=geom, scale=scale, tileScale=tileScale
     )
     stats = stats.set("system:time_start", Image.get("system:time_start"))
 
-    data = pd.DataFrame(stats.getInfo(), index=[0])
-    data["date"] = pd.DatetimeIndex(
-        pd.to_datetime(data["system:time_start"], unit="ms").dt.date
-    )
+    def compute():
+        info = _split_reduction(Image, geom, scale, reducer, tileScale, max_split_depth)
+        info.pop("weights", None)
+        return _add_date(pd.DataFrame(info, index=[0]))
+
+    data = cached("zonal_statistics_image", stats, {}, compute)
 
     return data
 
 
+@traced
 def zonal_statistics_collection(
-    ImageCollection, geom, scale, bands="all", reducer="all", tileScale=16
+    ImageCollection,
+    geom,
+    scale,
+    bands="all",
+    reducer="all",
+    tileScale=16,
+    zone_id=None,
+    page_size=100,
 ):
     """
     Function to calculate a statistic in the specified region for all Image in a Image Collection.
 
+    Parameters
+    ----------
+    ImageCollection : ee.ImageCollection
+        Image Collection with the image to analyze.
+
+    geom : ee.Geometry, ee.FeatureCollection or geopandas.GeoDataFrame
+        Region of interest to reduce the images. With a set of zones, each
+        image is reduced in all the zones with one `reduceRegions`, one
+        request per page of zones.
+
+    scale : float
+        Pixel size for the sample to perform the zonal statistics.
+
+    bands : iterable
+        List, tuple with the bands of interest or, if you only want one band, the name of the band. By default the process takes into consideration all bands.
+
+    reducer : ee.Reducer
+        Reducer to apply to all image. By default, Images are reduced to its, mean, standard deviation, maximum, minimum, and count.
+
+    tileScale : int
+        Scale of the mosaic to allow EarthEngine to split the task to more cores.
+
+    zone_id : str, optional
+        Property (or column) with the identifier of each zone. By default the
+        feature id, or the index of the GeoDataFrame.
+
+    page_size : int, optional
+        Number of zones reduced per request (by default 100). The images are
+        split in pages too, so a request has at most `MAX_FEATURES` (5000)
+        features.
+
+    Return
+    ------
+    data : pandas.DataFrame
+        DataFrame with all the stats for all spcified bands. With a set of
+        zones, the DataFrame is in long format indexed by (zone, date).
+    """
+    if bands != "all":
+        ImageCollection = ImageCollection.map(lambda image: image.select(bands))
+
+    if reducer == "all":
+        reducer = _default_reducer()
+
+    pages = _zone_pages(geom, zone_id, page_size)
+    if pages is not None:
+        size = get_info(ImageCollection.size()) if pages else 0
+        pages = _image_pages(ImageCollection, pages, page_size, size)
+        reduce_page = _collection_zones(reducer, scale, tileScale)
+        return _zones_dataframe("zonal_statistics_collection", pages, reduce_page)
+
+    reduce_image = _region_reduction(geom, scale, reducer, tileScale)
+
+    fc = ee.FeatureCollection(ImageCollection.map(reduce_image))
+
+    def compute():
+        return _add_date(_properties(get_info(fc)))
+
+    data = cached("zonal_statistics_collection", fc, {}, compute)
+
+    return data
+
+
+@traced
+def iter_zonal_statistics_collection(
+    ImageCollection,
+    geom,
+    scale,
+    bands="all",
+    reducer="all",
+    tileScale=16,
+    page_size=500,
+    start=None,
+):
+    """
+    Iterate over the zonal statistics of an Image Collection by pages, sorted
+    by date. Only the images of each page are reduced and downloaded, so the
+    collection can be larger than the Earth Engine limits.
+
     Parameters
     ----------
     ImageCollection : ee.ImageCollection
@@ -84,43 +578,351 @@ def zonal_statistics_collection(
     tileScale : int
         Scale of the mosaic to allow EarthEngine to split the task to more cores.
 
-    Return
+    page_size : int, optional
+        Number of images reduced per request (by default 500).
+
+    start : str or datetime, optional
+        Only the images acquired at or after this date are reduced. Use it to
+        resume an interrupted iteration.
+
+    Yields
     ------
     data : pandas.DataFrame
-        DataFrame with all the stats for all spcified bands.
+        DataFrame with the stats of the images of one page, with float
+        statistics, integer `system:time_start` and datetime `date` columns.
     """
     if bands != "all":
         ImageCollection = ImageCollection.map(lambda image: image.select(bands))
 
     if reducer == "all":
-        reducer = ee.Reducer.mean().combine(
-            ee.Reducer.stdDev().combine(
-                ee.Reducer.max().combine(
-                    ee.Reducer.min().combine(ee.Reducer.count(), sharedInputs=True),
-                    sharedInputs=True,
-                ),
-                sharedInputs=True,
-            ),
-            sharedInputs=True,
+        reducer = _default_reducer()
+
+    if start is not None:
+        start = pd.Timestamp(start).value // 10**6
+        ImageCollection = ImageCollection.filter(
+            ee.Filter.gte("system:time_start", start)
         )
 
-    def reduce_image(Image):
-        stats = Image.reduceRegion(
-            reducer=reducer, geometry=geom, scale=scale, tileScale=tileScale
+    ImageCollection = ImageCollection.sort("system:time_start")
+    reduce_image = _region_reduction(geom, scale, reducer, tileScale)
+
+    N = get_info(ImageCollection.size())
+
+    for offset in range(0, N, page_size):
+        page = ee.ImageCollection(ImageCollection.toList(page_size, offset))
+        fc = ee.FeatureCollection(page.map(reduce_image))
+
+        def compute():
+            data = _properties(get_info(fc))
+
+            stats = data.columns.drop("system:time_start")
+            data[stats] = data[stats].apply(pd.to_numeric, errors="coerce")
+            data["system:time_start"] = data["system:time_start"].astype("int64")
+            return _add_date(data)
+
+        yield cached("iter_zonal_statistics_collection", fc, {}, compute)
+
+
+class ZonalAccumulator:
+    """
+    Mergeable state of the mean, standard deviation, maximum, minimum and
+    count of the bands of an image by zone, the statistics of the default
+    reducer of `zonal_statistics_image`.
+
+    Each chunk of pixels is reduced with bincount over the zone labels and
+    merged into the state with the parallel update of Chan et al., so the
+    states of chunks or processes merge in any order with the same result
+    as one pass over all the pixels.
+
+    Parameters
+    ----------
+    bands : int
+        Number of bands of the image.
+
+    labels : int, optional
+        Initial number of zone labels, it grows with the labels seen.
+
+    Attributes
+    ----------
+    count : np.ndarray
+        Int64 array (band, label) with the number of valid pixels.
+
+    mean, m2, max, min : np.ndarray
+        Float64 arrays (band, label) with the mean, the sum of squared
+        deviations from the mean, the maximum and the minimum of the valid
+        pixels. Labels without valid pixels have mean NaN, maximum -inf and
+        minimum inf.
+    """
+
+    _FIELDS = ("count", "mean", "m2", "max", "min")
+
+    def __init__(self, bands, labels=0):
+        shape = (bands, labels)
+
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.mean = np.full(shape, np.nan)
+        self.m2 = np.zeros(shape)
+        self.max = np.full(shape, -np.inf)
+        self.min = np.full(shape, np.inf)
+
+    @property
+    def bands(self):
+        return self.count.shape[0]
+
+    @property
+    def labels(self):
+        return self.count.shape[1]
+
+    def _fields(self, labels):
+        """Fields of the state padded to labels."""
+        empty = ZonalAccumulator(self.bands, max(labels - self.labels, 0))
+        return [
+            np.concatenate([getattr(self, name), getattr(empty, name)], axis=1)
+            for name in self._FIELDS
+        ]
+
+    def update(self, block, labels=None):
+        """
+        Fold a chunk of pixels into the state.
+
+        Parameters
+        ----------
+        block : np.ndarray
+            Array (band, y, x), or (y, x) with one band, with the pixels.
+            Missing values must be NaN.
+
+        labels : np.ndarray, optional
+            Integer array (y, x) with the zone label of each pixel, 0 (or
+            negative) outside the zones. A boolean array is zone 1 where
+            True. By default all the pixels are in zone 1.
+
+        Returns
+        -------
+        state : ZonalAccumulator
+            The updated state.
+        """
+        block = np.asarray(block, dtype=np.float64)
+        if block.ndim == 2:
+            block = block[None]
+
+        if labels is None:
+            labels = np.ones(block.shape[1:], dtype=np.int64)
+        labels = np.asarray(labels).astype(np.int64, copy=False).ravel()
+
+        inside = labels > 0
+        size = max(self.labels, int(labels.max(initial=0)) + 1)
+        chunk = ZonalAccumulator(self.bands, size)
+
+        for b, values in enumerate(block.reshape(self.bands, -1)):
+            valid = inside & np.isfinite(values)
+            zone, values = labels[valid], values[valid]
+
+            count = np.bincount(zone, minlength=size)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mean = np.bincount(zone, weights=values, minlength=size) / count
+
+            chunk.count[b] = count
+            chunk.mean[b] = mean
+            chunk.m2[b] = np.bincount(
+                zone, weights=(values - mean[zone]) ** 2, minlength=size
+            )
+            np.maximum.at(chunk.max[b], zone, values)
+            np.minimum.at(chunk.min[b], zone, values)
+
+        return self.merge(chunk)
+
+    def merge(self, other):
+        """
+        Merge the state of other chunks into this one.
+
+        Parameters
+        ----------
+        other : ZonalAccumulator
+            State with the same number of bands.
+
+        Returns
+        -------
+        state : ZonalAccumulator
+            The merged state.
+        """
+        if other.bands != self.bands:
+            raise ValueError(
+                f"Can't merge states of {self.bands} and {other.bands} bands."
+            )
+
+        size = max(self.labels, other.labels)
+        count, mean, m2, maximum, minimum = self._fields(size)
+        o_count, o_mean, o_m2, o_maximum, o_minimum = other._fields(size)
+
+        self.count, self.mean, self.m2 = _combine(
+            count, mean, m2, o_count, o_mean, o_m2
         )
+        self.max = np.maximum(maximum, o_maximum)
+        self.min = np.minimum(minimum, o_minimum)
 
-        stats = ee.Feature(geom, stats)
-        stats = stats.set("system:time_start", Image.get("system:time_start"))
+        return self
 
-        return stats
+    def statistics(self, names=None):
+        """
+        Statistics of the state with the names of `zonal_statistics_image`.
 
-    fc = ee.FeatureCollection(ImageCollection.map(reduce_image))
+        Parameters
+        ----------
+        names : list, optional
+            Names of the bands (by default b1, b2, ...).
 
-    entries = [feature["properties"] for feature in fc.getInfo()["features"]]
+        Returns
+        -------
+        stats : dict
+            Arrays (label,) with the statistics by `{band}_{statistic}`, NaN
+            for labels without valid pixels.
+        """
+        names = names or [f"b{b + 1}" for b in range(self.bands)]
+        empty = self.count == 0
 
-    data = pd.DataFrame(entries)
-    data["date"] = pd.DatetimeIndex(
-        pd.to_datetime(data["system:time_start"], unit="ms").dt.date
+        with np.errstate(divide="ignore", invalid="ignore"):
+            std = np.sqrt(self.m2 / self.count)
+
+        values = {
+            "mean": self.mean,
+            "stdDev": std,
+            "max": np.where(empty, np.nan, self.max),
+            "min": np.where(empty, np.nan, self.min),
+            "count": self.count,
+        }
+
+        return {
+            f"{name}_{stat}": values[stat][b]
+            for b, name in enumerate(names)
+            for stat in STATS
+        }
+
+
+def _tile_accumulators(item, bands):
+    """States of the pixels of a tile (block, labels), one per scene."""
+    block, labels = item
+    return [ZonalAccumulator(bands).update(scene, labels) for scene in block]
+
+
+def _merge_accumulators(left, right):
+    """Merge the states of two tiles scene by scene."""
+    return [state.merge(other) for state, other in zip(left, right)]
+
+
+def zonal_statistics_local(
+    image,
+    labels=None,
+    bands=None,
+    date=None,
+    zones=None,
+    tile_size=1024,
+    processes=1,
+):
+    """
+    Local version of `zonal_statistics_image` with its default reducer, for
+    images stored as arrays, and of `zonal_statistics_collection` for the
+    scenes of a RasterStack.
+
+    Parameters
+    ----------
+    image : np.ndarray, xarray.DataArray or statgis.raster_stack.RasterStack
+        Array (band, y, x), or (y, x) with one band. Missing values must be
+        NaN. It is read tile by tile, so it can be a memory mapped array
+        larger than the memory. A RasterStack is read window by window and
+        all its scenes are reduced, with the dates of the stack.
+
+    labels : np.ndarray, optional
+        Array (y, x) with the zones rasterized, for example with
+        `rasterio.features.rasterize`. Integer labels, 0 outside the zones,
+        give one row per zone; a boolean mask gives the statistics of the
+        region where it is True. By default the whole image.
+
+    bands : list, optional
+        Names of the bands (by default the `band` coordinate of a DataArray,
+        or b1, b2, ...).
+
+    date : str or datetime, optional
+        Acquisition date of the image, stored in `system:time_start` and
+        `date`. Not used with a RasterStack.
+
+    zones : list, optional
+        Identifiers of the labels 1, 2, ... used in the `zone` index. By
+        default the labels. All the zones have a row, otherwise only the
+        labels with valid pixels.
+
+    tile_size : int, optional
+        Size in pixels of the tiles (by default 1024).
+
+    processes : int, optional
+        Number of processes that reduce the tiles (by default 1, None for
+        all the cores).
+
+    Returns
+    -------
+    data : pandas.DataFrame
+        DataFrame with the same layout of `zonal_statistics_image`: one row
+        with the statistics of the bands, or with integer labels a long
+        format DataFrame indexed by (zone, date). With a RasterStack, one
+        row per scene, as `zonal_statistics_collection`.
+    """
+    if bands is None and hasattr(image, "coords") and "band" in image.coords:
+        bands = [str(band) for band in image["band"].values]
+
+    if labels is None:
+        labels = np.ones(image.shape[-2:], dtype=bool)
+
+    mask = np.asarray(labels).dtype == bool
+
+    if isinstance(image, RasterStack):
+        count = image.count
+        dates = [None] * image.shape[0] if image.dates is None else image.dates
+
+        def tiles():
+            for window, block in image.iter_blocks(tile_size):
+                rows, cols = window.toslices()
+                yield rows, cols, (block, np.asarray(labels[rows, cols]))
+
+    else:
+        count = 1 if image.ndim == 2 else image.shape[0]
+        dates = [date]
+
+        def tiles():
+            for (rows, cols, block), (_, _, label) in zip(
+                array_tiles(image, tile_size), array_tiles(labels, tile_size)
+            ):
+                yield rows, cols, (block[None], label)
+
+    states = reduce_tiles(
+        _tile_accumulators, tiles(), _merge_accumulators, processes, args=(count,)
     )
 
-    return data
+    labelled = max(state.labels for state in states)
+    if zones is not None and labelled > len(zones) + 1:
+        raise ValueError(f"labels has zones up to {labelled - 1}, not in zones.")
+
+    size = 2 if mask else (0 if zones is None else len(zones) + 1)
+    frames = []
+
+    for state, day in zip(states, dates):
+        state.merge(ZonalAccumulator(count, max(size, labelled)))
+
+        stats = pd.DataFrame(state.statistics(bands))
+        stats["system:time_start"] = (
+            None if day is None else pd.Timestamp(day).value // 10**6
+        )
+
+        if mask:
+            frames.append(stats.iloc[[1]])
+        elif zones is None:
+            stats = stats[state.count.sum(axis=0) > 0].copy()
+            stats.insert(0, "zone", stats.index)
+            frames.append(stats)
+        else:
+            stats = stats.iloc[1:].copy()
+            stats.insert(0, "zone", list(zones))
+            frames.append(stats)
+
+    if mask:
+        return _add_date(pd.concat(frames, ignore_index=True))
+
+    return _zones_frame(frames)
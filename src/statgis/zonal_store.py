@@ -0,0 +1,249 @@
+"""
+Local store of zonal statistics, so that refreshing the statistics of a
+collection only reduces the images that were not reduced before.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+from statgis._lazy import lazy_import
+from statgis.cache import _temporary
+from statgis.executor import get_executor, get_info
+from statgis.tracing import traced
+from statgis.zonal_statistics import (
+    _add_date,
+    _collection_zones,
+    _default_reducer,
+    _image_pages,
+    _properties,
+    _region_reduction,
+    _zone_pages,
+    _zones_dataframe,
+)
+
+ee = lazy_import("ee")
+pd = lazy_import("pandas")
+
+_COLUMNS = ("zone", "image_id", "system:time_start", "date")
+
+
+def _geometry_hash(geom):
+    """SHA-256 of an Earth Engine geometry or a GeoDataFrame of zones."""
+    if isinstance(geom, ee.ComputedObject):
+        text = geom.serialize()
+    else:
+        text = json.dumps(geom.__geo_interface__, sort_keys=True, default=str)
+
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _numeric(data):
+    """Convert the statistics to numbers, as `iter_zonal_statistics_collection`."""
+    stats = [column for column in data.columns if column not in _COLUMNS]
+    data[stats] = data[stats].apply(pd.to_numeric, errors="coerce")
+    data["system:time_start"] = data["system:time_start"].astype("int64")
+    return data
+
+
+class ZonalStore:
+    """
+    Parquet store of the zonal statistics of image collections.
+
+    The statistics are stored by image id (`system:id`, the asset id of the
+    image) in one file per combination of geometry, reducer, scale and
+    bands, so a refresh only reduces the images whose ids are not in the
+    store.
+
+    Parameters
+    ----------
+    directory : str
+        Directory where the statistics are stored.
+
+    Notes
+    -----
+    The store assumes that an image id always has the same values. Use one
+    directory per processing of the images, for example when the bands are
+    computed by a function mapped over the collection. The images must keep
+    their `system:id`; copy it with `copyProperties` if a mapped function
+    builds new images. Processes can share a directory, the files are
+    replaced atomically.
+    """
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, geom, scale, bands="all", reducer="all", zone_id=None):
+        """
+        Key of the statistics of a geometry, reducer, scale and bands.
+
+        Returns
+        -------
+        key : str
+            SHA-256 hex digest, also the name of the Parquet file.
+        """
+        if reducer == "all":
+            reducer = _default_reducer()
+        if isinstance(bands, str):
+            bands = [bands]
+
+        params = {
+            "geometry": _geometry_hash(geom),
+            "reducer": reducer.serialize(),
+            "scale": scale,
+            "bands": list(bands),
+            "zone_id": zone_id,
+        }
+        params = json.dumps(params, sort_keys=True, default=repr)
+
+        return hashlib.sha256(params.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".parquet")
+
+    def read(self, key):
+        """Stored statistics of a key, None if there are none."""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        return pd.read_parquet(path)
+
+    def _append(self, key, data):
+        """
+        Add rows to the statistics of a key. The file is replaced atomically,
+        so other processes read either the old or the new rows.
+        """
+        with self._lock:
+            stored = self.read(key)
+            if stored is not None:
+                data = pd.concat([stored, data], ignore_index=True)
+                keys = [name for name in ("zone", "image_id") if name in data]
+                data = data.drop_duplicates(keys, keep="last", ignore_index=True)
+
+            path = self._path(key)
+            tmp = _temporary(path)
+            data.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+
+        return data
+
+    def clear(self):
+        """Delete all the stored statistics."""
+        with self._lock:
+            for name in os.listdir(self.directory):
+                if name.endswith(".parquet"):
+                    os.remove(os.path.join(self.directory, name))
+
+    @traced
+    def zonal_statistics_collection(
+        self,
+        ImageCollection,
+        geom,
+        scale,
+        bands="all",
+        reducer="all",
+        tileScale=16,
+        zone_id=None,
+        page_size=100,
+    ):
+        """
+        Version of `statgis.zonal_statistics.zonal_statistics_collection`
+        that only reduces the images that are not in the store.
+
+        The ids of the images are downloaded in one request, compared with
+        the stored ones, and only the missing images are reduced and added to
+        the store. See `zonal_statistics_collection` for the parameters.
+
+        Returns
+        -------
+        data : pandas.DataFrame
+            DataFrame with the stats of all the images of ImageCollection
+            and their `image_id`. With a set of zones, the DataFrame is in
+            long format indexed by (zone, date).
+        """
+        key = self.key(geom, scale, bands, reducer, zone_id)
+
+        if bands != "all":
+            ImageCollection = ImageCollection.map(lambda image: image.select(bands))
+
+        if reducer == "all":
+            reducer = _default_reducer()
+
+        ids = ImageCollection.reduceColumns(ee.Reducer.toList(), ["system:id"])
+        info = get_info(
+            ee.Dictionary({"ids": ids.get("list"), "size": ImageCollection.size()})
+        )
+        ids = [image_id for image_id in info["ids"] if image_id is not None]
+
+        if len(ids) < info["size"]:
+            raise ValueError(
+                f"{info['size'] - len(ids)} images of the collection have no "
+                "system:id, copy it with copyProperties."
+            )
+
+        stored = self.read(key)
+        known = set() if stored is None else set(stored["image_id"])
+        missing = [image_id for image_id in ids if image_id not in known]
+
+        if missing:
+            # Without stored statistics all the images are reduced, without
+            # sending their ids.
+            new = ImageCollection
+            if stored is not None:
+                new = new.filter(ee.Filter.inList("system:id", missing))
+
+            stored = self._append(
+                key,
+                self._reduce(
+                    new,
+                    len(missing),
+                    geom,
+                    scale,
+                    reducer,
+                    tileScale,
+                    zone_id,
+                    page_size,
+                ),
+            )
+
+        if stored is None:
+            return pd.DataFrame()
+
+        data = stored[stored["image_id"].isin(ids)]
+
+        if "zone" in data.columns:
+            return data.set_index(["zone", "date"]).sort_index()
+
+        return data.reset_index(drop=True)
+
+    def _reduce(
+        self, ImageCollection, size, geom, scale, reducer, tileScale, zone_id, page_size
+    ):
+        """
+        Statistics of the size images of a collection, without index. The
+        images are reduced in pages of at most `MAX_FEATURES` features, see
+        `_image_pages`.
+        """
+        pages = _zone_pages(geom, zone_id, page_size)
+        if pages is not None:
+            pages = _image_pages(ImageCollection, pages, page_size, size)
+            reduce_page = _collection_zones(reducer, scale, tileScale, image_id=True)
+            data = _zones_dataframe("zonal_store", pages, reduce_page)
+            return _numeric(data.reset_index())
+
+        reduce_image = _region_reduction(geom, scale, reducer, tileScale, image_id=True)
+
+        def fetch(page):
+            images, _ = page
+            fc = ee.FeatureCollection(images.map(reduce_image))
+            return _properties(get_info(fc))
+
+        # Pages of MAX_FEATURES images, paired with no zones.
+        pages = _image_pages(ImageCollection, [None], 1, size)
+        frames = get_executor().map(fetch, pages)
+
+        return _numeric(_add_date(pd.concat(frames, ignore_index=True)))
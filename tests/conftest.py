@@ -0,0 +1,93 @@
+import sys
+import time
+import tracemalloc
+
+import ee
+import pytest
+
+import fake_ee
+from statgis import cache
+from statgis._lazy import LazyModule
+from statgis.executor import RequestExecutor, set_executor
+
+_benchmarks = []
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "benchmark: offline benchmark backed by the fake ee client"
+    )
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    """
+    Replace ee in all the statgis modules by the fake client of fake_ee, with
+    a fast retrying executor and without cache.
+    """
+    fake_ee.reset()
+    fake_ee.clear_assets()
+
+    for name, module in list(sys.modules.items()):
+        client = getattr(module, "ee", None)
+        if name.startswith("statgis") and (
+            client is ee or isinstance(client, LazyModule) and client.__name__ == "ee"
+        ):
+            monkeypatch.setattr(module, "ee", fake_ee)
+
+    monkeypatch.setattr(cache, "_cache", None)
+    previous = set_executor(RequestExecutor(backoff=0.001, max_backoff=0.01))
+
+    yield fake_ee
+
+    set_executor(previous)
+
+
+@pytest.fixture
+def benchmark(fake):
+    """
+    Run a function and measure its round trips, payload bytes, wall time and
+    peak memory. The measurements are reported at the end of the session.
+    """
+
+    def run(name, func, *args, **kwargs):
+        fake.requests.clear()
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        stats = {
+            "requests": fake.round_trips(),
+            "sent": fake.bytes_sent(),
+            "received": fake.bytes_received(),
+            "seconds": seconds,
+            "peak": peak,
+        }
+        _benchmarks.append((name, stats))
+
+        return result, stats
+
+    return run
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _benchmarks:
+        return
+
+    terminalreporter.section("statgis benchmarks")
+    terminalreporter.write_line(
+        f"{'name':<40} {'requests':>8} {'sent':>10} {'received':>10} "
+        f"{'seconds':>8} {'peak KiB':>9}"
+    )
+    for name, stats in _benchmarks:
+        terminalreporter.write_line(
+            f"{name:<40} {stats['requests']:>8} {stats['sent']:>10} "
+            f"{stats['received']:>10} {stats['seconds']:>8.3f} "
+            f"{stats['peak'] / 1024:>9.0f}"
+        )
@@ -0,0 +1,1714 @@
+"""
+Offline stand-in for the Earth Engine client, used by the benchmark suite.
+
+Objects build a lazy expression graph like the real client, and `getInfo`
+evaluates it with NumPy over the assets registered with `add_image` and
+`add_collection`. Every `getInfo` is recorded as a round trip with the bytes
+of the serialized graph and of the response, and can be slowed down with a
+simulated latency or made to fail with `reset` and `fail_next`.
+
+Only the algorithms used by statgis are implemented. Geometries are
+rectangles in pixel coordinates of the registered arrays and `scale` is
+ignored: all the images of a test share the same pixel grid. A pixel is in a
+rectangle if its centre is, except for `reduceRegion`, that weights the mean,
+standard deviation and sum by the fraction of each pixel covered.
+"""
+
+import ast
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import types
+import warnings
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+
+class EEException(Exception):
+    """Error returned by the fake server."""
+
+
+Request = namedtuple("Request", "name request_bytes response_bytes nodes seconds error")
+
+requests = []
+
+_lock = threading.Lock()
+_assets = {}
+_state = {
+    "latency": 0.0,
+    "error_rate": 0.0,
+    "fail": [],
+    "random": random.Random(0),
+    "max_pixels": None,
+    "in_flight": 0,
+    "peak_in_flight": 0,
+}
+_variables = itertools.count()
+
+LONLAT_GRID = (1000, 1000)
+
+
+def reset(latency=0.0, error_rate=0.0, seed=0, max_pixels=None):
+    """
+    Clear the recorded requests and set the behaviour of the server.
+
+    Parameters
+    ----------
+    latency : float, optional
+        Seconds that each request takes.
+
+    error_rate : float, optional
+        Probability that a request fails with a retryable 503 error.
+
+    seed : int, optional
+        Seed of the random errors.
+
+    max_pixels : int, optional
+        Maximum number of pixels of the regions of `reduceRegion`, larger
+        regions fail with a memory error.
+    """
+    with _lock:
+        requests.clear()
+        _state.update(
+            latency=latency,
+            error_rate=error_rate,
+            fail=[],
+            random=random.Random(seed),
+            max_pixels=max_pixels,
+            peak_in_flight=_state["in_flight"],
+        )
+
+
+def fail_next(count=1, message="429 Too Many Requests"):
+    """Make the next count requests fail with message."""
+    with _lock:
+        _state["fail"].extend([message] * count)
+
+
+def clear_assets():
+    """Delete all the registered images and collections."""
+    _assets.clear()
+
+
+def round_trips():
+    """Number of requests made since the last reset."""
+    return len(requests)
+
+
+def peak_in_flight():
+    """Most requests in flight at the same time since the last reset."""
+    return _state["peak_in_flight"]
+
+
+def bytes_sent():
+    """Bytes of the serialized graphs sent since the last reset."""
+    return sum(request.request_bytes for request in requests)
+
+
+def bytes_received():
+    """Bytes of the responses received since the last reset."""
+    return sum(request.response_bytes for request in requests)
+
+
+# Server side values.
+
+
+class _ImageData:
+    __slots__ = ("bands", "properties")
+
+    def __init__(self, bands, properties):
+        self.bands = bands
+        self.properties = properties
+
+
+class _FeatureData:
+    __slots__ = ("geometry", "properties")
+
+    def __init__(self, geometry, properties):
+        self.geometry = geometry
+        self.properties = properties
+
+
+class _CollectionData:
+    __slots__ = ("elements",)
+
+    def __init__(self, elements):
+        self.elements = list(elements)
+
+
+class _DateData:
+    __slots__ = ("millis",)
+
+    def __init__(self, millis):
+        self.millis = millis
+
+
+class _ReducerData:
+    """Outputs as (name, func(values, axis)) pairs, missing values are NaN."""
+
+    def __init__(self, outputs, inputs=1, repeat=None):
+        self.outputs = outputs
+        self.inputs = inputs
+        self.repeat = repeat
+
+
+class _FilterData:
+    """Predicate of one element, or of (primary, secondary) pairs in joins."""
+
+    def __init__(self, predicate, pairs=False):
+        self.predicate = predicate
+        self.pairs = pairs
+
+
+def _millis(value):
+    if value is None or isinstance(value, (int, np.integer)):
+        return value
+    return pd.Timestamp(value).value // 10**6
+
+
+def add_image(asset_id, bands, time_start=None, **properties):
+    """
+    Register an image.
+
+    Parameters
+    ----------
+    asset_id : str
+        Id of the image, load it with `Image(asset_id)`.
+
+    bands : dict
+        2D arrays of the bands by name. NaN values are masked.
+
+    time_start : int, str or datetime, optional
+        Acquisition time, stored as system:time_start in milliseconds.
+
+    **properties
+        Other properties of the image.
+
+    Returns
+    -------
+    Image : Image
+        The registered image.
+    """
+    properties = {
+        "system:id": asset_id,
+        "system:index": asset_id.rsplit("/", 1)[-1],
+        "system:time_start": _millis(time_start),
+        **properties,
+    }
+    bands = {name: np.asarray(value, dtype=float) for name, value in bands.items()}
+
+    _assets[asset_id] = _ImageData(bands, properties)
+
+    return Image(asset_id)
+
+
+def add_collection(asset_id, images):
+    """
+    Register an image collection made of registered images.
+
+    Parameters
+    ----------
+    asset_id : str
+        Id of the collection, load it with `ImageCollection(asset_id)`.
+
+    images : list
+        Ids of the images, or images returned by `add_image`.
+
+    Returns
+    -------
+    ImageCollection : ImageCollection
+        The registered collection.
+    """
+    ids = [
+        image if isinstance(image, str) else image._node.args["id"] for image in images
+    ]
+    _assets[asset_id] = _CollectionData([_assets[key] for key in ids])
+
+    return ImageCollection(asset_id)
+
+
+# Expression graph.
+
+
+class _Node:
+    __slots__ = ("func", "args", "free")
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+        self.free = _free(args)
+
+
+class _Variable:
+    __slots__ = ("name", "free")
+
+    def __init__(self, name):
+        self.name = name
+        self.free = frozenset([name])
+
+
+class _Lambda:
+    __slots__ = ("var", "body", "free")
+
+    def __init__(self, var, body):
+        self.var = var
+        self.body = body
+        self.free = body.free - {var}
+
+
+_GRAPH = (_Node, _Variable, _Lambda)
+
+
+def _free(value):
+    if isinstance(value, _GRAPH):
+        return value.free
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (list, tuple)):
+        return frozenset().union(*(_free(item) for item in value))
+    return frozenset()
+
+
+def _unwrap(value):
+    if isinstance(value, ComputedObject):
+        return value._node
+    if isinstance(value, dict):
+        return {key: _unwrap(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_unwrap(item) for item in value]
+    return value
+
+
+def _wrap(cls, node):
+    obj = object.__new__(cls)
+    obj._node = node
+    return obj
+
+
+def _lambda(func, element_type):
+    """Call func once with a placeholder, as the real client does in map."""
+    var = f"_MAPPING_VAR_{next(_variables)}"
+    body = func(_wrap(element_type, _Variable(var)))
+    return _Lambda(var, _unwrap(body))
+
+
+def _constant(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def encode(obj):
+    """Cloud API like serialization of the graph of an object."""
+    values = {}
+    ids = {}
+
+    def reference(node):
+        if id(node) not in ids:
+            key = ids[id(node)] = str(len(ids))
+            values[key] = body(node)
+        return ids[id(node)]
+
+    def value(item):
+        if isinstance(item, _GRAPH):
+            return {"valueReference": reference(item)}
+        if isinstance(item, dict):
+            return {
+                "dictionaryValue": {"values": {k: value(v) for k, v in item.items()}}
+            }
+        if isinstance(item, list):
+            return {"arrayValue": {"values": [value(v) for v in item]}}
+        return {"constantValue": _constant(item)}
+
+    def body(node):
+        if isinstance(node, _Variable):
+            return {"argumentReference": node.name}
+        if isinstance(node, _Lambda):
+            return {
+                "functionDefinitionValue": {
+                    "argumentNames": [node.var],
+                    "body": reference(node.body),
+                }
+            }
+        arguments = {key: value(item) for key, item in node.args.items()}
+        return {
+            "functionInvocationValue": {
+                "functionName": node.func,
+                "arguments": arguments,
+            }
+        }
+
+    return {"result": reference(_unwrap(obj)), "values": values}
+
+
+# Like ee.serializer, used by statgis.instrumentation.
+serializer = types.SimpleNamespace(encode=lambda obj, for_cloud_api=True: encode(obj))
+
+
+def _evaluate(node, env, memo):
+    if isinstance(node, _Variable):
+        return env[node.name]
+
+    if isinstance(node, _Lambda):
+        return lambda value: _evaluate(node.body, {**env, node.var: value}, memo)
+
+    if isinstance(node, _Node):
+        if not node.free and id(node) in memo:
+            return memo[id(node)]
+
+        if node.func == "If":
+            # Earth Engine only computes the branch that is taken.
+            condition = _evaluate(node.args["condition"], env, memo)
+            branch = "trueCase" if condition else "falseCase"
+            value = _evaluate(node.args[branch], env, memo)
+        else:
+            args = {key: _evaluate(item, env, memo) for key, item in node.args.items()}
+            value = _ALGORITHMS[node.func](**args)
+
+        if not node.free:
+            memo[id(node)] = value
+        return value
+
+    if isinstance(node, dict):
+        return {key: _evaluate(item, env, memo) for key, item in node.items()}
+
+    if isinstance(node, list):
+        return [_evaluate(item, env, memo) for item in node]
+
+    return node
+
+
+def _info(value):
+    """Convert a server value into the JSON returned by getInfo."""
+    if isinstance(value, _ImageData):
+        return {
+            "type": "Image",
+            "bands": [{"id": name} for name in value.bands],
+            "properties": _info(value.properties),
+        }
+    if isinstance(value, _FeatureData):
+        properties = dict(value.properties)
+        info = {"type": "Feature", "geometry": _info_geometry(value.geometry)}
+        if "system:index" in properties:
+            info["id"] = properties.pop("system:index")
+        info["properties"] = _info(properties)
+        return info
+    if isinstance(value, _CollectionData):
+        images = value.elements and all(
+            isinstance(element, _ImageData) for element in value.elements
+        )
+        return {
+            "type": "ImageCollection" if images else "FeatureCollection",
+            "features": [_info(element) for element in value.elements],
+        }
+    if isinstance(value, _DateData):
+        return {"type": "Date", "value": value.millis}
+    if isinstance(value, dict):
+        return {key: _info(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_info(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return _info(value.tolist())
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def _info_geometry(region):
+    if region is None:
+        return None
+    r0, r1, c0, c1 = region
+    ring = [[c0, r0], [c1, r0], [c1, r1], [c0, r1], [c0, r0]]
+    return {"type": "Polygon", "coordinates": [ring]}
+
+
+def _request(obj):
+    """Evaluate an object as one round trip to the server."""
+    graph = encode(obj)
+    request_bytes = len(json.dumps(graph, separators=(",", ":"), default=repr))
+    nodes = sum(
+        "functionInvocationValue" in value for value in graph["values"].values()
+    )
+
+    with _lock:
+        latency = _state["latency"]
+        error = _state["fail"].pop(0) if _state["fail"] else None
+        if error is None and _state["error_rate"] > 0:
+            if _state["random"].random() < _state["error_rate"]:
+                error = "503 Service Unavailable"
+        _state["in_flight"] += 1
+        _state["peak_in_flight"] = max(_state["peak_in_flight"], _state["in_flight"])
+
+    start = time.perf_counter()
+    response_bytes = 0
+
+    try:
+        time.sleep(latency)
+        if error is not None:
+            raise EEException(error)
+
+        info = _info(_evaluate(obj._node, {}, {}))
+        response_bytes = len(json.dumps(info, separators=(",", ":")))
+
+        return info
+    finally:
+        record = Request(
+            obj._node.func,
+            request_bytes,
+            response_bytes,
+            nodes,
+            time.perf_counter() - start,
+            error,
+        )
+        with _lock:
+            requests.append(record)
+            _state["in_flight"] -= 1
+
+
+# Algorithms.
+
+_ALGORITHMS = {}
+
+
+def _algorithm(name):
+    def register(func):
+        _ALGORITHMS[name] = func
+        return func
+
+    return register
+
+
+def _elements(value):
+    return value.elements if isinstance(value, _CollectionData) else list(value)
+
+
+def _window(array, region):
+    r0, r1, c0, c1 = (int(np.ceil(bound - 0.5)) for bound in region)
+    if array.ndim == 0:
+        return np.broadcast_to(array, (r1 - r0, c1 - c0))
+    return array[r0:r1, c0:c1]
+
+
+def _crop(array, shape):
+    """Crop an array of pixelLonLat to the shape of another image."""
+    if array.ndim == 2 and len(shape) == 2:
+        return array[: shape[0], : shape[1]]
+    return array
+
+
+def _quiet(func, *args, **kwargs):
+    with warnings.catch_warnings(), np.errstate(all="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return func(*args, **kwargs)
+
+
+def _scalar(value):
+    value = np.asarray(value).item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+@_algorithm("Image.load")
+def _image_load(id):
+    return _assets[id]
+
+
+@_algorithm("ImageCollection.load")
+def _collection_load(id):
+    return _assets[id]
+
+
+@_algorithm("Image.constant")
+def _image_constant(value):
+    if isinstance(value, (list, tuple)):
+        bands = {
+            f"constant_{i}": np.asarray(v, dtype=float) for i, v in enumerate(value)
+        }
+        return _ImageData(bands, {})
+    return _ImageData({"constant": np.asarray(value, dtype=float)}, {})
+
+
+@_algorithm("Image.cat")
+def _image_cat(images):
+    bands = {}
+    for image in images:
+        for name, array in image.bands.items():
+            if name in bands:
+                raise EEException(f"Duplicate band name: {name}.")
+            bands[name] = array
+
+    return _ImageData(bands, images[0].properties if images else {})
+
+
+@_algorithm("Image.select")
+def _image_select(input, bandSelectors, newNames=None):
+    if isinstance(bandSelectors, (str, int)):
+        bandSelectors = [bandSelectors]
+
+    names = list(input.bands)
+    selected = []
+    for selector in bandSelectors:
+        if isinstance(selector, int):
+            matches = [names[selector]]
+        else:
+            matches = [name for name in names if re.fullmatch(selector, name)]
+        if not matches:
+            raise EEException(f"Band pattern '{selector}' did not match any bands.")
+        selected += [name for name in matches if name not in selected]
+
+    new = newNames or selected
+    bands = {key: input.bands[name] for key, name in zip(new, selected)}
+
+    return _ImageData(bands, input.properties)
+
+
+@_algorithm("Image.addBands")
+def _image_add_bands(dstImg, srcImg, names=None, overwrite=False):
+    bands = dict(dstImg.bands)
+    for name, array in srcImg.bands.items():
+        if names is not None and not any(re.fullmatch(n, name) for n in names):
+            continue
+        if name in bands and not overwrite:
+            raise EEException(f"Duplicate band name: {name}.")
+        bands[name] = array
+
+    return _ImageData(bands, dstImg.properties)
+
+
+@_algorithm("Image.rename")
+def _image_rename(input, names):
+    if isinstance(names, str):
+        names = [names]
+    if len(names) != len(input.bands):
+        raise EEException("Number of names does not match the number of bands.")
+
+    return _ImageData(dict(zip(names, input.bands.values())), input.properties)
+
+
+def _binary(operation):
+    def apply(image1, image2):
+        if not isinstance(image2, _ImageData):
+            image2 = _image_constant(image2)
+        if not isinstance(image1, _ImageData):
+            image1 = _image_constant(image1)
+
+        left = list(image1.bands.items())
+        right = list(image2.bands.values())
+
+        if len(right) == 1:
+            right = right * len(left)
+        elif len(left) == 1:
+            left = [(name, left[0][1]) for name in image2.bands]
+        if len(left) != len(right):
+            raise EEException("Images must have the same number of bands.")
+
+        bands = {
+            name: _quiet(operation, a, b).astype(float)
+            for (name, a), b in zip(left, right)
+        }
+
+        return _ImageData(bands, {})
+
+    return apply
+
+
+def _divide(a, b):
+    return np.where(b == 0, 0.0, a / np.where(b == 0, 1, b))
+
+
+def _bitwise_and(a, b):
+    return np.bitwise_and(
+        np.asarray(a).astype(np.int64), np.asarray(b).astype(np.int64)
+    )
+
+
+for _name, _operation in {
+    "add": np.add,
+    "subtract": np.subtract,
+    "multiply": np.multiply,
+    "divide": _divide,
+    "gt": np.greater,
+    "lt": np.less,
+    "eq": np.equal,
+    "bitwiseAnd": _bitwise_and,
+}.items():
+    _ALGORITHMS[f"Image.{_name}"] = _binary(_operation)
+
+
+@_algorithm("Image.metadata")
+def _image_metadata(image, property):
+    value = image.properties.get(property)
+    return _ImageData({property: np.asarray(value, dtype=float)}, {})
+
+
+class _Logical(ast.NodeTransformer):
+    """
+    Evaluate comparisons and `and`/`or` (&& and ||) element-wise as numbers,
+    as in Earth Engine expressions.
+    """
+
+    def _call(self, name, args):
+        return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=args, keywords=[])
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        return self._call("_number", [node])
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        name = "_and" if isinstance(node.op, ast.And) else "_or"
+        result = node.values[0]
+        for value in node.values[1:]:
+            result = self._call(name, [result, value])
+        return result
+
+
+_EXPRESSION_FUNCTIONS = {
+    "_number": lambda value: np.asarray(value, dtype=float),
+    "_and": lambda a, b: np.logical_and(a, b).astype(float),
+    "_or": lambda a, b: np.logical_or(a, b).astype(float),
+}
+
+
+def _expression_value(value):
+    """Variable of an expression: one band image as array, several bands by name."""
+    if not isinstance(value, _ImageData):
+        return value
+    if len(value.bands) == 1:
+        return next(iter(value.bands.values()))
+    return types.SimpleNamespace(**value.bands)
+
+
+@_algorithm("Image.expression")
+def _image_expression(expression, map, image=None):
+    variables = {key: _expression_value(value) for key, value in map.items()}
+    variables.update(_EXPRESSION_FUNCTIONS)
+    if image is not None:
+        variables["b"] = lambda name: image.bands[name]
+
+    expression = expression.replace("&&", " and ").replace("||", " or ")
+    tree = ast.fix_missing_locations(
+        _Logical().visit(ast.parse(expression, mode="eval"))
+    )
+    code = compile(tree, "<expression>", "eval")
+    result = _quiet(eval, code, {"__builtins__": {}}, variables)
+
+    return _ImageData({"constant": np.asarray(result, dtype=float)}, {})
+
+
+@_algorithm("Image.toFloat")
+def _image_to_float(value):
+    bands = {name: array.astype(np.float32) for name, array in value.bands.items()}
+    return _ImageData(bands, value.properties)
+
+
+@_algorithm("Image.updateMask")
+def _image_update_mask(image, mask):
+    mask = next(iter(mask.bands.values()))
+    bands = {
+        name: np.where(np.nan_to_num(mask) != 0, _crop(array, mask.shape), np.nan)
+        for name, array in image.bands.items()
+    }
+    return _ImageData(bands, image.properties)
+
+
+@_algorithm("Image.unmask")
+def _image_unmask(input, value=0):
+    bands = {
+        name: np.where(np.isnan(array), value, array)
+        for name, array in input.bands.items()
+    }
+    return _ImageData(bands, input.properties)
+
+
+@_algorithm("Image.date")
+def _image_date(image):
+    return _DateData(image.properties.get("system:time_start"))
+
+
+@_algorithm("Date.get")
+def _date_get(date, unit):
+    return getattr(pd.Timestamp(date.millis, unit="ms"), unit)
+
+
+@_algorithm("Element.set")
+def _element_set(object, key, value):
+    properties = {**object.properties, key: value}
+    if isinstance(object, _ImageData):
+        return _ImageData(object.bands, properties)
+    return _FeatureData(object.geometry, properties)
+
+
+@_algorithm("Element.get")
+def _element_get(object, property):
+    return object.properties.get(property)
+
+
+@_algorithm("Dictionary.set")
+def _dictionary_set(dictionary, key, value):
+    return {**dictionary, key: value}
+
+
+@_algorithm("Dictionary.get")
+def _dictionary_get(dictionary, key):
+    if key not in dictionary:
+        raise EEException(f"Dictionary does not contain key: {key}.")
+    return dictionary[key]
+
+
+@_algorithm("Dictionary")
+def _dictionary(input):
+    return dict(input)
+
+
+@_algorithm("Dictionary.select")
+def _dictionary_select(dictionary, selectors):
+    return {key: dictionary[key] for key in selectors}
+
+
+@_algorithm("Dictionary.toImage")
+def _dictionary_to_image(dictionary):
+    if any(value is None for value in dictionary.values()):
+        raise EEException("Dictionary.toImage: Can't convert null values.")
+    return _ImageData(
+        {key: np.asarray(value, dtype=float) for key, value in dictionary.items()}, {}
+    )
+
+
+@_algorithm("Number")
+def _number(value):
+    return value
+
+
+@_algorithm("Number.min")
+def _number_min(left, right):
+    return min(left, right)
+
+
+@_algorithm("Number.gt")
+def _number_gt(left, right):
+    return int(left > right)
+
+
+@_algorithm("Number.eq")
+def _number_eq(left, right):
+    return int(left == right)
+
+
+@_algorithm("Image.mask")
+def _image_mask(image):
+    bands = {
+        name: np.isfinite(array).astype(float) for name, array in image.bands.items()
+    }
+    return _ImageData(bands, image.properties)
+
+
+@_algorithm("Image.connectedPixelCount")
+def _image_connected_pixel_count(image, maxSize=100, eightConnected=True):
+    from scipy import ndimage
+
+    structure = np.ones((3, 3)) if eightConnected else None
+    bands = {}
+    for name, array in image.bands.items():
+        count = np.full(array.shape, np.nan)
+        for value in np.unique(array[np.isfinite(array)]):
+            labels, _ = ndimage.label(array == value, structure=structure)
+            sizes = np.bincount(labels.ravel())
+            count[labels > 0] = np.minimum(sizes[labels[labels > 0]], maxSize)
+        bands[name] = count
+
+    return _ImageData(bands, image.properties)
+
+
+@_algorithm("Image.pixelArea")
+def _image_pixel_area():
+    """Area of the pixels of 30 m, as a constant."""
+    return _ImageData({"area": np.asarray(900.0)}, {})
+
+
+@_algorithm("Image.pixelLonLat")
+def _image_pixel_lon_lat():
+    """
+    Column and row of the pixels as longitude and latitude, in a grid of
+    LONLAT_GRID pixels cropped to the shape of the masks applied to it.
+    """
+    rows, cols = np.indices(LONLAT_GRID)
+    return _ImageData(
+        {"longitude": cols.astype(float), "latitude": rows.astype(float)}, {}
+    )
+
+
+@_algorithm("Feature")
+def _feature(geometry, metadata):
+    return _FeatureData(geometry, dict(metadata or {}))
+
+
+@_algorithm("Feature.geometry")
+def _feature_geometry(feature):
+    return feature.geometry
+
+
+def _coordinate(value):
+    """Pixel coordinate, an int on the pixel borders."""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+@_algorithm("GeometryConstructors.Rectangle")
+def _rectangle(coordinates):
+    x0, y0, x1, y1 = (_coordinate(value) for value in coordinates)
+    return (y0, y1, x0, x1)
+
+
+@_algorithm("Geometry")
+def _geometry(geoJson):
+    points = np.asarray(geoJson["coordinates"], dtype=float).reshape(-1, 2)
+    x0, y0 = points.min(axis=0)
+    x1, y1 = points.max(axis=0)
+    return (int(y0), int(y1), int(x0), int(x1))
+
+
+@_algorithm("Geometry.bounds")
+def _geometry_bounds(geometry):
+    return geometry
+
+
+@_algorithm("Geometry.coordinates")
+def _geometry_coordinates(geometry):
+    return _info_geometry(geometry)["coordinates"]
+
+
+@_algorithm("Geometry.intersection")
+def _geometry_intersection(left, right, maxError=None):
+    r0, c0 = max(left[0], right[0]), max(left[2], right[2])
+    r1, c1 = min(left[1], right[1]), min(left[3], right[3])
+    return (r0, max(r0, r1), c0, max(c0, c1))
+
+
+@_algorithm("Collection")
+def _collection(features):
+    return _CollectionData(_elements(features))
+
+
+@_algorithm("ImageCollection.fromImages")
+def _from_images(images):
+    return _CollectionData(images)
+
+
+@_algorithm("Collection.size")
+def _collection_size(collection):
+    return len(_elements(collection))
+
+
+@_algorithm("Collection.toList")
+def _collection_to_list(collection, count, offset=0):
+    return _elements(collection)[offset : offset + count]
+
+
+@_algorithm("Collection.first")
+def _collection_first(collection):
+    return _elements(collection)[0]
+
+
+@_algorithm("Collection.map")
+def _collection_map(collection, baseAlgorithm):
+    return _CollectionData(baseAlgorithm(element) for element in _elements(collection))
+
+
+@_algorithm("Collection.filter")
+def _collection_filter(collection, filter):
+    return _CollectionData(e for e in _elements(collection) if filter.predicate(e))
+
+
+@_algorithm("Collection.filterBounds")
+def _collection_filter_bounds(collection, geometry):
+    # All the registered images cover the pixel grid of the geometries.
+    return collection
+
+
+@_algorithm("Collection.limit")
+def _collection_limit(collection, limit=None, key=None, ascending=True):
+    elements = _elements(collection)
+    if key is not None:
+        elements = sorted(
+            elements, key=lambda e: e.properties.get(key), reverse=not ascending
+        )
+    return _CollectionData(elements[:limit])
+
+
+@_algorithm("Collection.flatten")
+def _collection_flatten(collection):
+    return _CollectionData(
+        element for inner in _elements(collection) for element in _elements(inner)
+    )
+
+
+@_algorithm("Collection.reduceColumns")
+def _collection_reduce_columns(collection, reducer, selectors):
+    columns = [
+        [element.properties.get(selector) for element in _elements(collection)]
+        for selector in selectors
+    ]
+
+    if reducer.repeat is not None:
+        return {
+            name: [func(column, 0) for column in columns]
+            for name, func in reducer.outputs
+        }
+
+    return {name: func(columns[0], 0) for name, func in reducer.outputs}
+
+
+@_algorithm("ImageCollection.reduce")
+def _collection_reduce(collection, reducer):
+    images = _elements(collection)
+    if not images:
+        return _ImageData({}, {})
+
+    names = list(images[0].bands)
+    shape = np.broadcast_shapes(
+        *[array.shape for image in images for array in image.bands.values()]
+    )
+    stacks = {
+        name: np.stack([np.broadcast_to(image.bands[name], shape) for image in images])
+        for name in names
+    }
+
+    if reducer.inputs == 2:
+        x, y = np.broadcast_arrays(stacks[names[0]], stacks[names[1]])
+        return _ImageData(_linear_fit(x, y), {})
+
+    bands = {}
+    for name in names:
+        for output, func in reducer.outputs:
+            bands[f"{name}_{output}"] = np.asarray(
+                _quiet(func, stacks[name], 0), dtype=float
+            )
+
+    return _ImageData(bands, {})
+
+
+def _linear_fit(x, y):
+    valid = np.isfinite(x) & np.isfinite(y)
+    x = np.where(valid, x, 0.0)
+    y = np.where(valid, y, 0.0)
+
+    n = valid.sum(axis=0)
+    sx, sy = x.sum(axis=0), y.sum(axis=0)
+    sxx, sxy = (x * x).sum(axis=0), (x * y).sum(axis=0)
+
+    with np.errstate(all="ignore"):
+        scale = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+        offset = (sy - scale * sx) / n
+
+    return {"scale": scale, "offset": offset}
+
+
+def _coverage(region):
+    """
+    Window of the pixels touched by a region, the fraction of each one that
+    is covered, and whether its centre is in the region.
+    """
+    r0, r1, c0, c1 = region
+    rows = np.arange(int(np.floor(r0)), max(int(np.floor(r0)), int(np.ceil(r1))))
+    cols = np.arange(int(np.floor(c0)), max(int(np.floor(c0)), int(np.ceil(c1))))
+
+    def covered(pixels, start, end):
+        return np.clip(np.minimum(pixels + 1, end) - np.maximum(pixels, start), 0, 1)
+
+    def centred(pixels, start, end):
+        return (pixels + 0.5 >= start) & (pixels + 0.5 < end)
+
+    window = (
+        int(np.floor(r0)),
+        int(np.floor(r0)) + len(rows),
+        int(np.floor(c0)),
+        int(np.floor(c0)) + len(cols),
+    )
+    weights = np.outer(covered(rows, r0, r1), covered(cols, c0, c1)).ravel()
+    centre = np.outer(centred(rows, r0, r1), centred(cols, c0, c1)).ravel()
+
+    return window, weights, centre
+
+
+def _weighted_mean(values, weights):
+    if weights.sum() == 0:
+        raise ValueError("Empty region.")
+    return np.average(values, weights=weights)
+
+
+def _weighted_std(values, weights):
+    mean = _weighted_mean(values, weights)
+    return np.sqrt(np.average((values - mean) ** 2, weights=weights))
+
+
+_WEIGHTED = {
+    np.nanmean: _weighted_mean,
+    np.nanstd: _weighted_std,
+    np.nansum: lambda values, weights: (values * weights).sum(),
+}
+
+
+def _region_values(image, region):
+    return {
+        name: np.asarray(_window(array, region), dtype=float).ravel()
+        for name, array in image.bands.items()
+    }
+
+
+def _reduce_values(reducer, values, weights=None, centre=None, prefix=True):
+    """
+    Reduce the values of each band. The outputs are named as in
+    `reduceRegion`, or only by the reducer outputs if prefix is False, as
+    `reduceRegions` does with one band.
+    """
+    stats = {}
+    for band, data in values.items():
+        valid = np.isfinite(data)
+        if weights is not None:
+            weighted = valid & (weights > 0)
+            valid = valid & centre
+
+        for output, func in reducer.outputs:
+            key = band if len(reducer.outputs) == 1 else f"{band}_{output}"
+            if not prefix:
+                key = output
+            try:
+                if weights is not None and func in _WEIGHTED:
+                    value = _WEIGHTED[func](data[weighted], weights[weighted])
+                else:
+                    value = _quiet(func, data[valid], 0)
+                stats[key] = _scalar(value)
+            except ValueError:
+                # Reductions without identity of an empty region are null.
+                stats[key] = None
+
+    return stats
+
+
+@_algorithm("Image.reduceRegion")
+def _image_reduce_region(image, reducer, geometry, scale=None, tileScale=1):
+    r0, r1, c0, c1 = geometry
+    if (
+        _state["max_pixels"] is not None
+        and (r1 - r0) * (c1 - c0) > _state["max_pixels"]
+    ):
+        raise EEException("User memory limit exceeded.")
+
+    window, weights, centre = _coverage(geometry)
+    values = _region_values(image, window)
+
+    return _reduce_values(reducer, values, weights, centre)
+
+
+@_algorithm("Image.reduceRegions")
+def _image_reduce_regions(image, collection, reducer, scale=None, tileScale=1):
+    return _CollectionData(
+        _FeatureData(
+            feature.geometry,
+            {
+                **feature.properties,
+                **_reduce_values(
+                    reducer,
+                    _region_values(image, feature.geometry),
+                    prefix=len(image.bands) > 1,
+                ),
+            },
+        )
+        for feature in _elements(collection)
+    )
+
+
+@_algorithm("Image.sampleRegions")
+def _image_sample_regions(image, collection, scale=None, geometries=False):
+    samples = []
+
+    for feature in _elements(collection):
+        values = _region_values(image, feature.geometry)
+        valid = np.logical_and.reduce([np.isfinite(v) for v in values.values()])
+
+        for i in np.flatnonzero(valid):
+            properties = dict(feature.properties)
+            properties.update({name: v[i].item() for name, v in values.items()})
+            samples.append(_FeatureData(None, properties))
+
+    return _CollectionData(samples)
+
+
+@_algorithm("List.get")
+def _list_get(list, index):
+    return list[int(index)]
+
+
+@_algorithm("List.map")
+def _list_map(list, baseAlgorithm):
+    return [baseAlgorithm(element) for element in list]
+
+
+@_algorithm("List.size")
+def _list_size(list):
+    return len(list)
+
+
+@_algorithm("String")
+def _string(string):
+    return str(string)
+
+
+@_algorithm("String.cat")
+def _string_cat(string1, string2):
+    return string1 + string2
+
+
+@_algorithm("Image.bandNames")
+def _image_band_names(image):
+    return list(image.bands)
+
+
+@_algorithm("List.sequence")
+def _list_sequence(start, end, step=1):
+    return list(range(int(start), int(end) + 1, int(step)))
+
+
+@_algorithm("Filter.calendarRange")
+def _filter_calendar_range(start, end, field):
+    def predicate(element):
+        date = pd.Timestamp(element.properties["system:time_start"], unit="ms")
+        return start <= getattr(date, field) <= end
+
+    return _FilterData(predicate)
+
+
+def _property_filter(operation):
+    def build(leftField, rightValue):
+        def predicate(element):
+            value = element.properties.get(leftField)
+            return value is not None and operation(value, rightValue)
+
+        return _FilterData(predicate)
+
+    return build
+
+
+_ALGORITHMS["Filter.greaterThanOrEquals"] = _property_filter(lambda a, b: a >= b)
+_ALGORITHMS["Filter.lessThan"] = _property_filter(lambda a, b: a < b)
+_ALGORITHMS["Filter.equals"] = _property_filter(lambda a, b: a == b)
+_ALGORITHMS["Filter.inList"] = _property_filter(lambda a, b: a in b)
+
+
+@_algorithm("Filter.equalsFields")
+def _filter_equals_fields(leftField, rightField):
+    def predicate(primary, secondary):
+        return primary.properties.get(leftField) == secondary.properties.get(rightField)
+
+    return _FilterData(predicate, pairs=True)
+
+
+def _reducer(name, func, output=None):
+    @_algorithm(f"Reducer.{name}")
+    def build():
+        return _ReducerData([(output or name, func)])
+
+
+_reducer("mean", np.nanmean)
+_reducer("stdDev", np.nanstd)
+_reducer("max", np.nanmax)
+_reducer("min", np.nanmin)
+_reducer("sum", np.nansum)
+_reducer("count", lambda values, axis: np.isfinite(values).sum(axis=axis))
+_reducer("toList", lambda values, axis: list(values), output="list")
+
+
+@_algorithm("Reducer.linearFit")
+def _reducer_linear_fit():
+    return _ReducerData([("scale", None), ("offset", None)], inputs=2)
+
+
+@_algorithm("Reducer.getOutputs")
+def _reducer_get_outputs(reducer):
+    return [name for name, _ in reducer.outputs]
+
+
+@_algorithm("Reducer.setOutputs")
+def _reducer_set_outputs(reducer, outputs):
+    if len(outputs) != len(reducer.outputs):
+        raise EEException("Reducer.setOutputs: Wrong number of outputs.")
+    pairs = [(name, func) for name, (_, func) in zip(outputs, reducer.outputs)]
+    return _ReducerData(pairs, reducer.inputs, reducer.repeat)
+
+
+@_algorithm("Reducer.combine")
+def _reducer_combine(reducer1, reducer2, outputPrefix="", sharedInputs=False):
+    outputs = reducer1.outputs + [
+        (outputPrefix + name, func) for name, func in reducer2.outputs
+    ]
+    return _ReducerData(outputs)
+
+
+@_algorithm("Reducer.repeat")
+def _reducer_repeat(reducer, count):
+    return _ReducerData(reducer.outputs, inputs=count, repeat=count)
+
+
+@_algorithm("Join.inner")
+def _join_inner(primaryKey="primary", secondaryKey="secondary"):
+    return (primaryKey, secondaryKey)
+
+
+@_algorithm("Join.apply")
+def _join_apply(join, primary, secondary, condition):
+    primary_key, secondary_key = join
+    secondary = _elements(secondary)
+
+    return _CollectionData(
+        _FeatureData(None, {primary_key: p, secondary_key: s})
+        for p in _elements(primary)
+        for s in secondary
+        if condition.predicate(p, s)
+    )
+
+
+# Client side objects.
+
+
+class ComputedObject:
+    def __init__(self, value):
+        if not isinstance(value, ComputedObject):
+            raise TypeError(f"Can't cast {type(value).__name__}.")
+        self._node = value._node
+
+    @classmethod
+    def _call(cls, func, **args):
+        return _wrap(cls, _Node(func, _unwrap(args)))
+
+    def getInfo(self):
+        return _request(self)
+
+    def serialize(self, for_cloud_api=True):
+        return json.dumps(encode(self), default=repr)
+
+    def get(self, key):
+        return ComputedObject._call("Element.get", object=self, property=key)
+
+
+class Element(ComputedObject):
+    def set(self, key, value):
+        return type(self)._call("Element.set", object=self, key=key, value=value)
+
+
+class Geometry(ComputedObject):
+    def __init__(self, geoJson):
+        if isinstance(geoJson, ComputedObject):
+            super().__init__(geoJson)
+        else:
+            self._node = _Node("Geometry", {"geoJson": geoJson})
+
+    @staticmethod
+    def Rectangle(coords):
+        """Rectangle [x0, y0, x1, y1] in pixel coordinates."""
+        return Geometry._call(
+            "GeometryConstructors.Rectangle", coordinates=list(coords)
+        )
+
+    def bounds(self, maxError=None):
+        return Geometry._call("Geometry.bounds", geometry=self)
+
+    def coordinates(self):
+        return ComputedObject._call("Geometry.coordinates", geometry=self)
+
+    def intersection(self, right, maxError=None):
+        return Geometry._call(
+            "Geometry.intersection", left=self, right=right, maxError=maxError
+        )
+
+
+class Feature(Element):
+    def __init__(self, geom, opt_properties=None):
+        if isinstance(geom, Feature) and opt_properties is None:
+            super().__init__(geom)
+        else:
+            self._node = _Node(
+                "Feature", _unwrap({"geometry": geom, "metadata": opt_properties})
+            )
+
+    def geometry(self):
+        return Geometry._call("Feature.geometry", feature=self)
+
+    def id(self):
+        return self.get("system:index")
+
+
+class Date(ComputedObject):
+    def get(self, unit):
+        return ComputedObject._call("Date.get", date=self, unit=unit)
+
+
+class Image(Element):
+    def __init__(self, args=None):
+        if isinstance(args, ComputedObject):
+            super().__init__(args)
+        elif isinstance(args, str):
+            self._node = _Node("Image.load", {"id": args})
+        else:
+            self._node = _Node("Image.constant", {"value": args})
+
+    @staticmethod
+    def constant(value):
+        return Image._call("Image.constant", value=value)
+
+    @staticmethod
+    def cat(*images):
+        images = list(images[0]) if len(images) == 1 else list(images)
+        return Image._call("Image.cat", images=images)
+
+    def select(self, bands, newNames=None):
+        return Image._call(
+            "Image.select", input=self, bandSelectors=bands, newNames=newNames
+        )
+
+    def addBands(self, srcImg, names=None, overwrite=False):
+        return Image._call(
+            "Image.addBands",
+            dstImg=self,
+            srcImg=srcImg,
+            names=names,
+            overwrite=overwrite,
+        )
+
+    def rename(self, *names):
+        names = names[0] if len(names) == 1 else list(names)
+        return Image._call("Image.rename", input=self, names=names)
+
+    def metadata(self, property):
+        return Image._call("Image.metadata", image=self, property=property)
+
+    def expression(self, expression, map=None):
+        return Image._call(
+            "Image.expression", expression=expression, map=map or {}, image=self
+        )
+
+    def mask(self):
+        return Image._call("Image.mask", image=self)
+
+    def connectedPixelCount(self, maxSize=100, eightConnected=True):
+        return Image._call(
+            "Image.connectedPixelCount",
+            image=self,
+            maxSize=maxSize,
+            eightConnected=eightConnected,
+        )
+
+    @staticmethod
+    def pixelArea():
+        return Image._call("Image.pixelArea")
+
+    @staticmethod
+    def pixelLonLat():
+        return Image._call("Image.pixelLonLat")
+
+    def toFloat(self):
+        return Image._call("Image.toFloat", value=self)
+
+    def updateMask(self, mask):
+        return Image._call("Image.updateMask", image=self, mask=mask)
+
+    def unmask(self, value=0):
+        return Image._call("Image.unmask", input=self, value=value)
+
+    def date(self):
+        return Date._call("Image.date", image=self)
+
+    def bandNames(self):
+        return List._call("Image.bandNames", image=self)
+
+    def id(self):
+        return self.get("system:id")
+
+    def reduceRegion(self, reducer, geometry=None, scale=None, tileScale=1, **kwargs):
+        return Dictionary._call(
+            "Image.reduceRegion",
+            image=self,
+            reducer=reducer,
+            geometry=geometry,
+            scale=scale,
+            tileScale=tileScale,
+        )
+
+    def reduceRegions(self, collection, reducer, scale=None, tileScale=1, **kwargs):
+        return FeatureCollection._call(
+            "Image.reduceRegions",
+            image=self,
+            collection=collection,
+            reducer=reducer,
+            scale=scale,
+            tileScale=tileScale,
+        )
+
+    def sampleRegions(self, collection, properties=None, scale=None, geometries=False):
+        return FeatureCollection._call(
+            "Image.sampleRegions",
+            image=self,
+            collection=collection,
+            scale=scale,
+            geometries=geometries,
+        )
+
+
+def _image_binary(name):
+    def method(self, image2):
+        return Image._call(f"Image.{name}", image1=self, image2=image2)
+
+    method.__name__ = name
+    setattr(Image, name, method)
+
+
+for _name in ("add", "subtract", "multiply", "divide", "gt", "lt", "eq", "bitwiseAnd"):
+    _image_binary(_name)
+
+
+class Collection(ComputedObject):
+    _element = Feature
+
+    def size(self):
+        return Number._call("Collection.size", collection=self)
+
+    def toList(self, count, offset=0):
+        return List._call(
+            "Collection.toList", collection=self, count=count, offset=offset
+        )
+
+    def first(self):
+        return self._element._call("Collection.first", collection=self)
+
+    def map(self, algorithm):
+        body = _lambda(algorithm, self._element)
+        return type(self)._call("Collection.map", collection=self, baseAlgorithm=body)
+
+    def filter(self, filter):
+        return type(self)._call("Collection.filter", collection=self, filter=filter)
+
+    def filterBounds(self, geometry):
+        return type(self)._call(
+            "Collection.filterBounds", collection=self, geometry=geometry
+        )
+
+    def sort(self, prop, ascending=True):
+        return type(self)._call(
+            "Collection.limit", collection=self, key=prop, ascending=ascending
+        )
+
+    def limit(self, maximum):
+        return type(self)._call("Collection.limit", collection=self, limit=maximum)
+
+    def reduceColumns(self, reducer, selectors):
+        return Dictionary._call(
+            "Collection.reduceColumns",
+            collection=self,
+            reducer=reducer,
+            selectors=list(selectors),
+        )
+
+
+class FeatureCollection(Collection):
+    _element = Feature
+
+    def __init__(self, args):
+        if isinstance(args, ComputedObject):
+            super().__init__(args)
+        else:
+            self._node = _Node("Collection", {"features": _unwrap(list(args))})
+
+    def flatten(self):
+        return FeatureCollection._call("Collection.flatten", collection=self)
+
+
+class ImageCollection(Collection):
+    _element = Image
+
+    def __init__(self, args):
+        if isinstance(args, ComputedObject):
+            super().__init__(args)
+        elif isinstance(args, str):
+            self._node = _Node("ImageCollection.load", {"id": args})
+        else:
+            self._node = _Node("ImageCollection.fromImages", {"images": _unwrap(args)})
+
+    @staticmethod
+    def fromImages(images):
+        return ImageCollection._call("ImageCollection.fromImages", images=images)
+
+    def select(self, *args):
+        return self.map(lambda image: image.select(*args))
+
+    def reduce(self, reducer):
+        return Image._call("ImageCollection.reduce", collection=self, reducer=reducer)
+
+
+class List(ComputedObject):
+    def __init__(self, args):
+        if isinstance(args, ComputedObject):
+            super().__init__(args)
+        else:
+            self._node = _Node("List", {"list": _unwrap(list(args))})
+
+    @staticmethod
+    def sequence(start, end, step=1):
+        return List._call("List.sequence", start=start, end=end, step=step)
+
+    def get(self, index):
+        return ComputedObject._call("List.get", list=self, index=index)
+
+    def map(self, baseAlgorithm):
+        body = _lambda(baseAlgorithm, ComputedObject)
+        return List._call("List.map", list=self, baseAlgorithm=body)
+
+    def size(self):
+        return Number._call("List.size", list=self)
+
+
+class String(ComputedObject):
+    def __init__(self, string):
+        if isinstance(string, ComputedObject):
+            super().__init__(string)
+        else:
+            self._node = _Node("String", {"string": string})
+
+    def cat(self, string2):
+        return String._call("String.cat", string1=self, string2=string2)
+
+
+class Dictionary(ComputedObject):
+    def __init__(self, input=None):
+        if isinstance(input, ComputedObject):
+            super().__init__(input)
+        else:
+            self._node = _Node("Dictionary", {"input": _unwrap(input or {})})
+
+    def select(self, selectors):
+        return Dictionary._call(
+            "Dictionary.select", dictionary=self, selectors=list(selectors)
+        )
+
+    def toImage(self):
+        return Image._call("Dictionary.toImage", dictionary=self)
+
+    def get(self, key):
+        return ComputedObject._call("Dictionary.get", dictionary=self, key=key)
+
+    def set(self, key, value):
+        return Dictionary._call("Dictionary.set", dictionary=self, key=key, value=value)
+
+
+class Number(ComputedObject):
+    def __init__(self, value):
+        if isinstance(value, ComputedObject):
+            super().__init__(value)
+        else:
+            self._node = _Node("Number", {"value": value})
+
+    def min(self, right):
+        return Number._call("Number.min", left=self, right=right)
+
+    def gt(self, right):
+        return Number._call("Number.gt", left=self, right=right)
+
+    def eq(self, right):
+        return Number._call("Number.eq", left=self, right=right)
+
+
+class Algorithms:
+    @staticmethod
+    def If(condition, trueCase=None, falseCase=None):
+        return ComputedObject._call(
+            "If", condition=condition, trueCase=trueCase, falseCase=falseCase
+        )
+
+
+class Reducer(ComputedObject):
+    def combine(self, reducer2, outputPrefix="", sharedInputs=False):
+        return Reducer._call(
+            "Reducer.combine",
+            reducer1=self,
+            reducer2=reducer2,
+            outputPrefix=outputPrefix,
+            sharedInputs=sharedInputs,
+        )
+
+    def repeat(self, count):
+        return Reducer._call("Reducer.repeat", reducer=self, count=count)
+
+    def getOutputs(self):
+        return List._call("Reducer.getOutputs", reducer=self)
+
+    def setOutputs(self, outputs):
+        return Reducer._call("Reducer.setOutputs", reducer=self, outputs=outputs)
+
+
+def _reducer_constructor(name):
+    setattr(Reducer, name, staticmethod(lambda: Reducer._call(f"Reducer.{name}")))
+
+
+for _name in ("mean", "stdDev", "max", "min", "sum", "count", "toList", "linearFit"):
+    _reducer_constructor(_name)
+
+
+class Filter(ComputedObject):
+    @staticmethod
+    def calendarRange(start, end=None, field="day_of_year"):
+        end = start if end is None else end
+        return Filter._call("Filter.calendarRange", start=start, end=end, field=field)
+
+    @staticmethod
+    def gte(name, value):
+        return Filter._call(
+            "Filter.greaterThanOrEquals", leftField=name, rightValue=value
+        )
+
+    @staticmethod
+    def lt(name, value):
+        return Filter._call("Filter.lessThan", leftField=name, rightValue=value)
+
+    @staticmethod
+    def eq(name, value):
+        return Filter._call("Filter.equals", leftField=name, rightValue=value)
+
+    @staticmethod
+    def inList(leftField=None, rightValue=None):
+        return Filter._call("Filter.inList", leftField=leftField, rightValue=rightValue)
+
+    @staticmethod
+    def equals(leftField=None, rightValue=None, rightField=None, leftValue=None):
+        if rightField is not None:
+            return Filter._call(
+                "Filter.equalsFields", leftField=leftField, rightField=rightField
+            )
+        return Filter._call("Filter.equals", leftField=leftField, rightValue=rightValue)
+
+
+class Join(ComputedObject):
+    @staticmethod
+    def inner(primaryKey="primary", secondaryKey="secondary"):
+        return Join._call(
+            "Join.inner", primaryKey=primaryKey, secondaryKey=secondaryKey
+        )
+
+    def apply(self, primary, secondary, condition):
+        return FeatureCollection._call(
+            "Join.apply",
+            join=self,
+            primary=primary,
+            secondary=secondary,
+            condition=condition,
+        )
+
+
+geometry = types.SimpleNamespace(Geometry=Geometry)
+feature = types.SimpleNamespace(Feature=Feature)
@@ -0,0 +1,128 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from statgis import aio
+from statgis.sample import sample_collection
+from statgis.zonal_statistics import zonal_statistics_image
+
+N = 20
+LATENCY = 0.05
+
+
+@pytest.fixture
+def collection(fake):
+    rng = np.random.default_rng(8)
+    images = [
+        fake.add_image(
+            f"TEST/B/{i}", {"B": rng.random((6, 6))}, time_start=f"2022-01-{i + 1:02d}"
+        )
+        for i in range(N)
+    ]
+    yield fake.add_collection("TEST/B", images)
+    aio.configure()
+
+
+def test_sample_collection(fake, collection):
+    roi = fake.Geometry.Rectangle([0, 0, 3, 3])
+    expected = sample_collection(collection, "B", roi, 30)
+
+    fake.reset(latency=LATENCY)
+    data = asyncio.run(aio.sample_collection(collection, "B", roi, 30))
+
+    assert fake.round_trips() == 1 + N
+    assert fake.peak_in_flight() > N / 4
+    for values, reference in zip(data, expected):
+        np.testing.assert_array_equal(values, reference)
+
+
+def test_gather_zones(fake, collection):
+    image = fake.Image("TEST/B/0")
+    zones = [fake.Geometry.Rectangle([i, i, i + 2, i + 2]) for i in range(4)]
+
+    async def run():
+        return await asyncio.gather(
+            *(aio.zonal_statistics_image(image, zone, 30) for zone in zones)
+        )
+
+    data = asyncio.run(run())
+
+    for frame, zone in zip(data, zones):
+        np.testing.assert_allclose(
+            frame["B_mean"], zonal_statistics_image(image, zone, 30)["B_mean"]
+        )
+
+
+def test_split_reduction(fake, collection):
+    image = fake.Image("TEST/B/0")
+    roi = fake.Geometry.Rectangle([0, 0, 6, 6])
+    full = zonal_statistics_image(image, roi, 30)
+
+    fake.reset(max_pixels=10)
+    with pytest.raises(ValueError, match="default reducer"):
+        asyncio.run(
+            aio.zonal_statistics_image(
+                image, roi, 30, reducer=fake.Reducer.mean(), max_split_depth=2
+            )
+        )
+    split = asyncio.run(aio.zonal_statistics_image(image, roi, 30, max_split_depth=2))
+
+    assert list(split.columns) == list(full.columns)
+    for column in full.columns.drop("date"):
+        np.testing.assert_allclose(split[column], full[column])
+
+
+def test_concurrency_limit(fake, collection):
+    aio.configure(max_concurrency=2)
+    fake.reset(latency=LATENCY)
+
+    asyncio.run(
+        aio.sample_collection(
+            collection, "B", fake.Geometry.Rectangle([0, 0, 2, 2]), 30
+        )
+    )
+
+    assert fake.round_trips() == 1 + N
+    assert fake.peak_in_flight() == 2
+
+
+def test_timeout_and_cancellation(fake, collection):
+    roi = fake.Geometry.Rectangle([0, 0, 2, 2])
+
+    async def run():
+        with pytest.raises(TimeoutError):
+            await asyncio.wait_for(
+                aio.sample_collection(collection, "B", roi, 30), LATENCY / 2
+            )
+
+        task = asyncio.create_task(aio.extract_dates(collection))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # The semaphore is released by the cancelled requests.
+        return await aio.extract_dates(collection)
+
+    aio.configure(max_concurrency=1)
+    fake.reset(latency=LATENCY)
+
+    assert len(asyncio.run(run())) == N
+
+
+def test_retries(fake, collection):
+    fake.fail_next(2)
+
+    dates = asyncio.run(aio.extract_dates(collection))
+
+    assert len(dates) == N
+    assert fake.round_trips() == 3
+
+
+def test_gather_raises_programming_errors():
+    async def func(i):
+        return {}[i]
+
+    with pytest.raises(KeyError):
+        asyncio.run(aio._gather(func, range(3), return_exceptions=True))
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from statgis.cache import enable_cache
+from statgis.sample import sample_collection, sample_collection_batch
+from statgis.time_series_analysis import (
+    extract_dates,
+    time_series_preocessing,
+    time_series_processing_local,
+)
+from statgis.zonal_statistics import (
+    iter_zonal_statistics_collection,
+    zonal_statistics_collection,
+)
+
+pytestmark = pytest.mark.benchmark
+
+N = 24
+LATENCY = 0.02
+# Generous bound of the peak memory of each benchmark, they use < 2 MiB.
+PEAK_BYTES = 8 * 2**20
+dates = pd.date_range("2020-01-15", periods=N, freq="MS") + pd.Timedelta(days=14)
+rng = np.random.default_rng(3)
+cube = rng.normal(0.4, 0.1, size=(N, 12, 12)) + np.arange(N)[:, None, None] / 100
+cube[rng.random(cube.shape) < 0.05] = np.nan
+
+
+@pytest.fixture
+def collection(fake):
+    images = [
+        fake.add_image(f"TEST/NDVI/{i}", {"NDVI": cube[i]}, time_start=date)
+        for i, date in enumerate(dates)
+    ]
+    return fake.add_collection("TEST/NDVI", images)
+
+
+@pytest.fixture
+def roi(fake):
+    return fake.Geometry.Rectangle([2, 3, 10, 9])
+
+
+def test_sample_collection(fake, benchmark, collection, roi):
+    fake.reset(latency=LATENCY)
+
+    data, stats = benchmark(
+        "sample_collection", sample_collection, collection, "NDVI", roi, 30
+    )
+
+    assert stats["requests"] == 1 + N
+    assert stats["peak"] < PEAK_BYTES
+
+    window = cube[:, 3:9, 2:10]
+    for values, expected in zip(data, window):
+        np.testing.assert_array_equal(values, expected[np.isfinite(expected)])
+
+
+def test_sample_collection_batch(fake, benchmark, collection, roi):
+    fake.reset(latency=LATENCY)
+
+    (data, ids, sampled), stats = benchmark(
+        "sample_collection_batch",
+        sample_collection_batch,
+        collection,
+        "NDVI",
+        roi,
+        30,
+        page_size=10,
+    )
+
+    assert stats["requests"] == 1 + 3
+    assert stats["peak"] < PEAK_BYTES
+    assert ids == [f"TEST/NDVI/{i}" for i in range(N)]
+    assert (sampled == dates).all()
+    assert sum(len(values) for values in data) == np.isfinite(cube[:, 3:9, 2:10]).sum()
+
+
+def test_sample_collection_retries(fake, collection, roi):
+    fake.fail_next(3)
+
+    data = sample_collection(collection, "NDVI", roi, 30)
+
+    assert len(data) == N
+    assert fake.round_trips() == 1 + N + 3
+    assert sum(request.error is not None for request in fake.requests) == 3
+
+
+def test_zonal_statistics_collection(fake, benchmark, collection, roi):
+    fake.reset(latency=LATENCY)
+
+    data, stats = benchmark(
+        "zonal_statistics_collection",
+        zonal_statistics_collection,
+        collection,
+        roi,
+        30,
+    )
+
+    assert stats["requests"] == 1
+    assert stats["peak"] < PEAK_BYTES
+    window = cube[:, 3:9, 2:10].reshape(N, -1)
+    np.testing.assert_allclose(data["NDVI_mean"], np.nanmean(window, axis=1))
+    np.testing.assert_allclose(data["NDVI_stdDev"], np.nanstd(window, axis=1))
+    np.testing.assert_array_equal(data["NDVI_count"], np.isfinite(window).sum(axis=1))
+
+
+def test_iter_zonal_statistics_collection(fake, benchmark, collection, roi):
+    pages, stats = benchmark(
+        "iter_zonal_statistics_collection",
+        lambda: list(
+            iter_zonal_statistics_collection(collection, roi, 30, page_size=10)
+        ),
+    )
+
+    assert stats["requests"] == 1 + 3
+    assert stats["peak"] < PEAK_BYTES
+    assert [len(page) for page in pages] == [10, 10, 4]
+
+
+def test_extract_dates(fake, benchmark, collection, tmp_path):
+    result, stats = benchmark("extract_dates", extract_dates, collection)
+
+    assert stats["requests"] == 1
+    assert stats["peak"] < PEAK_BYTES
+    assert (result == dates).all()
+
+    enable_cache(tmp_path)
+    extract_dates(collection)
+    fake.requests.clear()
+
+    assert (extract_dates(collection) == dates).all()
+    assert fake.round_trips() == 0
+
+
+def test_time_series_preocessing(fake, benchmark, collection, roi):
+    def run():
+        data, monthly_mean = time_series_preocessing(collection, "NDVI")
+        return sample_collection(data, ["anomaly", "stational"], roi, 30)
+
+    samples, stats = benchmark("time_series_preocessing", run)
+
+    assert stats["requests"] == 1 + N
+    assert stats["peak"] < PEAK_BYTES
+    # The graph sent with each image does not grow with the number of months.
+    assert max(request.nodes for request in fake.requests) < 80
+
+    local, _ = time_series_processing_local(cube, dates, processes=1)
+    window = local["anomaly"][:, 3:9, 2:10]
+    for values, expected in zip(samples, window):
+        np.testing.assert_allclose(
+            values["anomaly"], expected[np.isfinite(expected)], atol=1e-5
+        )
@@ -0,0 +1,142 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from statgis import cache as statgis_cache
+
+
+class Expression:
+    """Stand-in for an ee.ComputedObject."""
+
+    def __init__(self, text):
+        self.text = text
+
+    def serialize(self):
+        return self.text
+
+
+def test_results_are_reused(tmp_path):
+    cache = statgis_cache.enable_cache(tmp_path)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return pd.DataFrame({"mean": [0.5], "date": pd.to_datetime(["2020-01-01"])})
+
+    try:
+        first = statgis_cache.cached("zonal", Expression("a"), {}, compute)
+        second = statgis_cache.cached("zonal", Expression("a"), {}, compute)
+        statgis_cache.cached("zonal", Expression("b"), {}, compute)
+    finally:
+        statgis_cache.disable_cache()
+
+    pd.testing.assert_frame_equal(first, second)
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_arrays_and_dates_round_trip(tmp_path):
+    cache = statgis_cache.ResultCache(tmp_path)
+    dates = pd.DatetimeIndex(["2020-01-01", "2020-02-01"])
+
+    cache.put("dates", dates)
+    cache.put("array", np.arange(5.0))
+    cache.put("dict", {"B1": np.ones(3), "B2": np.zeros(3)})
+
+    reopened = statgis_cache.ResultCache(tmp_path)
+
+    assert reopened.get("dates").equals(dates)
+    np.testing.assert_array_equal(reopened.get("array"), np.arange(5.0))
+    np.testing.assert_array_equal(reopened.get("dict")["B2"], np.zeros(3))
+
+
+def test_lru_eviction(tmp_path):
+    cache = statgis_cache.ResultCache(tmp_path, max_bytes=2500)
+
+    cache.put("a", np.zeros(100))
+    cache.put("b", np.zeros(100))
+    cache.get("a")
+    cache.put("c", np.zeros(100))
+
+    assert cache.get("b") is statgis_cache._MISSING
+    assert cache.get("a") is not statgis_cache._MISSING
+    assert cache.evictions == 1
+
+
+def test_ttl(tmp_path):
+    cache = statgis_cache.ResultCache(tmp_path, ttl=0.05)
+    cache.put("a", np.zeros(3))
+
+    time.sleep(0.1)
+
+    assert cache.get("a") is statgis_cache._MISSING
+    assert cache.stats()["entries"] == 0
+
+
+def test_processes_share_the_directory(tmp_path):
+    first = statgis_cache.ResultCache(tmp_path, max_bytes=2500)
+    second = statgis_cache.ResultCache(tmp_path, max_bytes=2500)
+
+    first.put("a", np.zeros(100))
+    second.put("b", np.zeros(100))
+    assert first.stats()["entries"] == 2
+
+    metadata = (tmp_path / "b.json").read_text()
+    assert first.get("b") is not statgis_cache._MISSING
+    assert (tmp_path / "b.json").read_text() == metadata
+
+    # The size of second goes over max_bytes, so it scans the directory and
+    # evicts the result of first.
+    second.put("c", np.zeros(100))
+    assert first.get("a") is statgis_cache._MISSING
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "b.json",
+        "b.npz",
+        "c.json",
+        "c.npz",
+    ]
+
+
+def test_failed_write_keeps_the_result(tmp_path):
+    statgis_cache.enable_cache(tmp_path)
+
+    def compute():
+        return pd.DataFrame({"value": [1, "a"]})
+
+    try:
+        with pytest.warns(UserWarning, match="could not be cached"):
+            data = statgis_cache.cached("zonal", Expression("a"), {}, compute)
+    finally:
+        statgis_cache.disable_cache()
+
+    assert list(data["value"]) == [1, "a"]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_put_scans_only_over_max_bytes(tmp_path, monkeypatch):
+    cache = statgis_cache.ResultCache(tmp_path, max_bytes=2500)
+    scans = []
+    entries = cache._entries
+    monkeypatch.setattr(cache, "_entries", lambda: scans.append(1) or entries())
+
+    cache.put("a", np.zeros(100))
+    cache.put("b", np.zeros(100))
+    cache.put("b", np.zeros(100))
+    assert len(scans) == 1
+
+    cache.put("c", np.zeros(100))
+    assert len(scans) == 2
+    assert cache.evictions == 1
+    assert cache._bytes == cache.stats()["bytes"]
+
+
+def test_home_directory_is_expanded(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+
+    cache = statgis_cache.ResultCache("~/statgis")
+
+    assert cache.directory == str(tmp_path / "statgis")
+    assert (tmp_path / "statgis").is_dir()
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from statgis.instrumentation import graph_stats, node_count
+from statgis.sample import sample_collection
+from statgis.time_series_analysis import (
+    calc_anomalies,
+    reduce_by_month,
+    time_series_processing_local,
+    trend,
+)
+
+N = 36
+dates = pd.date_range("2019-01-01", periods=N, freq="MS") + pd.Timedelta(days=9)
+rng = np.random.default_rng(6)
+cube = 0.1 * np.sin(2 * np.pi * dates.month.values / 12)[:, None, None] + rng.normal(
+    0.4, 0.05, size=(N, 5, 6)
+)
+cube[rng.uniform(size=cube.shape) < 0.1] = np.nan
+
+
+def anomalies(fake, months):
+    images = [
+        fake.add_image(f"TEST/NDVI{months}/{i}", {"NDVI": cube[i]}, time_start=date)
+        for i, date in enumerate(dates[:months])
+    ]
+    collection = fake.add_collection(f"TEST/NDVI{months}", images)
+
+    trended = trend(collection, "NDVI")
+    monthly_mean = reduce_by_month(trended, fake.Reducer.mean(), "stational")
+
+    return calc_anomalies(trended, monthly_mean)
+
+
+def test_anomalies_match_local(fake):
+    data = anomalies(fake, N)
+    samples = sample_collection(
+        data, ["anomaly", "stational_mean"], fake.Geometry.Rectangle([0, 0, 6, 5]), 30
+    )
+
+    local, _ = time_series_processing_local(cube, dates, processes=1)
+    for values, anomaly, mean in zip(
+        samples, local["anomaly"], local["stational_mean"]
+    ):
+        valid = np.isfinite(anomaly)
+        np.testing.assert_allclose(values["anomaly"], anomaly[valid], atol=1e-5)
+        np.testing.assert_allclose(values["stational_mean"], mean[valid], atol=1e-5)
+
+
+def test_graph_does_not_grow_with_months(fake):
+    assert node_count(anomalies(fake, 12)) == node_count(anomalies(fake, N))
+
+    # The images are matched with their monthly mean by one join.
+    functions = graph_stats(anomalies(fake, N))["functions"]
+    assert functions["Join.apply"] == 1
+    assert functions["Filter.equalsFields"] == 1
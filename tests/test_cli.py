@@ -0,0 +1,109 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from statgis import cli
+
+N = 6
+dates = pd.date_range("2022-01-01", periods=N, freq="MS")
+rng = np.random.default_rng(4)
+cube = rng.normal(0.5, 0.1, size=(N, 10, 10))
+
+
+def polygon(x0, y0, x1, y1):
+    return {
+        "type": "Polygon",
+        "coordinates": [[[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]],
+    }
+
+
+@pytest.fixture
+def job(fake, tmp_path):
+    images = [
+        fake.add_image(f"TEST/NDVI/{i}", {"NDVI": cube[i]}, time_start=date)
+        for i, date in enumerate(dates)
+    ]
+    fake.add_collection("TEST/NDVI", images)
+
+    sites = {
+        "Zones": [
+            {"name": "North zone", "geometry": polygon(0, 0, 5, 5)},
+            {"name": "South zone", "geometry": polygon(5, 5, 10, 10)},
+        ]
+    }
+    (tmp_path / "sites.json").write_text(json.dumps(sites))
+
+    spec = {
+        "sites": "sites.json",
+        "collection": "TEST/NDVI",
+        "start": "2022-02-01",
+        "analyses": {"zonal_statistics": {"bands": ["NDVI"]}, "time_series": {}},
+        "output": "out",
+        "workers": 2,
+    }
+    (tmp_path / "job.json").write_text(json.dumps(spec))
+
+    return tmp_path / "job.json"
+
+
+def test_run_and_resume(fake, job, capsys):
+    spec = cli.load_spec(job)
+
+    # time_series needs a band, so its units fail in the first run.
+    summary = cli.run_job(spec)
+    assert summary == {"done": 2, "skipped": 0, "failed": 2}
+
+    data = pd.read_parquet(
+        job.parent / "out" / "North_zone" / "zonal_statistics.parquet"
+    )
+    assert len(data) == N - 1
+    np.testing.assert_allclose(data["NDVI_mean"], cube[1:, 0:5, 0:5].mean(axis=(1, 2)))
+
+    spec = json.loads(job.read_text())
+    spec["analyses"]["time_series"] = {"band": "NDVI"}
+    spec["workers"] = 1
+    job.write_text(json.dumps(spec))
+
+    with pytest.raises(ValueError, match="restart"):
+        cli.run_job(cli.load_spec(job))
+
+    summary = cli.run_job(cli.load_spec(job), restart=True)
+    assert summary == {"done": 4, "skipped": 0, "failed": 0}
+
+    fake.requests.clear()
+    summary = cli.run_job(cli.load_spec(job))
+    assert summary == {"done": 0, "skipped": 4, "failed": 0}
+    assert fake.round_trips() == 0
+
+    (job.parent / "out" / "South_zone" / "time_series.parquet").unlink()
+    summary = cli.run_job(cli.load_spec(job))
+    assert summary == {"done": 1, "skipped": 3, "failed": 0}
+
+    series = pd.read_parquet(job.parent / "out" / "South_zone" / "time_series.parquet")
+    assert {"anomaly", "predicted", "stational"} <= set(series.columns)
+
+    assert cli.main(["status", str(job)]) == 0
+    assert capsys.readouterr().out.split().count("done") == 4
+
+
+def test_spec_validation(tmp_path):
+    path = tmp_path / "job.json"
+
+    path.write_text(json.dumps({"sites": [], "collection": "C"}))
+    with pytest.raises(ValueError, match="analyses"):
+        cli.load_spec(path)
+
+    path.write_text(
+        json.dumps({"sites": [], "collection": "C", "analyses": ["kriging"]})
+    )
+    with pytest.raises(ValueError, match="kriging"):
+        cli.load_spec(path)
+
+    sites = [{"name": "a b", "coords": [0, 0]}, {"name": "a_b", "coords": [1, 1]}]
+    path.write_text(
+        json.dumps({"sites": sites, "collection": "C", "analyses": ["plume"]})
+    )
+    with pytest.raises(ValueError, match="Duplicate"):
+        cli.load_spec(path)
@@ -0,0 +1,64 @@
+import numpy as np
+import xarray as xr
+
+from statgis.cover_frequency import vegetation_frequency_local, water_frequency_local
+
+rng = np.random.default_rng(0)
+cube = rng.uniform(0, 0.4, size=(12, 5, 20, 30)).astype(np.float32)
+cube[3, :, :5, :5] = np.nan
+cube[:, 1, 0, 0] = np.nan
+
+
+def reference(cube, rule):
+    """Classify the whole cube at once with float32 arithmetic."""
+    blue, green, red, nir, swir = [cube[:, i] for i in range(5)]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mndwi = np.nan_to_num((green - swir) / (green + swir))
+        evi = np.nan_to_num((nir - red) / (nir + 6 * red - np.float32(7.5) * blue + 1))
+        evi = evi * np.float32(2.5)
+        ndvi = np.nan_to_num((nir - red) / (nir + red))
+        ndbi = np.nan_to_num((swir - nir) / (swir + nir))
+
+    if rule == "water":
+        detected = (evi < np.float32(0.1)) & ((mndwi > evi) | (mndwi > ndvi))
+    else:
+        detected = (evi >= np.float32(0.1)) & (ndvi >= np.float32(0.2)) & (ndbi < 0)
+
+    valid = np.isfinite(cube).all(axis=1)
+
+    with np.errstate(invalid="ignore"):
+        return ((detected & valid).sum(axis=0) / valid.sum(axis=0)).astype(np.float32)
+
+
+def test_water_frequency_local():
+    result = water_frequency_local(cube)
+
+    assert result.dtype == np.float32
+    assert np.isnan(result[0, 0])
+    np.testing.assert_array_equal(result, reference(cube, "water"))
+
+
+def test_vegetation_frequency_local():
+    np.testing.assert_array_equal(
+        vegetation_frequency_local(cube), reference(cube, "vegetation")
+    )
+
+
+def test_band_names_with_xarray():
+    names = ["SR_B2", "SR_B3", "SR_B4", "SR_B5", "SR_B6"]
+    data = xr.DataArray(
+        cube[:, ::-1], dims=("time", "band", "y", "x"), coords={"band": names[::-1]}
+    )
+
+    np.testing.assert_array_equal(
+        water_frequency_local(data, bands=names), water_frequency_local(cube)
+    )
+
+
+def test_empty_time_axis():
+    result = water_frequency_local(cube[:0])
+
+    assert result.shape == cube.shape[2:]
+    assert result.dtype == np.float32
+    assert np.isnan(result).all()
@@ -0,0 +1,125 @@
+import pytest
+
+from statgis.executor import FetchError, RequestExecutor, is_retryable
+
+
+class Flaky:
+    """Callable that fails with the given errors before returning."""
+
+    def __init__(self, errors, value="ok"):
+        self.errors = list(errors)
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.value
+
+
+def test_retries_rate_limit_errors():
+    executor = RequestExecutor(max_retries=3, backoff=0)
+    func = Flaky([Exception("HTTP 429: Too Many Requests")] * 2)
+
+    assert executor.call(func) == "ok"
+    assert func.calls == 3
+
+
+def test_non_retryable_error_is_reported():
+    executor = RequestExecutor(max_retries=3, backoff=0)
+    func = Flaky([ValueError("Image.select: Band 'X' not found")])
+
+    with pytest.raises(FetchError) as info:
+        executor.call(func, name="select")
+
+    assert info.value.attempts == 1
+    assert not info.value.retryable
+    assert isinstance(info.value.cause, ValueError)
+
+
+def test_retries_are_bounded():
+    executor = RequestExecutor(max_retries=2, backoff=0)
+    func = Flaky([Exception("Quota exceeded")] * 5)
+
+    with pytest.raises(FetchError) as info:
+        executor.call(func)
+
+    assert info.value.attempts == 3
+    assert info.value.retryable
+
+
+def test_timeout_is_retried():
+    import time
+
+    executor = RequestExecutor(max_retries=1, backoff=0, timeout=0.05)
+
+    with pytest.raises(FetchError) as info:
+        executor.call(time.sleep, 0.5)
+
+    assert info.value.attempts == 2
+    assert is_retryable(info.value.cause)
+
+
+def test_async_timeouts_are_retryable():
+    import asyncio
+    from concurrent.futures import TimeoutError as FutureTimeoutError
+
+    assert is_retryable(asyncio.TimeoutError())
+    assert is_retryable(FutureTimeoutError())
+
+
+def test_timed_out_attempts_do_not_delay_the_next():
+    import time
+
+    executor = RequestExecutor(max_workers=2, max_retries=0, timeout=0.1)
+
+    with pytest.raises(FetchError):
+        executor.call(time.sleep, 1)
+
+    # The attempt above still runs, but this one doesn't wait for it.
+    assert executor.call(Flaky([])) == "ok"
+
+
+def test_map_keeps_order_and_returns_failures():
+    executor = RequestExecutor(max_workers=4, backoff=0)
+
+    def func(i):
+        if i == 2:
+            return executor.call(Flaky([ValueError("bad item")]))
+        return i * 10
+
+    results = executor.map(func, range(5), return_exceptions=True)
+
+    assert results[:2] == [0, 10]
+    assert results[3:] == [30, 40]
+    assert isinstance(results[2], FetchError)
+    assert results[2].item == 2
+
+    with pytest.raises(FetchError):
+        executor.map(func, range(5))
+
+
+def test_map_raises_programming_errors():
+    executor = RequestExecutor(max_workers=4, backoff=0)
+
+    def func(i):
+        return {}[i]
+
+    with pytest.raises(KeyError):
+        executor.map(func, range(5), return_exceptions=True)
+
+
+def test_nested_map_is_bounded_by_max_workers(fake):
+    fake.reset(latency=0.02)
+    executor = RequestExecutor(max_workers=3, backoff=0)
+    image = fake.add_image("TEST/IMAGE", {"b": [[1.0]]})
+
+    def inner(j):
+        return executor.get_info(image.get("system:index"))
+
+    results = executor.map(lambda i: executor.map(inner, range(4)), range(4))
+
+    assert results == [["IMAGE"] * 4] * 4
+    assert fake.round_trips() == 16
+    assert fake.peak_in_flight() <= 3
@@ -0,0 +1,66 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import statgis
+
+HEAVY = ("ee", "pandas", "scipy", "rasterio")
+
+# Seconds to import statgis and all its modules, without the heavy
+# dependencies. It takes about 0.25 s, most of it importing numpy.
+IMPORT_BUDGET = 1.0
+
+
+def run(code):
+    """Run code in a new interpreter and return the JSON that it prints."""
+    prelude = "import json, sys, time\nstart = time.perf_counter()\n"
+    result = subprocess.run(
+        [sys.executable, "-c", prelude + code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.path.dirname(statgis.__path__[0])},
+    )
+    return json.loads(result.stdout)
+
+
+def test_import_does_not_load_heavy_dependencies():
+    loaded = run(
+        "import statgis\n"
+        f"for name in {statgis._MODULES!r}:\n"
+        "    getattr(statgis, name)\n"
+        "statgis.compile_indices\n"
+        "seconds = time.perf_counter() - start\n"
+        f"print(json.dumps([[m for m in {HEAVY!r} if m in sys.modules], seconds]))"
+    )
+    modules, seconds = loaded
+
+    assert modules == []
+    assert seconds < IMPORT_BUDGET
+
+
+def test_local_code_paths_do_not_load_earth_engine():
+    modules = run(
+        "import numpy as np\n"
+        "import statgis\n"
+        "data = {'SR_B3': np.ones((4, 4)), 'SR_B5': np.zeros((4, 4))}\n"
+        "statgis.compile_indices('NDWI').numpy(data)\n"
+        "qa = np.zeros((4, 4), 'uint16')\n"
+        "statgis.landsat_preprocessing_local(qa + 8000, qa)\n"
+        f"print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))"
+    )
+
+    assert modules == []
+
+
+def test_facade():
+    assert statgis.zonal_statistics_collection is (
+        statgis.zonal_statistics.zonal_statistics_collection
+    )
+    assert "robust_trend_local" in dir(statgis)
+
+    with pytest.raises(AttributeError):
+        statgis.not_a_function
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from statgis.indices import compile_indices, load_indices
+
+rng = np.random.default_rng(4)
+data = {
+    band: rng.uniform(0.01, 0.5, size=(6, 7)).astype(np.float32)
+    for band in ["SR_B2", "SR_B3", "SR_B4", "SR_B5", "SR_B6", "SR_B7"]
+}
+
+
+def test_all_indices_compile():
+    keys = list(load_indices())
+    indices = compile_indices(keys).numpy(data)
+
+    assert len(keys) == 17
+    assert all(np.isfinite(indices[key]).all() for key in keys)
+
+
+def test_values_and_dtype():
+    indices = compile_indices(["NDVI", "EVI", "BAI"]).numpy(data)
+    nir, red, blue = data["SR_B5"], data["SR_B4"], data["SR_B2"]
+
+    assert indices["NDVI"].dtype == np.float32
+    np.testing.assert_array_equal(indices["NDVI"], (nir - red) / (nir + red))
+    np.testing.assert_array_equal(
+        indices["EVI"], 2.5 * ((nir - red) / (nir + 6 * red - 7.5 * blue + 1))
+    )
+    np.testing.assert_allclose(
+        indices["BAI"], 1 / ((0.1 - red) ** 2 + (0.06 - nir) ** 2), rtol=1e-6
+    )
+
+
+def test_common_subexpressions_are_shared():
+    ndvi = compile_indices("NDVI")
+    both = compile_indices(["NDVI", "EVI", "SAVI"])
+
+    # NIR - RED and NIR + RED are compiled once for the three indices: EVI
+    # adds 7 of its 8 operations and SAVI 3 of its 5.
+    assert len(both.steps) == len(ndvi.steps) + 7 + 3
+
+
+def test_division_by_zero_is_zero():
+    zeros = {key: np.zeros(3, dtype=np.float32) for key in data}
+
+    np.testing.assert_array_equal(compile_indices("NDVI").numpy(zeros)["NDVI"], 0)
+
+
+def test_missing_band():
+    with pytest.raises(KeyError):
+        compile_indices("NDVI", {"R_RED": "B4"})
@@ -0,0 +1,73 @@
+import ee
+import numpy as np
+import pytest
+
+from statgis.instrumentation import (
+    GraphBudgetExceeded,
+    assert_graph_budget,
+    graph_stats,
+    node_count,
+)
+from statgis.plume import plume_characterization
+from statgis.time_series_analysis import calc_anomalies, reduce_by_month, trend
+
+SIGNATURE = {
+    "args": [
+        {"name": "left", "type": "Object"},
+        {"name": "right", "type": "Object"},
+    ],
+    "returns": "Object",
+}
+
+add = ee.ApiFunction("Number.add", SIGNATURE)
+multiply = ee.ApiFunction("Number.multiply", SIGNATURE)
+
+
+def chain():
+    shared = add.call(1, 2)
+    return multiply.call(add.call(shared, shared), 3)
+
+
+def test_graph_stats():
+    stats = graph_stats(chain())
+
+    assert stats["nodes"] == node_count(chain()) == 3
+    assert stats["depth"] == 3
+    assert stats["functions"] == {"Number.add": 2, "Number.multiply": 1}
+    assert stats["bytes"] == len(chain().serialize().replace(" ", ""))
+
+
+def test_budget():
+    stats = assert_graph_budget(chain(), max_nodes=3, max_depth=3)
+    assert stats["nodes"] == 3
+
+    with pytest.raises(GraphBudgetExceeded) as error:
+        assert_graph_budget(chain(), max_depth=2, max_calls={"Number.add": 1})
+
+    assert len(error.value.violations) == 2
+    assert isinstance(error.value, AssertionError)
+
+
+def test_statgis_graph_budgets(fake):
+    bands = ("SR_B2", "SR_B3", "SR_B4", "SR_B5")
+    image = fake.add_image("TEST/L8/0", {band: np.ones((4, 4)) for band in bands})
+    collection = fake.add_collection("TEST/L8", [image])
+
+    trended = trend(collection, "SR_B3")
+    monthly_mean = reduce_by_month(trended, fake.Reducer.mean(), "stational")
+    anomalies = calc_anomalies(trended, monthly_mean)
+    plume = plume_characterization(image, fake.Geometry.Rectangle([0, 0, 2, 2]))
+
+    # Budgets with some room over the current graphs, to catch their growth.
+    assert_graph_budget(
+        trended, max_nodes=36, max_depth=19, max_calls={"ImageCollection.reduce": 2}
+    )
+    assert_graph_budget(
+        monthly_mean, max_nodes=48, max_depth=26, max_calls={"Collection.filter": 1}
+    )
+    assert_graph_budget(
+        anomalies, max_nodes=68, max_depth=29, max_calls={"Join.apply": 1}
+    )
+    assert_graph_budget(
+        plume, max_nodes=52, max_depth=36, max_calls={"Image.reduceRegion": 1}
+    )
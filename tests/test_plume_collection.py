@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from statgis.plume import plume_collection
+
+dates = pd.date_range("2021-03-01", periods=3, freq="16D")
+
+
+def scene(cloudy=False):
+    bands = {}
+    for name in ("SR_B2", "SR_B3", "SR_B4"):
+        band = np.full((20, 20), 0.1)
+        band[:10, :10] = 0.25
+        band[1, 1], band[1, 2] = 0.2, 0.3
+        if cloudy:
+            band[:6, :6] = np.nan
+        bands[name] = band
+    bands["SR_B5"] = np.full((20, 20), 0.05)
+
+    return bands
+
+
+def test_cloudy_scenes_are_nan(fake):
+    images = [
+        fake.add_image(f"TEST/L8/{i}", scene(cloudy=i == 1), time_start=date)
+        for i, date in enumerate(dates)
+    ]
+    collection = fake.add_collection("TEST/L8", images)
+
+    data = plume_collection(
+        collection,
+        fake.Geometry.Rectangle([0, 0, 5, 5]),
+        fake.Geometry.Rectangle([0, 0, 20, 20]),
+    )
+
+    assert data["plume_pixels"].isna().tolist() == [False, True, False]
+    assert data["plume_pixels"][0] == 98
+    np.testing.assert_allclose(data["plume_area"][[0, 2]], 98 * 900)
+    assert data.loc[1, ["plume_area", "plume_lon", "plume_lat"]].isna().all()
+    np.testing.assert_allclose(data["plume_lat"][0], 4.5, atol=0.1)
@@ -0,0 +1,73 @@
+import numpy as np
+
+from statgis.plume import plume_characterization_local
+
+shape = (40, 40)
+blue = np.full(shape, 0.02)
+green = np.full(shape, 0.03)
+red = np.full(shape, 0.01)
+nir = np.full(shape, 0.005)
+
+# Sediment plume: brighter in the three color bands.
+big = (slice(5, 15), slice(5, 15))
+small = (slice(30, 35), slice(30, 35))
+for region in (big, small):
+    blue[region] = 0.06
+    green[region] = 0.09
+    red[region] = 0.07
+
+rng = np.random.default_rng(3)
+for band in (blue, green, red):
+    band += rng.uniform(-0.005, 0.005, shape)
+
+sample_region = np.zeros(shape, dtype=bool)
+sample_region[7:13, 7:13] = True
+
+
+def test_keeps_regions_larger_than_threshold():
+    plume = plume_characterization_local(blue, green, red, nir, sample_region)
+
+    assert plume[8:12, 8:12].all()
+    assert not plume[small].any()
+    assert not plume[20:28, 20:28].any()
+
+
+def test_land_pixels_are_not_plume():
+    land_nir = nir.copy()
+    land_nir[5:15, 5:10] = 0.3
+
+    plume = plume_characterization_local(blue, green, red, land_nir, sample_region)
+
+    assert not plume[5:15, 5:10].any()
+
+
+def test_diagonal_pixels_are_not_connected():
+    color = np.zeros(shape)
+    region = np.zeros(shape, dtype=bool)
+
+    # Sample square with limits 0.04 and 0.06, and a diagonal line of 40
+    # pixels with a plume color that only touch by their corners.
+    color[0:6, 30:36] = 0.05
+    color[0, 30] = 0.04
+    color[1, 31] = 0.06
+    region[0:6, 30:36] = True
+
+    idx = np.arange(40)
+    color[idx, idx] = 0.05
+
+    plume = plume_characterization_local(
+        color, color + 0.01, color, nir, region, min_size=5
+    )
+
+    assert plume[2:6, 32:36].all()
+    assert not plume[idx, idx].any()
+
+
+def test_sample_region_without_water():
+    cloudy = blue.copy()
+    cloudy[sample_region] = np.nan
+
+    plume = plume_characterization_local(cloudy, green, red, nir, sample_region)
+
+    assert plume.shape == shape
+    assert not plume.any()
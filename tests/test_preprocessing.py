@@ -0,0 +1,106 @@
+import numpy as np
+
+from statgis.instrumentation import graph_stats
+from statgis.landsat_functions import (
+    landsat_cloud_mask,
+    landsat_preprocessing,
+    landsat_preprocessing_local,
+    landsat_scaler,
+)
+from statgis.sample import sample_image
+from statgis.sentinel_functions import (
+    sentinel_cloud_mask,
+    sentinel_preprocessing,
+    sentinel_preprocessing_local,
+    sentinel_scaler,
+)
+
+rng = np.random.default_rng(5)
+dn = rng.integers(7000, 30000, size=(4, 8, 9), dtype=np.uint16)
+
+
+def test_landsat_mask_and_scale():
+    qa = np.full((8, 9), 21824, dtype=np.uint16)
+    qa[0, 0] |= 1 << 3
+    qa[1, 1] |= 1 << 2
+    qa[2, 2] |= 1 << 5
+
+    out = np.empty(dn.shape, dtype=np.float32)
+    result = landsat_preprocessing_local(dn, qa, out=out)
+
+    assert result is out
+    assert np.isnan(result[:, [0, 1, 2], [0, 1, 2]]).all()
+    expected = dn[:, 5, 5] * 0.0000275 - 0.2
+    np.testing.assert_allclose(result[:, 5, 5], expected, rtol=1e-6)
+
+    clouds_only = landsat_preprocessing_local(dn, qa, all=False)
+    assert np.isnan(clouds_only[:, 0, 0]).all()
+    assert np.isfinite(clouds_only[:, [1, 2], [1, 2]]).all()
+
+
+def test_landsat_thermal():
+    qa = np.zeros((8, 9), dtype=np.uint16)
+    result = landsat_preprocessing_local(dn[:1], qa, thermal=True)
+
+    np.testing.assert_allclose(result[0], dn[0] * 0.00341802 + 149, rtol=1e-6)
+
+
+def test_sentinel_mask_and_scale():
+    qa = np.zeros((8, 9), dtype=np.uint16)
+    qa[0, 0] = 1 << 10
+    qa[0, 1] = 1 << 11
+
+    result = sentinel_preprocessing_local(dn, qa)
+
+    assert result.dtype == np.float32
+    assert np.isnan(result[:, 0, :2]).all()
+    np.testing.assert_array_equal(result[:, 1:], dn[:, 1:] / np.float32(10000))
+
+
+def assert_same_pixels(fake, fused, chained, bands):
+    roi = fake.Geometry.Rectangle([0, 0, 9, 8])
+    expected = sample_image(chained, bands, roi, 30)
+    result = sample_image(fused, bands, roi, 30)
+
+    for band in bands:
+        assert 0 < len(expected[band]) < 8 * 9
+        np.testing.assert_allclose(result[band], expected[band])
+
+
+def test_landsat_preprocessing_matches_scaler_and_mask(fake):
+    qa = np.full((8, 9), 21824, dtype=np.uint16)
+    qa[0, :3] |= 1 << 3
+    qa[1, :3] |= 1 << 2
+    qa[2, :3] |= 1 << 5
+    bands = {f"SR_B{i + 2}": dn[i] for i in range(3)}
+    image = fake.add_image("TEST/LANDSAT", {**bands, "ST_B10": dn[3], "QA_PIXEL": qa})
+
+    for mask_all in (True, False):
+        assert_same_pixels(
+            fake,
+            landsat_preprocessing(image, mask_all),
+            landsat_cloud_mask(landsat_scaler(image), mask_all),
+            [*bands, "ST_B10"],
+        )
+
+    # All the QA_PIXEL bits are tested by one bitmask.
+    functions = graph_stats(landsat_preprocessing(image))["functions"]
+    assert functions["Image.bitwiseAnd"] == 1
+
+
+def test_sentinel_preprocessing_matches_scaler_and_mask(fake):
+    qa = np.zeros((8, 9), dtype=np.uint16)
+    qa[0, :3] = 1 << 10
+    qa[1, :3] = 1 << 11
+    bands = {f"B{i + 2}": dn[i] for i in range(4)}
+    image = fake.add_image("TEST/SENTINEL", {**bands, "QA60": qa})
+
+    assert_same_pixels(
+        fake,
+        sentinel_preprocessing(image),
+        sentinel_cloud_mask(sentinel_scaler(image)),
+        list(bands),
+    )
+
+    functions = graph_stats(sentinel_preprocessing(image))["functions"]
+    assert functions["Image.bitwiseAnd"] == 1
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+from statgis.cover_frequency import water_frequency_local
+from statgis.raster_stack import RasterStack
+from statgis.zonal_statistics import zonal_statistics_local
+
+rng = np.random.default_rng(1)
+cube = rng.uniform(0, 0.4, size=(4, 5, 70, 90)).astype(np.float32)
+
+
+def write(path, data, transform=from_origin(500000, 1000000, 30, 30), **options):
+    profile = dict(
+        driver="GTiff",
+        height=data.shape[1],
+        width=data.shape[2],
+        count=data.shape[0],
+        dtype=data.dtype,
+        crs="EPSG:32618",
+        transform=transform,
+        nodata=-9999,
+    )
+    profile.update(options)
+
+    with rasterio.open(path, "w", **profile) as dataset:
+        dataset.write(data)
+
+
+@pytest.fixture
+def scenes(tmp_path):
+    options = [{}, {"interleave": "pixel"}, {"compress": "deflate"}, {"tiled": True}]
+    paths = []
+
+    for t, option in enumerate(options):
+        path = tmp_path / f"scene_{t}.tif"
+        write(path, cube[t], **option)
+        paths.append(path)
+
+    return paths
+
+
+def test_read_windows(scenes):
+    with RasterStack(scenes) as stack:
+        assert stack.shape == cube.shape
+        assert stack.memory_mapped == [True, True, False, False]
+
+        blocks = list(stack.iter_blocks(block_size=32))
+        assert len(blocks) == 3 * 3
+
+        for window, block in blocks:
+            rows, cols = window.toslices()
+            np.testing.assert_array_equal(block, cube[:, :, rows, cols])
+
+
+def test_nodata_is_nan(tmp_path):
+    data = cube[0].copy()
+    data[:, 0, 0] = -9999
+    write(tmp_path / "scene.tif", data)
+
+    with RasterStack(tmp_path) as stack:
+        block = next(iter(stack))[1]
+
+    assert np.isnan(block[0, :, 0, 0]).all()
+
+
+def test_unaligned_scene_is_warped(tmp_path):
+    write(tmp_path / "a.tif", cube[0])
+    write(
+        tmp_path / "b.tif",
+        cube[1, :, 1:, 1:],
+        transform=from_origin(500030, 999970, 30, 30),
+    )
+
+    with RasterStack([tmp_path / "a.tif", tmp_path / "b.tif"]) as stack:
+        assert stack.memory_mapped == [True, False]
+        block = stack.read(next(stack.windows()))
+
+    np.testing.assert_array_equal(block[1, :, 1:, 1:], cube[1, :, 1:, 1:])
+    assert np.isnan(block[1, :, 0, :]).all()
+
+
+def test_cover_frequency_by_windows(scenes):
+    with RasterStack(scenes) as stack:
+        result = stack.apply(water_frequency_local, block_size=32)
+        streamed = water_frequency_local(stack)
+
+    np.testing.assert_array_equal(result, water_frequency_local(cube))
+    np.testing.assert_array_equal(streamed, water_frequency_local(cube))
+
+
+def test_zonal_statistics_by_windows(scenes):
+    labels = np.zeros(cube.shape[-2:], dtype=np.int32)
+    labels[5:40, 10:60] = 1
+    labels[30:70, 50:90] = 2
+    dates = pd.date_range("2020-01-01", periods=len(cube), freq="16D")
+
+    with RasterStack(scenes, dates=dates) as stack:
+        streamed = zonal_statistics_local(stack, labels, tile_size=32)
+        mask = zonal_statistics_local(stack, labels > 0, tile_size=32)
+
+    assert len(streamed) == 2 * len(cube)
+    assert list(mask["date"]) == list(dates)
+    for t, date in enumerate(dates):
+        scene = zonal_statistics_local(cube[t], labels, date=date)
+        pd.testing.assert_frame_equal(
+            streamed.xs(date, level="date", drop_level=False), scene
+        )
+
+        whole = zonal_statistics_local(cube[t], labels > 0, date=date)
+        pd.testing.assert_frame_equal(mask.iloc[[t]].reset_index(drop=True), whole)
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pymannkendall as mk
+import pytest
+
+from statgis import time_series_analysis
+from statgis.time_series_analysis import robust_trend_local
+
+rng = np.random.default_rng(8)
+# 73 days are 0.2 years of MS_PER_YEAR, so the slopes by step of
+# pymannkendall are 0.2 times the slopes by year.
+dates = pd.date_range("2010-01-01", periods=30, freq="73D")
+cube = 0.05 * np.arange(30)[:, None, None] + rng.normal(0, 0.2, size=(30, 5, 6))
+cube[:, 0, 0] = np.round(cube[:, 0, 0], 1)
+cube[5, 1, 1] = 50.0
+cube[rng.uniform(size=cube.shape) < 0.1] = np.nan
+cube[:, 4, 5] = 1.0
+cube[:, 4, 5][[0, 2, 3]] = np.nan
+
+
+def test_matches_pymannkendall():
+    data = robust_trend_local(cube, dates, tile_size=4, processes=1)
+
+    for i in range(5):
+        for j in range(6):
+            series = cube[:, i, j]
+            expected = mk.original_test(series)
+
+            assert data["s"][i, j] == expected.s
+            np.testing.assert_allclose(data["z"][i, j], expected.z, atol=1e-5)
+            np.testing.assert_allclose(data["p"][i, j], expected.p, atol=1e-6)
+            np.testing.assert_allclose(data["tau"][i, j], expected.Tau, atol=1e-6)
+
+            if np.isfinite(series).all():
+                np.testing.assert_allclose(
+                    data["slope"][i, j] * 0.2, expected.slope, rtol=1e-5, atol=1e-8
+                )
+
+
+def test_outlier_does_not_change_the_slope():
+    data = robust_trend_local(cube, dates, processes=1)
+
+    assert abs(data["slope"][1, 1] - 0.25) < 0.1
+    assert data["trend"][1, 1] == 1
+    assert data["trend"][4, 5] == 0
+
+
+def test_chunks_and_process_pool(monkeypatch):
+    serial = robust_trend_local(cube, dates, tile_size=4, processes=1)
+    parallel = robust_trend_local(cube, dates, tile_size=4, processes=2)
+
+    monkeypatch.setattr(time_series_analysis, "PAIRS_PER_CHUNK", 500)
+    chunked = robust_trend_local(cube, dates, tile_size=4, processes=1)
+
+    for key in serial:
+        np.testing.assert_array_equal(serial[key], parallel[key])
+        np.testing.assert_array_equal(serial[key], chunked[key])
+
+
+def test_median_slopes_match_sorted_median():
+    time = np.sort(rng.uniform(0, 10, size=15))
+    y = rng.normal(size=(15, 40))
+    y[rng.uniform(size=y.shape) < 0.4] = np.nan
+
+    expected = []
+    for column in y.T:
+        valid = np.isfinite(column)
+        i, j = np.triu_indices(valid.sum(), 1)
+        t, v = time[valid], column[valid]
+        expected.append(np.median((v[j] - v[i]) / (t[j] - t[i])))
+
+    np.testing.assert_allclose(time_series_analysis._median_slopes(y, time), expected)
+
+
+def test_ndarray_needs_dates():
+    with pytest.raises(ValueError, match="dates is required"):
+        robust_trend_local(cube, processes=1)
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from statgis.time_series_analysis import MS_PER_YEAR, time_series_processing_local
+
+rng = np.random.default_rng(2)
+dates = pd.date_range("2015-01-01", periods=40, freq="29D")
+years = dates.values.astype("datetime64[ms]").astype(np.int64) / MS_PER_YEAR
+cube = (
+    0.02 * (years - years[0])[:, None, None]
+    + 0.1 * np.sin(2 * np.pi * dates.month.values / 12)[:, None, None]
+    + rng.normal(0, 0.01, size=(40, 9, 11))
+)
+cube[rng.uniform(size=cube.shape) < 0.2] = np.nan
+
+
+def reference(series):
+    """Pixel by pixel version of time_series_preocessing."""
+    valid = np.isfinite(series)
+    scale, offset = np.polyfit(years[valid], series[valid], 1)
+
+    predicted = scale * years + offset
+    stational = series - predicted + series[valid].mean()
+
+    monthly = pd.Series(stational).groupby(dates.month.values).mean()
+    stational_mean = monthly.reindex(dates.month.values).values
+
+    return predicted, stational, stational_mean, stational - stational_mean
+
+
+def test_matches_pixel_by_pixel():
+    data, monthly_mean = time_series_processing_local(
+        cube, dates, tile_size=4, processes=1
+    )
+
+    assert monthly_mean.shape == (12, 9, 11)
+
+    for i, j in [(0, 0), (4, 7), (8, 10)]:
+        expected = reference(cube[:, i, j])
+        for key, value in zip(
+            ["predicted", "stational", "stational_mean", "anomaly"], expected
+        ):
+            np.testing.assert_allclose(data[key][:, i, j], value, rtol=1e-5, atol=1e-6)
+
+
+def test_process_pool_matches_serial():
+    serial, _ = time_series_processing_local(cube, dates, tile_size=4, processes=1)
+    parallel, _ = time_series_processing_local(cube, dates, tile_size=4, processes=2)
+
+    for key in serial:
+        np.testing.assert_array_equal(serial[key], parallel[key])
+
+
+def test_ndarray_needs_dates():
+    with pytest.raises(ValueError, match="dates is required"):
+        time_series_processing_local(cube, processes=1)
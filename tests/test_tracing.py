@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from statgis import tracing
+from statgis.cache import enable_cache
+from statgis.executor import FetchError, RequestExecutor
+from statgis.sample import sample_collection
+from statgis.time_series_analysis import extract_dates
+
+
+@pytest.fixture
+def events():
+    recorded = []
+    hook = tracing.add_hook(recorded.append)
+    yield recorded
+    tracing.remove_hook(hook)
+
+
+@pytest.fixture
+def collection(fake):
+    images = [
+        fake.add_image(f"TEST/B/{i}", {"B": np.full((4, 4), i)}, time_start=date)
+        for i, date in enumerate(["2021-01-01", "2021-02-01", "2021-03-01"])
+    ]
+    return fake.add_collection("TEST/B", images)
+
+
+def test_sample_collection_events(fake, events, collection):
+    fake.fail_next(1)
+    sample_collection(collection, "B", fake.Geometry.Rectangle([0, 0, 2, 2]), 30)
+
+    assert len(events) == 4
+    assert all(event.function == "sample_collection" for event in events)
+    assert events[0].params["band"] == "B"
+    assert events[0].params["ImageCollection"] == "ImageCollection"
+    assert sorted(event.params.get("image") for event in events[1:]) == [0, 1, 2]
+    assert sum(event.attempts for event in events) == 5
+    assert all(event.bytes > 0 and event.latency >= 0 for event in events)
+
+
+def test_cache_status(fake, events, collection, tmp_path):
+    enable_cache(tmp_path)
+
+    extract_dates(collection)
+    extract_dates(collection)
+
+    assert [(event.cache, event.attempts) for event in events] == [
+        ("miss", 1),
+        ("hit", 0),
+    ]
+    assert events[1].request == "extract_dates"
+    assert events[1].function == "extract_dates"
+
+
+def test_failed_request():
+    recorded = []
+    hook = tracing.add_hook(recorded.append)
+
+    def fail():
+        raise ValueError("bad request")
+
+    try:
+        with pytest.raises(FetchError):
+            RequestExecutor().call(fail, name="fail")
+    finally:
+        tracing.remove_hook(hook)
+
+    assert recorded[0].function is None
+    assert isinstance(recorded[0].error, FetchError)
+    assert recorded[0].bytes is None
+
+
+class Tracer:
+    """Minimal tracer with the OpenTelemetry API."""
+
+    def __init__(self):
+        self.spans = []
+
+    def start_span(self, name, start_time=None, attributes=None):
+        span = Span(name, start_time, attributes)
+        self.spans.append(span)
+        return span
+
+
+class Span:
+    def __init__(self, name, start_time, attributes):
+        self.name = name
+        self.start_time = start_time
+        self.attributes = attributes
+        self.end_time = None
+
+    def record_exception(self, exception):
+        pass
+
+    def end(self, end_time=None):
+        self.end_time = end_time
+
+
+def test_opentelemetry_hook(fake, collection):
+    tracer = Tracer()
+    hook = tracing.add_hook(tracing.opentelemetry_hook(tracer))
+    try:
+        extract_dates(collection)
+    finally:
+        tracing.remove_hook(hook)
+
+    (span,) = tracer.spans
+    assert span.name == "extract_dates"
+    assert span.attributes["statgis.attempts"] == 1
+    assert span.end_time >= span.start_time
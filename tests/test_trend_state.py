@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from statgis.sample import sample_collection
+from statgis.time_series_analysis import (
+    MS_PER_YEAR,
+    TrendState,
+    time_series_from_state,
+    time_series_processing_local,
+    trend_state,
+    update_trend_state,
+)
+
+rng = np.random.default_rng(5)
+dates = pd.date_range("2016-01-01", periods=36, freq="33D")
+years = dates.values.astype("datetime64[ms]").astype(np.int64) / MS_PER_YEAR
+cube = (
+    0.03 * (years - years[0])[:, None, None]
+    + 0.1 * np.cos(2 * np.pi * dates.month.values / 12)[:, None, None]
+    + rng.normal(0.5, 0.01, size=(36, 6, 7))
+)
+cube[rng.uniform(size=cube.shape) < 0.15] = np.nan
+
+
+def test_incremental_update_matches_full_fit():
+    state = TrendState(cube.shape[1:])
+    for start in range(0, 36, 10):
+        state.update(cube[start : start + 10], dates[start : start + 10])
+
+    data, monthly_mean = time_series_processing_local(cube, dates, processes=1)
+
+    np.testing.assert_allclose(state.fit()["monthly_mean"], monthly_mean, atol=1e-5)
+
+    new = state.apply(cube[30:], dates[30:])
+    for key, value in new.items():
+        np.testing.assert_allclose(value, data[key][30:], atol=1e-5)
+
+
+def test_save_and_load(tmp_path):
+    state = TrendState((3,)).update(cube[:, 0, :3], dates)
+    state.save(tmp_path / "state.npz")
+
+    loaded = TrendState.load(tmp_path / "state.npz")
+
+    for name in TrendState._FIELDS:
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(state, name))
+
+
+def test_earth_engine_state_matches_local(fake):
+    images = [
+        fake.add_image(f"TEST/NDVI/{i}", {"NDVI": cube[i]}, time_start=date)
+        for i, date in enumerate(dates)
+    ]
+    old = fake.add_collection("TEST/OLD", images[:30])
+    new = fake.add_collection("TEST/NEW", images[30:])
+
+    state = update_trend_state(trend_state(old, "NDVI"), new, "NDVI")
+    data, _ = time_series_from_state(new, "NDVI", state)
+
+    roi = fake.Geometry.Rectangle([0, 0, 7, 6])
+    samples = sample_collection(data, ["anomaly", "predicted"], roi, 30)
+
+    local, _ = time_series_processing_local(cube, dates, processes=1)
+    for values, anomaly in zip(samples, local["anomaly"][30:]):
+        np.testing.assert_allclose(
+            values["anomaly"], anomaly[np.isfinite(anomaly)], atol=1e-5
+        )
+
+
+def test_empty_collection_has_a_zero_state(fake):
+    images = [
+        fake.add_image(f"TEST/NDVI/{i}", {"NDVI": cube[i]}, time_start=date)
+        for i, date in enumerate(dates)
+    ]
+    empty = fake.add_collection("TEST/EMPTY", [])
+    new = fake.add_collection("TEST/ALL", images)
+
+    state = update_trend_state(trend_state(empty, "NDVI"), new, "NDVI")
+    data, _ = time_series_from_state(new, "NDVI", state)
+
+    roi = fake.Geometry.Rectangle([0, 0, 7, 6])
+    samples = sample_collection(data, ["anomaly"], roi, 30)
+
+    local, _ = time_series_processing_local(cube, dates, processes=1)
+    for values, anomaly in zip(samples, local["anomaly"]):
+        np.testing.assert_allclose(
+            values["anomaly"], anomaly[np.isfinite(anomaly)], atol=1e-5
+        )
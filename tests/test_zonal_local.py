@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from statgis.zonal_statistics import (
+    ZonalAccumulator,
+    zonal_statistics_image,
+    zonal_statistics_local,
+)
+
+rng = np.random.default_rng(25)
+image = rng.normal(0.3, 0.1, size=(2, 30, 40))
+image[rng.uniform(size=image.shape) < 0.15] = np.nan
+
+labels = np.zeros((30, 40), dtype=np.int32)
+labels[0:10, 0:20] = 1
+labels[10:30, 5:40] = 2
+labels[0:10, 25:35] = 3
+
+
+def assert_frames_equal(local, server):
+    assert list(local.columns) == list(server.columns)
+    assert local.index.equals(server.index)
+    for column in server.columns.drop("date", errors="ignore"):
+        np.testing.assert_allclose(
+            local[column].astype(float), server[column].astype(float)
+        )
+
+
+def test_matches_zonal_statistics_image(fake):
+    ee_image = fake.add_image(
+        "TEST/IMAGE", {"b1": image[0], "b2": image[1]}, time_start="2024-03-01"
+    )
+
+    roi = fake.Geometry.Rectangle([3, 4, 33, 27])
+    mask = np.zeros(labels.shape, dtype=bool)
+    mask[4:27, 3:33] = True
+
+    server = zonal_statistics_image(ee_image, roi, 30)
+    local = zonal_statistics_local(image, mask, date="2024-03-01", tile_size=7)
+    assert_frames_equal(local, server)
+
+    rectangles = {1: [0, 0, 20, 10], 2: [5, 10, 40, 30], 3: [25, 0, 35, 10]}
+    zones = fake.FeatureCollection(
+        [
+            fake.Feature(fake.Geometry.Rectangle(rect), {"name": f"z{label}"})
+            for label, rect in rectangles.items()
+        ]
+    )
+
+    # The zones overlap on the server, so compare zones 1 and 3 with them
+    # rasterized without the overlap.
+    server = zonal_statistics_image(ee_image, zones, 30, zone_id="name")
+    local = zonal_statistics_local(
+        image, labels, date="2024-03-01", zones=["z1", "z2", "z3"], tile_size=8
+    )
+    assert_frames_equal(local.loc[["z1", "z3"]], server.loc[["z1", "z3"]])
+    assert (
+        local.loc["z2", "b1_count"].item() == np.isfinite(image[0][labels == 2]).sum()
+    )
+
+
+def test_states_merge_exactly():
+    full = ZonalAccumulator(2).update(image, labels)
+
+    parts = [
+        ZonalAccumulator(2).update(image[:, rows], labels[rows])
+        for rows in (slice(0, 3), slice(3, 17), slice(17, 30))
+    ]
+    merged = parts[2].merge(parts[0]).merge(parts[1])
+
+    np.testing.assert_array_equal(merged.count, full.count)
+    np.testing.assert_array_equal(merged.max, full.max)
+    np.testing.assert_array_equal(merged.min, full.min)
+    np.testing.assert_allclose(merged.mean, full.mean, rtol=1e-13)
+    np.testing.assert_allclose(merged.m2, full.m2, rtol=1e-12)
+
+    values = image[1][(labels == 3) & np.isfinite(image[1])]
+    stats = full.statistics(["red", "nir"])
+    np.testing.assert_allclose(stats["nir_mean"][3], values.mean())
+    np.testing.assert_allclose(stats["nir_stdDev"][3], values.std())
+
+
+def test_process_pool_and_layout():
+    serial = zonal_statistics_local(image, labels, tile_size=9)
+    parallel = zonal_statistics_local(image, labels, tile_size=9, processes=2)
+
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert serial.index.names == ["zone", "date"]
+    assert list(serial.index.get_level_values("zone")) == [1, 2, 3]
+
+    whole = zonal_statistics_local(image[0])
+    assert whole["b1_count"][0] == np.isfinite(image[0]).sum()
+    np.testing.assert_allclose(whole["b1_stdDev"][0], np.nanstd(image[0]))
+
+    with pytest.raises(ValueError, match="zones"):
+        zonal_statistics_local(image, labels, zones=["a", "b"])
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from statgis import zonal_statistics
+from statgis.zonal_statistics import (
+    zonal_statistics_collection,
+    zonal_statistics_image,
+)
+
+N = 7
+dates = pd.date_range("2022-01-01", periods=N, freq="MS")
+rng = np.random.default_rng(8)
+cube = rng.normal(0.5, 0.1, size=(N, 6, 6))
+
+
+def zones(fake, count):
+    return fake.FeatureCollection(
+        [
+            fake.Feature(fake.Geometry.Rectangle([i, 0, i + 1, 6]), {"name": i})
+            for i in range(count)
+        ]
+    )
+
+
+def test_images_are_paged(fake, monkeypatch):
+    images = [
+        fake.add_image(f"TEST/NDVI/{i}", {"NDVI": cube[i]}, time_start=date)
+        for i, date in enumerate(dates)
+    ]
+    collection = fake.add_collection("TEST/NDVI", images)
+
+    full = zonal_statistics_collection(collection, zones(fake, 6), 30, zone_id="name")
+
+    # Pages of 2 zones and 3 images: 3 pages of zones by 3 pages of images.
+    monkeypatch.setattr(zonal_statistics, "MAX_FEATURES", 6)
+    fake.requests.clear()
+    paged = zonal_statistics_collection(
+        collection, zones(fake, 6), 30, zone_id="name", page_size=2
+    )
+
+    # Plus the number of zones and the number of images.
+    assert fake.round_trips() == 9 + 2
+    pd.testing.assert_frame_equal(paged, full)
+    np.testing.assert_allclose(
+        paged.loc[2, "NDVI_mean"].values, cube[:, :, 2].mean(axis=1)
+    )
+
+
+def test_no_zones(fake):
+    collection = fake.add_collection(
+        "TEST/EMPTY", [fake.add_image("TEST/EMPTY/0", {"NDVI": cube[0]})]
+    )
+
+    data = zonal_statistics_collection(collection, zones(fake, 0), 30)
+
+    assert data.empty
+    assert data.index.names == ["zone", "date"]
+
+
+def test_zone_columns_match_one_region(fake):
+    image = fake.add_image("TEST/NDVI/0", {"NDVI": cube[0]}, time_start=dates[0])
+    roi = fake.Geometry.Rectangle([0, 0, 1, 6])
+
+    for reducer in ("all", fake.Reducer.mean()):
+        region = zonal_statistics_image(image, roi, 30, reducer=reducer)
+        zone = zonal_statistics_image(
+            image, zones(fake, 1), 30, reducer=reducer, zone_id="name"
+        )
+
+        assert list(zone.columns) == list(region.columns.drop("date"))
+        for column in zone.columns.drop("system:time_start"):
+            np.testing.assert_allclose(zone[column].values, region[column].values)
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from statgis.executor import FetchError
+from statgis.zonal_statistics import zonal_statistics_image
+
+rng = np.random.default_rng(24)
+ndvi = rng.normal(0.4, 0.1, size=(20, 24))
+ndvi[rng.uniform(size=ndvi.shape) < 0.2] = np.nan
+ndvi[10:, :12] = np.nan
+
+
+def test_split_matches_unsplit(fake):
+    image = fake.add_image(
+        "TEST/NDVI", {"NDVI": ndvi, "B1": 2 * ndvi}, time_start="2023-05-01"
+    )
+    roi = fake.Geometry.Rectangle([1, 2, 23, 19])
+
+    full = zonal_statistics_image(image, roi, 30)
+
+    fake.reset(max_pixels=60)
+    with pytest.raises(FetchError, match="memory"):
+        zonal_statistics_image(image, roi, 30)
+
+    split = zonal_statistics_image(image, roi, 30, max_split_depth=3)
+
+    assert list(split.columns) == list(full.columns)
+    for column in full.columns.drop("date"):
+        np.testing.assert_allclose(split[column], full[column])
+    assert split["NDVI_count"][0] == np.isfinite(ndvi[2:19, 1:23]).sum()
+
+    fake.reset(max_pixels=10)
+    with pytest.raises(FetchError, match="memory"):
+        zonal_statistics_image(image, roi, 30, max_split_depth=2)
+
+
+def test_split_needs_default_reducer(fake):
+    image = fake.add_image("TEST/NDVI", {"NDVI": ndvi})
+    roi = fake.Geometry.Rectangle([0, 0, 10, 10])
+
+    with pytest.raises(ValueError, match="default reducer"):
+        zonal_statistics_image(
+            image, roi, 30, reducer=fake.Reducer.mean(), max_split_depth=2
+        )
+
+
+def test_split_of_partial_pixels(fake):
+    image = fake.add_image("TEST/NDVI", {"NDVI": ndvi}, time_start="2023-05-01")
+    # The region and its quadrants cover fractions of the pixels on their
+    # borders, that weight the mean and standard deviation.
+    roi = fake.Geometry.Rectangle([0.5, 1.25, 22.75, 18.5])
+
+    full = zonal_statistics_image(image, roi, 30)
+
+    weights = np.outer(
+        np.r_[0.75, np.ones(16), 0.5], np.r_[0.5, np.ones(21), 0.75]
+    ) * np.isfinite(ndvi[1:19, 0:23])
+    values = np.nan_to_num(ndvi[1:19, 0:23])
+    mean = np.average(values, weights=weights)
+    np.testing.assert_allclose(full["NDVI_mean"], mean)
+    np.testing.assert_allclose(
+        full["NDVI_stdDev"], np.sqrt(np.average((values - mean) ** 2, weights=weights))
+    )
+
+    fake.reset(max_pixels=60)
+    split = zonal_statistics_image(image, roi, 30, max_split_depth=3)
+
+    for column in full.columns.drop("date"):
+        np.testing.assert_allclose(split[column], full[column])
+
+
+def test_split_needs_one_region(fake):
+    image = fake.add_image("TEST/NDVI", {"NDVI": ndvi})
+    zones = fake.FeatureCollection(
+        [fake.Feature(fake.Geometry.Rectangle([0, 0, 10, 10]), {"name": "a"})]
+    )
+
+    fake.requests.clear()
+    with pytest.raises(ValueError, match="set of zones"):
+        zonal_statistics_image(image, zones, 30, max_split_depth=2)
+    assert fake.round_trips() == 0
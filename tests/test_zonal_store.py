@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from statgis import zonal_statistics
+from statgis.zonal_statistics import zonal_statistics_collection
+from statgis.zonal_store import ZonalStore
+
+N = 12
+dates = pd.date_range("2021-01-01", periods=N, freq="7D")
+rng = np.random.default_rng(11)
+cube = rng.normal(0.3, 0.05, size=(N, 8, 8))
+
+
+@pytest.fixture
+def images(fake):
+    return [
+        fake.add_image(f"TEST/NDVI/{i}", {"NDVI": cube[i]}, time_start=date)
+        for i, date in enumerate(dates)
+    ]
+
+
+def test_only_new_images_are_reduced(fake, images, tmp_path):
+    roi = fake.Geometry.Rectangle([1, 1, 7, 6])
+    store = ZonalStore(tmp_path)
+
+    first = store.zonal_statistics_collection(
+        fake.add_collection("TEST/DAY1", images[:9]), roi, 30
+    )
+    assert len(first) == 9
+
+    fake.requests.clear()
+    collection = fake.add_collection("TEST/DAY2", images)
+    data = store.zonal_statistics_collection(collection, roi, 30)
+
+    # One request for the ids and one for the three new images.
+    assert fake.round_trips() == 2
+    assert sorted(data["image_id"]) == sorted(f"TEST/NDVI/{i}" for i in range(N))
+
+    full = zonal_statistics_collection(collection, roi, 30)
+    data = data.sort_values("system:time_start").reset_index(drop=True)
+    np.testing.assert_allclose(data["NDVI_mean"], full["NDVI_mean"])
+    np.testing.assert_allclose(data["NDVI_stdDev"], full["NDVI_stdDev"])
+
+    fake.requests.clear()
+    again = store.zonal_statistics_collection(collection, roi, 30)
+    assert fake.round_trips() == 1
+    assert len(again) == N
+
+
+def test_zones_and_keys(fake, images, tmp_path):
+    zones = fake.FeatureCollection(
+        [
+            fake.Feature(fake.Geometry.Rectangle([0, 0, 4, 4]), {"name": "a"}),
+            fake.Feature(fake.Geometry.Rectangle([4, 4, 8, 8]), {"name": "b"}),
+        ]
+    )
+    store = ZonalStore(tmp_path)
+
+    store.zonal_statistics_collection(
+        fake.add_collection("TEST/DAY1", images[:5]), zones, 30, zone_id="name"
+    )
+    data = store.zonal_statistics_collection(
+        fake.add_collection("TEST/DAY2", images), zones, 30, zone_id="name"
+    )
+
+    assert data.index.names == ["zone", "date"]
+    assert len(data) == 2 * N
+    np.testing.assert_allclose(
+        data.loc["b", "NDVI_mean"].values, cube[:, 4:8, 4:8].mean(axis=(1, 2))
+    )
+
+    assert store.key(zones, 30) != store.key(zones, 60)
+    assert store.key(zones, 30) != store.key(zones, 30, bands="NDVI")
+
+
+def test_images_of_other_collections_are_not_mixed(fake, images, tmp_path):
+    other = [
+        fake.add_image(f"TEST/OTHER/{i}", {"NDVI": cube[i] + 1}, time_start=date)
+        for i, date in enumerate(dates)
+    ]
+    roi = fake.Geometry.Rectangle([1, 1, 7, 6])
+    store = ZonalStore(tmp_path)
+
+    store.zonal_statistics_collection(fake.add_collection("TEST/A", images), roi, 30)
+    data = store.zonal_statistics_collection(
+        fake.add_collection("TEST/B", other), roi, 30
+    )
+
+    # Both collections have images 0 to N - 1 as system:index.
+    assert len(data) == N
+    assert data["image_id"].str.startswith("TEST/OTHER/").all()
+    np.testing.assert_allclose(
+        data.sort_values("system:time_start")["NDVI_mean"],
+        cube[:, 1:6, 1:7].mean(axis=(1, 2)) + 1,
+    )
+
+
+def test_first_run_is_paged_without_ids(fake, images, tmp_path, monkeypatch):
+    monkeypatch.setattr(zonal_statistics, "MAX_FEATURES", 5)
+    in_list = []
+    monkeypatch.setattr(
+        fake.Filter, "inList", lambda *args: in_list.append(args) or None
+    )
+    roi = fake.Geometry.Rectangle([1, 1, 7, 6])
+
+    data = ZonalStore(tmp_path).zonal_statistics_collection(
+        fake.add_collection("TEST/DAY1", images), roi, 30
+    )
+
+    # One request for the ids and three pages of at most 5 images.
+    assert fake.round_trips() == 1 + 3
+    assert in_list == []
+    assert len(data) == N
+    np.testing.assert_allclose(
+        data.sort_values("system:time_start")["NDVI_mean"],
+        cube[:, 1:6, 1:7].mean(axis=(1, 2)),
+    )
+
+
+def test_images_without_id(fake, images, tmp_path):
+    anonymous = fake.add_image(
+        "TEST/NDVI/X", {"NDVI": cube[0]}, time_start=dates[0], **{"system:id": None}
+    )
+    collection = fake.add_collection("TEST/DAY1", images + [anonymous])
+
+    with pytest.raises(ValueError, match="1 images .* no system:id"):
+        ZonalStore(tmp_path).zonal_statistics_collection(
+            collection, fake.Geometry.Rectangle([1, 1, 7, 6]), 30
+        )